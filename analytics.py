@@ -0,0 +1,271 @@
+"""Daily and monthly rollups of donations, requests and fulfillments.
+
+Rollup_Daily holds one row per (metric, day, blood group, city) with an
+event count and a unit total; Rollup_Monthly is the same summed by month.
+Charts read these instead of scanning the fact tables, so a multi-year trend
+costs a few hundred rows.
+
+`refresh()` is incremental: Rollup_State keeps a high-water mark (the day
+the last refresh reached) and each run recomputes only the days from
+`lookback_days` before it up to today, plus the months those days fall in.
+Whole days are recomputed, so the refresh is idempotent and also picks up
+rows added late within the lookback window; `full=True` rebuilds everything
+(e.g. after backdated imports).
+
+The fact tables are aggregated with plain SELECTs, which InnoDB answers
+from a consistent snapshot without locking the rows they scan, and the
+buckets are written back with multi-row upserts. An INSERT ... SELECT would
+share-lock every source row in range and hold approvals (which update
+Hospital_Requests and insert Requests_Fulfilled) until the refresh commits.
+
+Each serving process runs the refresh on a background thread (`start()`)
+every `refresh_interval` seconds, so analytics reads never wait for it; a
+run is skipped when another process refreshed within the interval.
+"""
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+from instrumentation import log
+
+METRICS = ('donations', 'requests', 'fulfillments')
+GROUP_COLUMNS = {'blood_group': 'Blood_Group', 'city': 'City'}
+STATE_NAME = 'analytics'
+
+# Each source yields (day, blood_group, city, events, units) rows from `since`.
+SOURCES = {
+    # One donation is one collected unit.
+    'donations': """
+        SELECT don.Donation_Date as day, d.Blood_Group as blood_group, COALESCE(d.City, '') as city,
+               COUNT(*) as events, COUNT(*) as units
+        FROM Donations don
+        JOIN Donors d ON d.Donor_ID = don.Donor_ID
+        WHERE don.Donation_Date >= %s
+        GROUP BY don.Donation_Date, d.Blood_Group, COALESCE(d.City, '')
+    """,
+    'requests': """
+        SELECT Request_Date as day, Blood_Group as blood_group, COALESCE(City, '') as city,
+               COUNT(*) as events, SUM(Units_Requested) as units
+        FROM Hospital_Requests
+        WHERE Request_Date >= %s
+        GROUP BY Request_Date, Blood_Group, COALESCE(City, '')
+    """,
+    'fulfillments': """
+        SELECT f.Fulfilled_Date as day, r.Blood_Group as blood_group, COALESCE(r.City, '') as city,
+               COUNT(*) as events, SUM(f.Units_Supplied) as units
+        FROM Requests_Fulfilled f
+        JOIN Hospital_Requests r ON r.Request_ID = f.Request_ID
+        WHERE f.Fulfilled_Date >= %s
+        GROUP BY f.Fulfilled_Date, r.Blood_Group, COALESCE(r.City, '')
+    """,
+}
+UPSERT_DAILY_QUERY = """
+    INSERT INTO Rollup_Daily (Metric, Bucket_Date, Blood_Group, City, Events, Units)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE Events = VALUES(Events), Units = VALUES(Units)
+"""
+UPSERT_BATCH_SIZE = 1000
+
+EPOCH = date(1900, 1, 1)
+
+# Range predicate rather than MONTH()/YEAR() so idx_donations_date is used.
+DONATIONS_IN_RANGE_QUERY = """
+    SELECT COUNT(*) as donations_month
+    FROM Donations
+    WHERE Donation_Date >= %s AND Donation_Date < %s
+"""
+
+
+class Rollups:
+    def __init__(self, pool=None, refresh_interval=300, lookback_days=2):
+        self.pool = pool
+        self.refresh_interval = refresh_interval
+        self.lookback_days = lookback_days
+        self._refreshed_at = None  # time.time() of the last refresh this process committed
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def start(self):
+        """Refresh every `refresh_interval` seconds on a daemon thread in this process."""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Threads do not survive fork(); each worker starts its own.
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='analytics-rollups', daemon=True).start()
+
+    def refresh_now(self, full=False, max_age=None):
+        """`refresh()` and commit on a connection of `pool`; returns its result."""
+        conn = self.pool.acquire()
+        try:
+            cur = conn.cursor()
+            try:
+                since = self.refresh(cur, full=full, max_age=max_age)
+                conn.commit()
+            finally:
+                cur.close()
+        except Exception:
+            self.pool.release(conn, discard=True)
+            raise
+        self.pool.release(conn)
+        if since is not None:
+            self.mark_refreshed()
+        return since
+
+    def mark_refreshed(self):
+        """Note a refresh; call only once its transaction has committed."""
+        self._refreshed_at = time.time()
+
+    def _run(self):
+        while True:
+            started = time.perf_counter()
+            try:
+                since = self.refresh_now(max_age=self.refresh_interval)
+                if since is not None:
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    log.info(f"📈 Analytics rollups refreshed from {since} in {elapsed_ms:.0f} ms")
+            except Exception as e:
+                log.warning(f"⚠️ Analytics rollup refresh failed, will retry: {str(e)}")
+            time.sleep(self.refresh_interval)
+
+    def refresh(self, cur, full=False, max_age=None):
+        """Recompute the rollups from the high-water mark; the caller commits.
+
+        Returns the first day that was recomputed, or None without changing
+        anything if `max_age` is given and a refresh (by any process)
+        committed less than `max_age` seconds ago.
+        """
+        # Locks the state row, so concurrent refreshes (other workers) queue.
+        cur.execute("""
+            SELECT High_Water_Mark, Refreshed_At > NOW() - INTERVAL %s SECOND as fresh
+            FROM Rollup_State WHERE Name = %s FOR UPDATE
+        """, (max_age or 0, STATE_NAME))
+        row = cur.fetchone()
+        if not full and max_age is not None and row and row['fresh']:
+            return None
+        if full or not row or row['High_Water_Mark'] is None:
+            since = EPOCH
+        else:
+            since = row['High_Water_Mark'] - timedelta(days=self.lookback_days)
+        month_start = since.replace(day=1)
+
+        for metric in METRICS:
+            # A consistent (non-locking) read; see the module docstring.
+            cur.execute(SOURCES[metric], (since,))
+            buckets = [(metric, src['day'], src['blood_group'], src['city'], src['events'], src['units'] or 0)
+                       for src in cur.fetchall()]
+            # Days in range that no longer have any rows must not keep old buckets.
+            cur.execute("DELETE FROM Rollup_Daily WHERE Metric = %s AND Bucket_Date >= %s", (metric, since))
+            for start in range(0, len(buckets), UPSERT_BATCH_SIZE):
+                cur.executemany(UPSERT_DAILY_QUERY, buckets[start:start + UPSERT_BATCH_SIZE])
+
+        # Only rollup tables are read here, and only refreshes write them.
+        cur.execute("DELETE FROM Rollup_Monthly WHERE Bucket_Month >= %s", (month_start,))
+        cur.execute("""
+            INSERT INTO Rollup_Monthly (Metric, Bucket_Month, Blood_Group, City, Events, Units)
+            SELECT Metric, Bucket_Date - INTERVAL (DAYOFMONTH(Bucket_Date) - 1) DAY,
+                   Blood_Group, City, SUM(Events), SUM(Units)
+            FROM Rollup_Daily
+            WHERE Bucket_Date >= %s
+            GROUP BY Metric, Bucket_Date - INTERVAL (DAYOFMONTH(Bucket_Date) - 1) DAY, Blood_Group, City
+        """, (month_start,))
+
+        cur.execute("""
+            INSERT INTO Rollup_State (Name, High_Water_Mark, Refreshed_At)
+            VALUES (%s, CURDATE(), NOW())
+            ON DUPLICATE KEY UPDATE High_Water_Mark = CURDATE(), Refreshed_At = NOW()
+        """, (STATE_NAME,))
+        return since
+
+    @staticmethod
+    def trend(cur, metric, granularity, start, end, group_by=None, blood_group=None, city=None):
+        """Buckets between `start` and `end` (inclusive) as dicts, oldest first."""
+        if granularity == 'month':
+            table, column, fmt = 'Rollup_Monthly', 'Bucket_Month', '%%Y-%%m'
+            start = start.replace(day=1)
+        else:
+            table, column, fmt = 'Rollup_Daily', 'Bucket_Date', '%%Y-%%m-%%d'
+        group = GROUP_COLUMNS[group_by] if group_by else None
+
+        select = [f"DATE_FORMAT({column}, '{fmt}') as bucket"]
+        grouping = [column]
+        if group:
+            select.append(f"{group} as `group`")
+            grouping.append(group)
+        query = f"""
+            SELECT {', '.join(select)}, SUM(Events) as events, SUM(Units) as units
+            FROM {table}
+            WHERE Metric = %s AND {column} BETWEEN %s AND %s
+        """
+        params = [metric, start, end]
+        if blood_group:
+            query += " AND Blood_Group = %s"
+            params.append(blood_group)
+        if city:
+            query += " AND City = %s"
+            params.append(city)
+        query += f" GROUP BY {', '.join(grouping)} ORDER BY {', '.join(grouping)}"
+        cur.execute(query, params)
+        return [
+            dict(row, events=int(row['events']), units=float(row['units'] or 0))
+            for row in cur.fetchall()
+        ]
+
+    @staticmethod
+    def totals(cur, start, end, group_by='blood_group'):
+        """{metric: [{'group', 'events', 'units'}]} for days `start`..`end`.
+
+        Whole months inside the range are read from Rollup_Monthly and the
+        partial months at either end from Rollup_Daily.
+        """
+        group = GROUP_COLUMNS[group_by]
+        first_full = start if start.day == 1 else _next_month(start)
+        # The month `end` falls in only counts as whole if `end` is its last day.
+        after_last_full = _next_month(end)
+        if after_last_full - timedelta(days=1) != end:
+            after_last_full = end.replace(day=1)
+
+        parts, params = [], []
+        if first_full < after_last_full:
+            parts.append(f"""
+                SELECT Metric, {group} as grp, Events, Units FROM Rollup_Monthly
+                WHERE Bucket_Month >= %s AND Bucket_Month < %s
+            """)
+            params += [first_full, after_last_full]
+            parts.append(f"""
+                SELECT Metric, {group} as grp, Events, Units FROM Rollup_Daily
+                WHERE (Bucket_Date BETWEEN %s AND %s) OR (Bucket_Date BETWEEN %s AND %s)
+            """)
+            params += [start, first_full - timedelta(days=1), after_last_full, end]
+        else:
+            parts.append(f"""
+                SELECT Metric, {group} as grp, Events, Units FROM Rollup_Daily
+                WHERE Bucket_Date BETWEEN %s AND %s
+            """)
+            params += [start, end]
+
+        cur.execute(f"""
+            SELECT Metric as metric, grp as `group`, SUM(Events) as events, SUM(Units) as units
+            FROM ({' UNION ALL '.join(parts)}) buckets
+            GROUP BY Metric, grp
+            ORDER BY Metric, grp
+        """, params)
+        result = {metric: [] for metric in METRICS}
+        for row in cur.fetchall():
+            result[row['metric']].append({
+                'group': row['group'],
+                'events': int(row['events']),
+                'units': float(row['units'] or 0),
+            })
+        return result
+
+
+def month_range(day=None):
+    """(first day of the month `day` is in, first day of the next month)."""
+    start = (day or date.today()).replace(day=1)
+    return start, _next_month(start)
+
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
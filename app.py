@@ -1,16 +1,38 @@
 import pymysql
-pymysql.install_as_MySQLdb()
-
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
-from flask_mysqldb import MySQL
+from flask import Flask, Response, g, render_template, request, jsonify, session, redirect, url_for, stream_with_context
 from flask_cors import CORS
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
-from functools import wraps
-import traceback
+import itertools
+import logging
+import os
+import sys
+import time
+
+from analytics import DONATIONS_IN_RANGE_QUERY, GROUP_COLUMNS, METRICS, Rollups, month_range
+from assets import AssetManifest, MissingBuild
+from auth import LOGIN_QUERY, MISSING, USER_QUERY, CachedSessionInterface, UserCache
+from bulk import csv_chunks, detect_format, donor_params, iter_records, ndjson_chunks
+from db import PooledMySQL, PoolTimeout, retry_stats, retry_transient
+from events import Broker, format_sse
+from geo import CITIES_QUERY, CityIndex
+from idempotency import IdempotencyStore, KeyReused
+from instrumentation import DroppingQueueHandler, InstrumentedConnection, Metrics, configure_logging, log
+from inventory import InventoryCache, to_int
+from lots import add_lot, allocate_fefo, expire_lots, expiring_lots
+import matching
+from matching import COMPATIBLE, PRIORITIES
+from movements import MovementLog, log_started, stock_at
+from pagination import decode_cursor, page_size, paginate
+from queries import registry as queries
+from responses import COMPRESSIBLE_TYPES, FastJSONProvider, columnar, compress, etag_matches, list_etag, wants_columns
+from search import search_passes
+from snapshot import DashboardSnapshot, critical_groups
+from sync import SyncFeed, parse_version
 
 # --- FLASK APP SETUP ---
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 
 # IMPORTANT: Set secret key BEFORE configuring CORS
 app.secret_key = 'your_strong_secret_key_here_for_security_12345'
@@ -20,11 +42,14 @@ app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HTTPS
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=24)
+app.config['SESSION_CACHE_SIZE'] = 10000  # verified session cookies remembered per worker
+app.session_interface = CachedSessionInterface(max_size=app.config['SESSION_CACHE_SIZE'])
 
 # Enable CORS - MUST support credentials
+app.config['CORS_ORIGINS'] = ["http://localhost:5000", "http://127.0.0.1:5000"]
 CORS(app, 
      supports_credentials=True, 
-     origins=["http://localhost:5000", "http://127.0.0.1:5000"],
+     origins=app.config['CORS_ORIGINS'],
      allow_headers=["Content-Type"],
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
 
@@ -35,39 +60,390 @@ app.config['MYSQL_PASSWORD'] = 'password'  # CHANGE THIS!
 app.config['MYSQL_DB'] = 'BloodDonationDB'
 app.config['MYSQL_CURSORCLASS'] = 'DictCursor'
 
-mysql = MySQL(app)
+# Connection pool: one bounded set of connections shared by every request
+app.config['MYSQL_POOL_MIN_SIZE'] = 2
+app.config['MYSQL_POOL_MAX_SIZE'] = 20
+app.config['MYSQL_POOL_TIMEOUT'] = 5.0  # seconds to wait for a free connection before 503
+app.config['MYSQL_POOL_IDLE_TIMEOUT'] = 300.0
+app.config['MYSQL_POOL_PING_INTERVAL'] = 30.0
+app.config['MYSQL_POOL_REAP_INTERVAL'] = 60.0  # seconds between sweeps for connections idle past the timeout
+
+# Read replicas: GET /api/* reads go to one of these, everything else to the primary.
+# Each entry overrides the primary's MYSQL_* settings, e.g. [{'MYSQL_PORT': 3307}].
+app.config['MYSQL_REPLICAS'] = []
+app.config['MYSQL_REPLICA_POLICY'] = 'round_robin'  # or 'least_loaded'
+app.config['MYSQL_REPLICA_RETRY_AFTER'] = 30.0  # seconds an unreachable replica is skipped
+app.config['READ_YOUR_WRITES_SECONDS'] = 5.0  # a session reads from the primary this long after writing
+
+# Instrumentation: buffered logging, /metrics histograms and the slow-query log
+app.config['LOG_LEVEL'] = logging.INFO
+app.config['LOG_QUEUE_SIZE'] = 10000  # records buffered before new ones are dropped
+app.config['SLOW_QUERY_MS'] = 100.0
+configure_logging(app.config['LOG_LEVEL'], app.config['LOG_QUEUE_SIZE'])
+metrics = Metrics(slow_query_ms=app.config['SLOW_QUERY_MS'])
+
+mysql = PooledMySQL(app, wrap=lambda conn: InstrumentedConnection(conn, metrics))
+
+# Blood_Stock cache: read endpoints serve from memory, stock writers update it after commit
+app.config['INVENTORY_CACHE_TTL'] = 30
+app.config['EXPIRY_WINDOW_HOURS'] = 72  # lots expiring within this window count as "expiring"
+inventory_cache = InventoryCache(ttl=app.config['INVENTORY_CACHE_TTL'], expiry_hours=app.config['EXPIRY_WINDOW_HOURS'])
+
+# Dashboard snapshot: rebuilt at most once per TTL, patched in place by writers
+app.config['DASHBOARD_SNAPSHOT_TTL'] = 60
+dashboard_snapshot = DashboardSnapshot(inventory_cache, ttl=app.config['DASHBOARD_SNAPSHOT_TTL'])
+
+# Live feed: write handlers publish, /api/stream subscribers fan out
+app.config['STREAM_QUEUE_SIZE'] = 256  # events buffered per subscriber before it must resync
+app.config['STREAM_KEEPALIVE'] = 15  # seconds between SSE keep-alive comments
+broker = Broker(queue_size=app.config['STREAM_QUEUE_SIZE'])
+
+def notify_stock_change(blood_group, delta, units=None):
+    """Applies a committed Blood_Stock change to the inventory cache and the live feed."""
+    inventory_cache.apply(blood_group, delta, units)
+    broker.publish('stock', {
+        'blood': blood_group,
+        'delta': float(delta),
+        'units': float(units) if units is not None else None,
+        'lastUpdated': datetime.now().strftime('%Y-%m-%d %H:%M')
+    })
+
+def notify_request_change(request_id, status, row=None):
+    """Publishes a new or re-statused hospital request and updates the pending count."""
+    dashboard_snapshot.adjust('pendingRequests', 1 if status == 'pending' else -1)
+    broker.publish('request', row or {'id': request_id, 'status': status})
+
+# Keyset pagination for the list endpoints
+app.config['API_PAGE_SIZE'] = 50
+app.config['API_MAX_PAGE_SIZE'] = 500
+app.config['APPROVE_BATCH_MAX_SIZE'] = 500
+app.config['AUTO_ALLOCATE_MAX_DETAILS'] = 1000  # per-request results echoed by /api/requests/auto-allocate
+app.config['AUTO_ALLOCATE_NOTIFY_LIMIT'] = 100  # above this many approvals, stream a single resync instead
+
+# Delta sync for the dashboard's IndexedDB cache (/api/sync/*, see sync.py)
+app.config['SYNC_PAGE_SIZE'] = 1000  # changed + deleted rows per response
+app.config['SYNC_MAX_PAGE_SIZE'] = 5000
+app.config['SYNC_SETTLE_SECONDS'] = 2.0  # held back below the oldest open transaction's start
+
+# Response compression for JSON/CSV bodies at least this large
+app.config['COMPRESS_MIN_BYTES'] = 1024
+app.config['COMPRESS_LEVEL'] = 5
+
+# Dashboard bundle precompiled by frontend/build.mjs (npm run build), served from /assets/
+app.config['ASSET_DIST_DIR'] = os.path.join(app.static_folder, 'dist')
+app.config['ASSET_MAX_AGE'] = 365 * 24 * 3600  # file names change with their contents
+assets = AssetManifest(app.config['ASSET_DIST_DIR'], max_age=app.config['ASSET_MAX_AGE'])
+
+# Production launcher (python -m app serve); command-line flags override these
+app.config['SERVE_BIND'] = '0.0.0.0:5000'
+app.config['SERVE_WORKERS'] = None  # None: 2 x cores + 1 (sync) or one per core (--async)
+app.config['SERVE_THREADS'] = 4  # request threads per sync worker
+app.config['ASGI_FALLBACK_THREADS'] = 32  # threads per async worker for the routes asgi.py hands to Flask
+app.config['SERVE_MAX_REQUESTS'] = 10000  # recycle a worker after this many requests (0 = never)
+app.config['SERVE_MAX_REQUESTS_JITTER'] = 1000  # so workers don't all recycle at once
+app.config['SERVE_GRACEFUL_TIMEOUT'] = 30  # seconds in-flight requests get on reload/stop
+app.config['READINESS_CHECK_INTERVAL'] = 5.0  # seconds /api/ready trusts its last DB ping
+
+# Idempotency-Key handling and transient-error retries for create endpoints
+app.config['IDEMPOTENCY_KEY_TTL'] = 24 * 3600  # seconds a key replays its first response
+app.config['IDEMPOTENCY_CACHE_SIZE'] = 10000  # completed keys kept in memory per worker
+app.config['WRITE_RETRY_ATTEMPTS'] = 3  # tries on deadlock / lock wait timeout
+app.config['WRITE_RETRY_BACKOFF'] = 0.05  # seconds before the first retry, doubled after
+idempotency = IdempotencyStore(ttl=app.config['IDEMPOTENCY_KEY_TTL'], cache_size=app.config['IDEMPOTENCY_CACHE_SIZE'])
+
+# Analytics rollups: refreshed incrementally in the background once per interval, or via POST
+app.config['ANALYTICS_REFRESH_INTERVAL'] = 300  # seconds between background refreshes (any worker's counts)
+app.config['ANALYTICS_LOOKBACK_DAYS'] = 2  # days before the high-water mark recomputed each refresh
+app.config['ANALYTICS_MAX_DAYS'] = 1100  # longest range served at day granularity
+rollups = Rollups(mysql.pool, refresh_interval=app.config['ANALYTICS_REFRESH_INTERVAL'],
+                  lookback_days=app.config['ANALYTICS_LOOKBACK_DAYS'])
+
+# Bulk donor import/export
+app.config['DONOR_IMPORT_BATCH_SIZE'] = 1000  # rows per executemany + commit
+app.config['DONOR_IMPORT_MAX_ERRORS'] = 1000  # per-row errors echoed back
+app.config['DONOR_EXPORT_FETCH_SIZE'] = 1000
+
+# Eligible donors for call-outs (/api/donors/eligible)
+app.config['DONOR_DEFERRAL_DAYS'] = 90  # minimum days between whole-blood donations
+app.config['ELIGIBLE_RADIUS_KM'] = 50
+app.config['ELIGIBLE_MAX_RADIUS_KM'] = 500
+app.config['CITY_INDEX_TTL'] = 600  # seconds before City_Locations is reloaded
+city_index = CityIndex(ttl=app.config['CITY_INDEX_TTL'])
+
+# Stock movement log, written behind the request (see movements.py)
+app.config['STOCK_LOG_QUEUE_SIZE'] = 10000  # movements waiting for the writer thread before new ones are dropped
+app.config['STOCK_LOG_BATCH_SIZE'] = 500  # rows per multi-row INSERT; a full batch flushes early
+app.config['STOCK_LOG_FLUSH_INTERVAL'] = 1.0  # seconds between flushes
+app.config['STOCK_LOG_SPOOL_DIR'] = os.path.join(app.instance_path, 'stock_spool')  # None: no crash recovery
+stock_log = MovementLog(mysql.pool, spool_dir=app.config['STOCK_LOG_SPOOL_DIR'],
+                        queue_size=app.config['STOCK_LOG_QUEUE_SIZE'],
+                        batch_size=app.config['STOCK_LOG_BATCH_SIZE'],
+                        flush_interval=app.config['STOCK_LOG_FLUSH_INTERVAL'])
+
+def pinned_to_primary(sess):
+    """True while a session that just wrote must read its own writes from the primary."""
+    return sess.get('primary_until', 0) > time.time()
+
+@app.before_request
+def route_reads():
+    """Sends GET /api/* reads to a replica unless the session wrote recently.
+
+    Writes, page loads and any read inside a POST (approvals lock and
+    re-read their rows) stay on the primary. Caches filled from a replica
+    (inventory, dashboard snapshot) can lag it by up to their TTL.
+    """
+    if request.method == 'GET' and request.path.startswith('/api/') and not pinned_to_primary(session):
+        mysql.use_replica()
+
+@app.after_request
+def pin_after_write(response):
+    if (mysql.replicas and request.method in ('POST', 'PUT', 'DELETE')
+            and response.status_code < 400 and 'user_id' in session):
+        session['primary_until'] = time.time() + app.config['READ_YOUR_WRITES_SECONDS']
+    return response
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.db_round_trips = 0
+    g.metrics_endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+
+@app.after_request
+def record_request_metrics(response):
+    if request.endpoint != 'static' and 'request_started' in g:
+        metrics.observe_request(
+            request.method,
+            g.metrics_endpoint,
+            response.status_code,
+            time.perf_counter() - g.request_started,
+            g.db_round_trips
+        )
+    return response
+
+@app.after_request
+def compress_response(response):
+    """gzip/brotli large buffered bodies for clients that accept it."""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code in (204, 304) or response.status_code < 200
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    body, encoding = compress(
+        response.get_data(), request.headers.get('Accept-Encoding'),
+        app.config['COMPRESS_MIN_BYTES'], app.config['COMPRESS_LEVEL']
+    )
+    if encoding:
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            # A different encoding is a different representation.
+            response.set_etag(f'{etag}-{encoding}', weak)
+    return response
+
+metrics.add_gauges(lambda: {
+    'db_pool_connections_in_use': ('Pooled connections checked out.', mysql.pool.stats()['in_use']),
+    'db_pool_connections_idle': ('Pooled connections idle.', mysql.pool.stats()['idle']),
+    'db_pool_waiting': ('Requests waiting for a pooled connection.', mysql.pool.stats()['waiting']),
+    'db_pool_checkout_wait_avg_seconds': ('Mean connection checkout wait.', mysql.pool.stats()['checkout_wait_avg_ms'] / 1000),
+    'db_pool_timeouts_total': ('Checkouts that gave up and returned 503.', mysql.pool.stats()['timeouts']),
+    'db_replica_reads_total': ('Requests whose reads went to a replica.', sum(r['reads'] for r in mysql.replicas.stats()['replicas'])),
+    'db_replica_fallbacks_total': ('Replica checkouts that failed over to the primary.', mysql.replicas.stats()['fallbacks']),
+    'db_registered_statements_total': ('Executions of registered hot-path statements.', queries.stats()['executions']),
+    'inventory_cache_hits_total': ('Inventory reads served from memory.', inventory_cache.stats()['hits']),
+    'inventory_cache_misses_total': ('Inventory reads that reloaded Blood_Stock.', inventory_cache.stats()['misses']),
+    'stream_subscribers': ('Open /api/stream connections.', broker.stats()['subscribers']),
+    'log_records_dropped_total': ('Log records dropped because the log queue was full.', DroppingQueueHandler.dropped),
+    'db_transaction_retries_total': ('Transactions re-run after a deadlock or lock wait timeout.', retry_stats['retries']),
+    'idempotent_replays_total': ('Requests answered with the stored response of their Idempotency-Key.', idempotency.stats()['replays']),
+    'auth_user_cache_hits_total': ('Auth checks answered from the user cache.', users.stats()['hits']),
+    'auth_user_cache_misses_total': ('Auth checks that looked the user up in Users.', users.stats()['misses']),
+    'stock_log_queued': ('Stock movements waiting for the background writer.', stock_log.stats()['queued']),
+    'stock_log_written_total': ('Stock movements written to Stock_Movements.', stock_log.stats()['written']),
+    'stock_log_dropped_total': ('Stock movements that overflowed the in-memory queue.', stock_log.stats()['dropped']),
+})
 
 # --- DECORATORS & AUTH ---
+
+# Users are cached for the per-request auth check; see auth.py
+app.config['AUTH_USER_CACHE_TTL'] = 300  # seconds a user row (and so its role) is trusted
+app.config['AUTH_USER_CACHE_SIZE'] = 10000
+app.config['AUTH_VERSION_CHECK_INTERVAL'] = 5.0  # seconds between polls of the Users change counter
+users = UserCache(ttl=app.config['AUTH_USER_CACHE_TTL'], max_size=app.config['AUTH_USER_CACHE_SIZE'],
+                  check_interval=app.config['AUTH_VERSION_CHECK_INTERVAL'])
+
+LOGGED_IN = 'logged_in'
+
 def login_required(f):
-    """Decorator to check if user is logged in."""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        # Check if user_id exists in session
-        if 'user_id' not in session:
-            print(f"❌ Unauthorized access attempt to {request.path}")
-            print(f"   Session data: {dict(session)}")
-            if request.path.startswith('/api'):
-                return jsonify({'success': False, 'message': 'Unauthorized - Please login'}), 401
-            return redirect(url_for('login'))
-        
-        print(f"✅ Authorized user {session.get('username')} accessing {request.path}")
-        return f(*args, **kwargs)
-    return decorated_function
+    """Marks a view as requiring a logged-in user; enforced by `authenticate`."""
+    f.required_role = getattr(f, 'required_role', LOGGED_IN)
+    return f
 
 def role_required(required_role):
-    """Decorator to check if user has the required role."""
+    """Marks a view as requiring `required_role` (admins always pass); implies login."""
     def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            user_role = session.get('role')
-            if user_role == 'admin':
-                return f(*args, **kwargs)
-            if user_role != required_role:
-                return jsonify({'success': False, 'message': 'Permission denied'}), 403
-            return f(*args, **kwargs)
-        return decorated_function
+        f.required_role = required_role
+        return f
     return decorator
 
+def current_user():
+    """The session's user as {'user_id', 'username', 'role'}, or None; resolved once per request."""
+    if 'user' in g:
+        return g.user
+    user = None
+    user_id = session.get('user_id')
+    if user_id is not None:
+        cur = None
+        try:
+            if users.version_check_due():
+                cur = mysql.connection.cursor()
+                users.observe_version(data_version(cur, 'Users'))
+            user = users.get(user_id)
+            if user is MISSING:
+                cur = cur or mysql.connection.cursor()
+                queries.execute(cur, USER_QUERY, (user_id,))
+                user = cur.fetchone()
+                users.put(user_id, user)
+        finally:
+            if cur is not None:
+                cur.close()
+        if user is None:
+            # Account removed since the cookie was issued
+            session.clear()
+    g.user = user
+    return user
+
+@app.before_request
+def authenticate():
+    """Enforces login_required / role_required for the matched view."""
+    if request.method == 'OPTIONS':
+        # CORS preflights carry no cookies; browsers fail the real call unless they get a 2xx.
+        return None
+    view = app.view_functions.get(request.endpoint)
+    required_role = getattr(view, 'required_role', None)
+    if required_role is None:
+        return None
+    user = current_user()
+    if user is None:
+        log.warning("❌ Unauthorized access attempt to %s", request.path)
+        if request.path.startswith('/api'):
+            return jsonify({'success': False, 'message': 'Unauthorized - Please login'}), 401
+        return redirect(url_for('login'))
+    if required_role != LOGGED_IN and user['role'] not in ('admin', required_role):
+        return jsonify({'success': False, 'message': 'Permission denied'}), 403
+    return None
+
+@app.errorhandler(PoolTimeout)
+def pool_exhausted(e):
+    """Fails fast with 503 when every pooled connection is busy."""
+    log.warning(f"⚠️ Connection pool exhausted on {request.path}: {str(e)}")
+    return jsonify({'success': False, 'message': 'Database is busy, please retry shortly'}), 503
+
+# --- LIST RESPONSES ---
+
+# Per-table change counters maintained by triggers, one row per shard (migrations/0005)
+DATA_VERSION_QUERY = queries.define(
+    'data_version', "SELECT CAST(SUM(Version) AS UNSIGNED) as Version FROM Data_Versions WHERE Table_Name = %s"
+)
+
+def data_version(cur, table):
+    """Current change counter of `table`, or None if it is not tracked."""
+    queries.execute(cur, DATA_VERSION_QUERY, (table,))
+    row = cur.fetchone()
+    return row['Version'] if row else None
+
+def request_etag(name, version):
+    """ETag for list `name` at `version` and this request's query string, or None."""
+    if version is None:
+        return None
+    return list_etag(name, version, request.args.items(multi=True))
+
+def not_modified(etag):
+    response = app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def list_response(payload, key, columns, etag=None):
+    """jsonify a list payload, columnar if asked, tagged with `etag`.
+
+    `key` names the list inside `payload`, or is None when the payload is
+    the list itself.
+    """
+    if columns:
+        if key is None:
+            payload = columnar(payload)
+        else:
+            payload = dict(payload)
+            payload.update(columnar(payload.pop(key)))
+    response = jsonify(payload)
+    if etag:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+# --- IDEMPOTENT WRITES ---
+
+def idempotency_key(scope):
+    """IdempotencyKey for this request's Idempotency-Key header, or None without one."""
+    header = request.headers.get('Idempotency-Key')
+    if header is None:
+        return None
+    return idempotency.key_for(f"{scope}:{session['user_id']}", header, request.get_json(silent=True))
+
+def replay_response(stored):
+    status, payload = stored
+    response = jsonify(payload)
+    response.status_code = status
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def write_once(ikey, insert):
+    """Runs `insert(cur) -> payload` in a transaction at most once per idempotency key.
+
+    Deadlocks and lock wait timeouts re-run the transaction. Returns
+    (status, payload, created); `created` is False when an earlier request
+    with the same key already committed and its response is returned.
+    """
+    def attempt():
+        cur = mysql.connection.cursor()
+        try:
+            if ikey:
+                stored = idempotency.claim(cur, ikey)
+                if stored:
+                    mysql.connection.rollback()
+                    return stored + (False,)
+            payload = insert(cur)
+            if ikey:
+                idempotency.complete(cur, ikey, 200, payload)
+            mysql.connection.commit()
+            return 200, payload, True
+        finally:
+            cur.close()
+
+    status, payload, created = retry_transient(
+        attempt, mysql.connection.rollback,
+        app.config['WRITE_RETRY_ATTEMPTS'], app.config['WRITE_RETRY_BACKOFF']
+    )
+    if ikey and created:
+        idempotency.committed(ikey, status, payload)
+        if idempotency.should_purge():
+            purge_idempotency_keys()
+    return status, payload, created
+
+def purge_idempotency_keys():
+    cur = mysql.connection.cursor()
+    try:
+        purged = idempotency.purge(cur)
+        mysql.connection.commit()
+        log.debug(f"🧹 Purged {purged} expired idempotency keys")
+    except Exception as e:
+        mysql.connection.rollback()
+        log.warning(f"⚠️ Could not purge idempotency keys: {str(e)}")
+    finally:
+        cur.close()
+
 # --- BASE ROUTES ---
 @app.route('/')
 def index():
@@ -83,12 +459,16 @@ def login():
             data = request.json
             username = data.get('username')
             
-            print(f"🔐 Login attempt for user: {username}")
+            log.debug("🔐 Login attempt for user: %s", username)
             
-            cur = mysql.connection.cursor()
-            cur.execute("SELECT user_id, username, role FROM Users WHERE username = %s", (username,))
-            user = cur.fetchone()
-            cur.close()
+            user = users.find(username)
+            if user is MISSING:
+                cur = mysql.connection.cursor()
+                cur.execute(LOGIN_QUERY, (username,))
+                user = cur.fetchone()
+                cur.close()
+                if user:
+                    users.put(user['user_id'], user)
 
             if user:
                 # Set session data
@@ -98,9 +478,7 @@ def login():
                 session['role'] = user['role']
                 session.permanent = True  # Make session permanent (24 hours)
                 
-                print(f"✅ Login successful for {username}")
-                print(f"   Session ID: {session.get('user_id')}")
-                print(f"   Role: {session.get('role')}")
+                log.info(f"✅ Login successful for {username}")
                 
                 return jsonify({
                     'success': True, 
@@ -112,12 +490,13 @@ def login():
                     }
                 })
             
-            print(f"❌ Login failed: User not found")
+            log.warning(f"❌ Login failed: User not found")
             return jsonify({'success': False, 'message': 'Invalid username'}), 401
             
+        except PoolTimeout:
+            raise
         except Exception as e:
-            print(f"❌ Login Error: {str(e)}")
-            traceback.print_exc()
+            log.exception(f"❌ Login Error: {str(e)}")
             return jsonify({'success': False, 'message': 'Database connection error'}), 500
     
     return render_template('login.html')
@@ -127,15 +506,30 @@ def logout():
     """Logs out the user and clears the session."""
     username = session.get('username', 'Unknown')
     session.clear()
-    print(f"👋 User logged out: {username}")
+    log.info(f"👋 User logged out: {username}")
     return redirect(url_for('login'))
 
 @app.route('/dashboard-react')
 @login_required
 def dashboard_react():
     """Renders the main application dashboard."""
-    print(f"📊 Dashboard accessed by {session.get('username')}")
-    return render_template('dashboard-react.html', user_role=session['role'])
+    return render_template('dashboard-react.html', user_role=current_user()['role'])
+
+@app.route('/assets/<path:filename>')
+def built_asset(filename):
+    """Serves a fingerprinted bundle from static/dist, precompressed, cached for a year."""
+    return assets.send(filename, request.headers.get('Accept-Encoding'))
+
+@app.template_global()
+def asset_url(name):
+    """URL of the current build of `name` ('dashboard.js', 'dashboard.css')."""
+    return url_for('built_asset', filename=assets.filename(name))
+
+@app.errorhandler(MissingBuild)
+def missing_build(e):
+    """Page loads fail with 503 and the fix, rather than an unstyled page, until the bundle is built."""
+    log.error(f"❌ Dashboard bundle missing: {str(e)}")
+    return Response(f"Dashboard assets are not built: {e}\n", status=503, mimetype='text/plain')
 
 # --- API ENDPOINTS ---
 
@@ -161,58 +555,116 @@ def test_api():
             'database': db['db_name'],
             'session': session_info
         })
+    except PoolTimeout:
+        raise
     except Exception as e:
-        print(f"❌ Test API Error: {str(e)}")
+        log.error(f"❌ Test API Error: {str(e)}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/api/ready', methods=['GET'])
+def readiness():
+    """Readiness probe for load balancers and orchestrators.
+
+    Unlike /api/test this needs no session and pings the database at most
+    once per READINESS_CHECK_INTERVAL per worker; other probes reuse the
+    last result.
+    """
+    ok, error = mysql.pool.health(app.config['READINESS_CHECK_INTERVAL'])
+    if not ok:
+        return jsonify({'ready': False, 'message': error}), 503
+    return jsonify({'ready': True})
+
 @app.route('/api/auth/check', methods=['GET'])
 def check_auth():
     """Check if user is authenticated."""
-    if 'user_id' in session:
+    user = current_user()
+    if user:
         return jsonify({
             'authenticated': True,
             'user': {
-                'username': session.get('username'),
-                'role': session.get('role')
+                'username': user['username'],
+                'role': user['role']
             }
         })
     return jsonify({'authenticated': False}), 401
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint: route latency, SQL timings, round trips, pool and cache gauges."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/pool/stats', methods=['GET'])
+@login_required
+def pool_stats():
+    """Reports connection pool usage: in use, idle, waiting and checkout latency."""
+    return jsonify({'success': True, 'pool': mysql.pool.stats(), 'replicas': mysql.replicas.stats(),
+                    'queries': queries.stats()})
+
+@app.route('/api/cache/stats', methods=['GET'])
+@login_required
+def cache_stats():
+    """Reports inventory cache hit/miss counts and its current version."""
+    return jsonify({'success': True, 'inventory': inventory_cache.stats()})
+
+@app.route('/api/stream', methods=['GET'])
+@login_required
+def stream():
+    """Server-Sent Events feed of stock and request changes.
+
+    Emits `stock` and `request` events as they are committed, and `resync`
+    when this client fell too far behind and should refetch its lists.
+    """
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_event_id = None
+    keepalive = app.config['STREAM_KEEPALIVE']
+    sub = broker.subscribe(last_event_id)
+
+    def events():
+        with sub:
+            yield "retry: 3000\n\n"
+            while True:
+                if sub.overflowed:
+                    sub.overflowed = False
+                    while sub.get(timeout=0) is not None:
+                        pass
+                    yield "event: resync\ndata: {}\n\n"
+                event = sub.get(timeout=keepalive)
+                yield format_sse(event) if event else ": keep-alive\n\n"
+
+    return Response(
+        events(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 # --- Dashboard APIs ---
 
 @app.route('/api/dashboard/stats', methods=['GET'])
 @login_required
 def dashboard_stats():
     """Fetches key statistics for the dashboard."""
-    print("📊 Dashboard stats requested")
+    log.debug("📊 Dashboard stats requested")
     cur = mysql.connection.cursor()
     try:
         # Total Donors
         cur.execute("SELECT COUNT(DISTINCT Donor_ID) as total_donors FROM Donors")
         total_donors = cur.fetchone()['total_donors'] or 0
         
-        # Total Units
-        cur.execute("SELECT SUM(units_available) as total_units FROM Blood_Stock WHERE component_type = 'Whole Blood'")
-        total_units_result = cur.fetchone()
-        total_units = int(total_units_result['total_units']) if total_units_result['total_units'] else 0
+        # Total Units and Critical Stock come from the inventory cache
+        stock = {group: row['units'] for group, row in inventory_cache.stock(cur).items()}
+        total_units = to_int(sum(stock.values()))
+        critical_stock = len(critical_groups(stock))
         
         # Pending Requests
         cur.execute("SELECT COUNT(*) as pending_requests FROM Hospital_Requests WHERE Status = 'Pending'")
         pending_requests = cur.fetchone()['pending_requests'] or 0
         
         # Donations This Month
-        cur.execute("""
-            SELECT COUNT(*) as donations_month 
-            FROM Donations 
-            WHERE MONTH(Donation_Date) = MONTH(CURDATE()) 
-            AND YEAR(Donation_Date) = YEAR(CURDATE())
-        """)
+        cur.execute(DONATIONS_IN_RANGE_QUERY, month_range())
         donations_month = cur.fetchone()['donations_month'] or 0
         
-        # Critical Stock
-        cur.execute("SELECT COUNT(*) as critical_stock FROM Blood_Stock WHERE units_available < 20 AND component_type = 'Whole Blood'")
-        critical_stock = cur.fetchone()['critical_stock'] or 0
-        
         result = {
             'success': True,
             'stats': {
@@ -223,37 +675,44 @@ def dashboard_stats():
                 'criticalStock': critical_stock
             }
         }
-        print(f"✅ Stats fetched: {result['stats']}")
+        log.debug(f"✅ Stats fetched: {result['stats']}")
         return jsonify(result)
     except Exception as e:
-        print(f"❌ Error in dashboard_stats: {str(e)}")
-        traceback.print_exc()
+        log.exception(f"❌ Error in dashboard_stats: {str(e)}")
         return jsonify({'success': False, 'message': 'Failed to fetch dashboard stats'}), 500
     finally:
         cur.close()
 
+@app.route('/api/dashboard/summary', methods=['GET'])
+@login_required
+def dashboard_summary():
+    """Returns stats, critical stock, recent donations and expiring stock in one payload."""
+    cur = mysql.connection.cursor()
+    try:
+        return jsonify(dashboard_snapshot.get(cur))
+    except Exception as e:
+        log.exception(f"❌ Error in dashboard_summary: {str(e)}")
+        return jsonify({'success': False, 'message': 'Failed to fetch dashboard summary'}), 500
+    finally:
+        cur.close()
+
 @app.route('/api/dashboard/critical-stock', methods=['GET'])
 @login_required
 def critical_stock():
     """Fetches list of blood groups with critical stock levels."""
-    print("🚨 Critical stock requested")
+    log.debug("🚨 Critical stock requested")
     cur = mysql.connection.cursor()
     try:
-        cur.execute("""
-            SELECT 
-                blood_group as blood,
-                CAST(units_available AS SIGNED) as units,
-                2 as expiring
-            FROM Blood_Stock 
-            WHERE units_available < 20 AND component_type = 'Whole Blood'
-            ORDER BY units_available ASC
-        """)
-        items = cur.fetchall()
-        print(f"✅ Found {len(items)} critical stock items")
+        inventory = inventory_cache.stock(cur)
+        stock = {group: row['units'] for group, row in inventory.items()}
+        items = [
+            {'blood': group, 'units': to_int(stock[group]), 'expiring': to_int(inventory[group]['expiring'])}
+            for group in critical_groups(stock)
+        ]
+        log.debug(f"✅ Found {len(items)} critical stock items")
         return jsonify(items)
     except Exception as e:
-        print(f"❌ Error in critical_stock: {str(e)}")
-        traceback.print_exc()
+        log.exception(f"❌ Error in critical_stock: {str(e)}")
         return jsonify([])
     finally:
         cur.close()
@@ -262,7 +721,7 @@ def critical_stock():
 @login_required
 def recent_donations():
     """Fetches a list of the 5 most recent donations."""
-    print("📝 Recent donations requested")
+    log.debug("📝 Recent donations requested")
     cur = mysql.connection.cursor()
     try:
         cur.execute("""
@@ -276,11 +735,10 @@ def recent_donations():
             LIMIT 5
         """)
         donations = cur.fetchall()
-        print(f"✅ Found {len(donations)} recent donations")
+        log.debug(f"✅ Found {len(donations)} recent donations")
         return jsonify(donations)
     except Exception as e:
-        print(f"❌ Error in recent_donations: {str(e)}")
-        traceback.print_exc()
+        log.exception(f"❌ Error in recent_donations: {str(e)}")
         return jsonify([])
     finally:
         cur.close()
@@ -289,88 +747,142 @@ def recent_donations():
 @login_required
 def expiring_stock():
     """Fetches a list of stock that is near expiry."""
-    print("⏰ Expiring stock requested")
+    log.debug("⏰ Expiring stock requested")
     cur = mysql.connection.cursor()
     try:
-        cur.execute("""
-            SELECT 
-                blood_group as blood,
-                CAST(units_available / 10 AS SIGNED) as expiring
-            FROM Blood_Stock 
-            WHERE units_available > 0 AND component_type = 'Whole Blood'
-            LIMIT 5
-        """)
-        items = cur.fetchall()
-        print(f"✅ Found {len(items)} expiring stock items")
+        inventory = inventory_cache.stock(cur)
+        items = [
+            {'blood': group, 'expiring': to_int(inventory[group]['expiring'])}
+            for group in sorted(inventory, key=lambda group: -inventory[group]['expiring'])
+            if inventory[group]['expiring'] > 0
+        ][:5]
+        log.debug(f"✅ Found {len(items)} expiring stock items")
         return jsonify(items)
     except Exception as e:
-        print(f"❌ Error in expiring_stock: {str(e)}")
-        traceback.print_exc()
+        log.exception(f"❌ Error in expiring_stock: {str(e)}")
         return jsonify([])
     finally:
         cur.close()
 
 # --- Donor Management APIs ---
 
+DONOR_COLUMNS = """
+        Donor_ID as id,
+        Name as name,
+        Blood_Group as blood,
+        Contact_Number as phone,
+        COALESCE(Email, '') as email,
+        COALESCE(City, '') as location,
+        COALESCE(DATE_FORMAT(Last_Donation_Date, '%%Y-%%m-%%d'), 'Never') as lastDonation,
+        Total_Donations as totalDonations,
+        'active' as status
+"""
+DONOR_SELECT = "SELECT" + DONOR_COLUMNS + "FROM Donors"
+
+def search_pass_query(search_pass, blood_type, limit):
+    """SQL and params for one ranked search pass from search.py."""
+    where, where_params, order, order_params = search_pass
+    query = DONOR_SELECT + " WHERE " + where
+    params = list(where_params)
+    if blood_type != 'all' and blood_type:
+        query += " AND Blood_Group = %s"
+        params.append(blood_type)
+    query += f" ORDER BY {order} LIMIT %s"
+    params.extend(order_params)
+    params.append(limit)
+    return query, params
+
+def search_donors(cur, search, blood_type, limit):
+    """Runs the ranked search passes from search.py until `limit` donors are found."""
+    donors, seen = [], set()
+    for search_pass in search_passes(search):
+        cur.execute(*search_pass_query(search_pass, blood_type, limit + len(seen)))
+        for row in cur.fetchall():
+            if row['id'] not in seen and len(donors) < limit:
+                seen.add(row['id'])
+                donors.append(row)
+        if len(donors) >= limit:
+            break
+    return donors
+
+def donor_page_sql(by_group, after):
+    query = DONOR_SELECT + " WHERE 1=1"
+    if by_group:
+        query += " AND Blood_Group = %s"
+    if after:
+        query += " AND Donor_ID < %s"
+    # Served by the primary key, or by idx_donors_blood_group_id when filtered
+    return query + " ORDER BY Donor_ID DESC LIMIT %s"
+
+# One registered statement per filter combination (see queries.py)
+DONOR_PAGE_QUERIES = {
+    (by_group, after): queries.define(
+        'donor_page' + '_group' * by_group + '_after' * after, donor_page_sql(by_group, after)
+    )
+    for by_group in (False, True) for after in (False, True)
+}
+
+def donor_page_query(blood_type, cursor, limit):
+    """Statement and params for one keyset page of donors (limit + 1 rows)."""
+    by_group = bool(blood_type) and blood_type != 'all'
+    params = []
+    if by_group:
+        params.append(blood_type)
+    if cursor:
+        params.append(cursor['id'])
+    params.append(limit + 1)
+    return DONOR_PAGE_QUERIES[by_group, bool(cursor)], params
+
 @app.route('/api/donors/all', methods=['GET'])
 @login_required
 def get_all_donors():
-    """Fetches a filtered and paginated list of donors."""
-    search = request.args.get('search', '')
+    """Fetches a filtered page of donors, newest first.
+
+    Pass the returned `next_cursor` back as `cursor` to get the next page.
+    A `search` returns the top `limit` matches by rank and no cursor.
+    """
+    search = request.args.get('search', '').strip()
     blood_type = request.args.get('blood_type', 'all')
-    print(f"👥 Donors requested - search: '{search}', blood_type: {blood_type}")
+    try:
+        limit = page_size(request.args.get('limit'), app.config['API_PAGE_SIZE'], app.config['API_MAX_PAGE_SIZE'])
+        cursor = decode_cursor(request.args.get('cursor'), ['id'])
+        columns = wants_columns(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    log.debug(f"👥 Donors requested - search: '{search}', blood_type: {blood_type}")
     
     cur = mysql.connection.cursor()
     try:
-        query = """
-            SELECT 
-                Donor_ID as id,
-                Name as name,
-                Blood_Group as blood,
-                Contact_Number as phone,
-                COALESCE(Email, '') as email,
-                COALESCE(City, '') as location,
-                COALESCE(DATE_FORMAT(Last_Donation_Date, '%%Y-%%m-%%d'), 'Never') as lastDonation,
-                COALESCE((SELECT total_donations FROM Donor_Rewards WHERE donor_id = Donors.Donor_ID), 0) as totalDonations,
-                'active' as status
-            FROM Donors
-            WHERE 1=1
-        """
-        params = []
-        
+        etag = request_etag('donors', data_version(cur, 'Donors'))
+        if etag and etag_matches(request.headers.get('If-None-Match'), etag):
+            return not_modified(etag)
+
         if search:
-            query += " AND (Name LIKE %s OR Email LIKE %s OR Contact_Number LIKE %s)"
-            search_param = f"%{search}%"
-            params.extend([search_param, search_param, search_param])
-        
-        if blood_type != 'all' and blood_type:
-            query += " AND Blood_Group = %s"
-            params.append(blood_type)
-        
-        query += " ORDER BY Donor_ID DESC LIMIT 100"
-        
-        cur.execute(query, params)
-        donors = cur.fetchall()
-        print(f"✅ Found {len(donors)} donors")
-        return jsonify(donors)
+            donors = search_donors(cur, search, blood_type, limit)
+            log.debug(f"✅ Found {len(donors)} donors")
+            return list_response({'success': True, 'donors': donors, 'next_cursor': None}, 'donors', columns, etag)
+
+        queries.execute(cur, *donor_page_query(blood_type, cursor, limit))
+        donors, next_cursor = paginate(cur.fetchall(), limit, lambda row: {'id': row['id']})
+        log.debug(f"✅ Found {len(donors)} donors")
+        return list_response({'success': True, 'donors': donors, 'next_cursor': next_cursor}, 'donors', columns, etag)
     except Exception as e:
-        print(f"❌ Error in get_all_donors: {str(e)}")
-        traceback.print_exc()
-        return jsonify([])
+        log.exception(f"❌ Error in get_all_donors: {str(e)}")
+        return jsonify({'success': False, 'donors': [], 'next_cursor': None}), 500
     finally:
         cur.close()
 
 @app.route('/api/donors/add', methods=['POST'])
-@login_required
+@role_required('staff')
 def add_donor():
     """Adds a new donor."""
-    user_role = session.get('role')
-    if user_role not in ['admin', 'staff']:
-        return jsonify({'success': False, 'message': 'Permission denied'}), 403
-    
     data = request.json
-    cur = mysql.connection.cursor()
     try:
+        ikey = idempotency_key('add_donor')
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    def insert(cur):
         cur.execute("""
             INSERT INTO Donors (Name, Blood_Group, Contact_Number, Email, City, Date_Of_Birth, Gender, Last_Donation_Date)
             VALUES (%s, %s, %s, %s, %s, %s, %s, NULL)
@@ -383,26 +895,326 @@ def add_donor():
             data.get('dob', '1990-01-01'),
             data.get('gender', 'Other')
         ))
+        return {'success': True, 'message': 'Donor added successfully', 'donor_id': cur.lastrowid}
+
+    try:
+        stored = idempotency.cached(ikey) if ikey else None
+        if stored:
+            return replay_response(stored)
+        status, payload, created = write_once(ikey, insert)
+    except KeyReused as e:
+        return jsonify({'success': False, 'message': str(e)}), 422
+    except Exception as e:
+        mysql.connection.rollback()
+        log.exception(f"❌ Error adding donor: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 400
+    if not created:
+        return replay_response((status, payload))
+
+    dashboard_snapshot.adjust('totalDonors', 1)
+    log.info(f"✅ Donor added with ID: {payload['donor_id']}")
+    return jsonify(payload)
+
+DONOR_IMPORT_INSERT = """
+    INSERT INTO Donors (Name, Blood_Group, Contact_Number, Email, City, Date_Of_Birth, Gender)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+def insert_donor_batch(cur, batch, on_error):
+    """Inserts (line, params) pairs as one multi-row INSERT and commits.
+
+    If the batch is rejected, falls back to row-by-row inserts so one bad row
+    only costs its own line. Returns the number of donors inserted.
+    """
+    try:
+        cur.executemany(DONOR_IMPORT_INSERT, [params for _, params in batch])
         mysql.connection.commit()
-        donor_id = cur.lastrowid
-        print(f"✅ Donor added with ID: {donor_id}")
-        return jsonify({'success': True, 'message': 'Donor added successfully', 'donor_id': donor_id})
+        return len(batch)
+    except pymysql.MySQLError:
+        mysql.connection.rollback()
+
+    inserted = 0
+    for line, params in batch:
+        try:
+            cur.execute(DONOR_IMPORT_INSERT, params)
+            mysql.connection.commit()
+            inserted += 1
+        except pymysql.MySQLError as e:
+            mysql.connection.rollback()
+            on_error(line, str(e))
+    return inserted
+
+@app.route('/api/donors/import', methods=['POST'])
+@role_required('staff')
+def import_donors():
+    """Imports donors from a streamed CSV or NDJSON body.
+
+    Rows are validated as they arrive and inserted in committed chunks of
+    DONOR_IMPORT_BATCH_SIZE; invalid rows are reported by line number.
+    """
+    try:
+        fmt = detect_format(request.content_type, request.args.get('format'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 415
+
+    batch_size = app.config['DONOR_IMPORT_BATCH_SIZE']
+    max_errors = app.config['DONOR_IMPORT_MAX_ERRORS']
+    errors, batch, inserted, failed = [], [], 0, 0
+
+    def on_error(line, message):
+        nonlocal failed
+        failed += 1
+        if len(errors) < max_errors:
+            errors.append({'line': line, 'message': message})
+
+    cur = mysql.connection.cursor()
+    try:
+        for line, record, error in iter_records(request.stream, fmt):
+            if error is not None:
+                on_error(line, error)
+                continue
+            try:
+                batch.append((line, donor_params(record)))
+            except ValueError as e:
+                on_error(line, str(e))
+                continue
+            if len(batch) >= batch_size:
+                inserted += insert_donor_batch(cur, batch, on_error)
+                batch = []
+        if batch:
+            inserted += insert_donor_batch(cur, batch, on_error)
+
+        dashboard_snapshot.adjust('totalDonors', inserted)
+        log.info(f"✅ Donor import: {inserted} inserted, {failed} failed")
+        return jsonify({
+            'success': True,
+            'inserted': inserted,
+            'failed': failed,
+            'errors': errors,
+            'errors_truncated': failed > len(errors)
+        })
+    except UnicodeDecodeError as e:
+        dashboard_snapshot.adjust('totalDonors', inserted)
+        return jsonify({'success': False, 'message': f'Body is not valid UTF-8: {e}', 'inserted': inserted}), 400
     except Exception as e:
         mysql.connection.rollback()
-        print(f"❌ Error adding donor: {str(e)}")
-        traceback.print_exc()
+        dashboard_snapshot.adjust('totalDonors', inserted)
+        log.exception(f"❌ Error importing donors: {str(e)}")
+        return jsonify({'success': False, 'message': str(e), 'inserted': inserted}), 500
+    finally:
+        cur.close()
+
+@app.route('/api/donors/export', methods=['GET'])
+@login_required
+def export_donors():
+    """Streams every donor as CSV (default) or NDJSON.
+
+    Rows come from an unbuffered server-side cursor and are written out in
+    DONOR_EXPORT_FETCH_SIZE chunks, so memory stays flat for any table size.
+    """
+    try:
+        fmt = detect_format(None, request.args.get('format', 'csv'))
+    except ValueError as e:
         return jsonify({'success': False, 'message': str(e)}), 400
+    blood_type = request.args.get('blood_type', 'all')
+
+    query = DONOR_SELECT + " WHERE 1=1"
+    params = []
+    if blood_type != 'all' and blood_type:
+        query += " AND Blood_Group = %s"
+        params.append(blood_type)
+    query += " ORDER BY Donor_ID"
+
+    cur = mysql.connection.cursor(pymysql.cursors.SSDictCursor)
+    try:
+        cur.execute(query, params)
+    except Exception as e:
+        cur.close()
+        log.exception(f"❌ Error exporting donors: {str(e)}")
+        return jsonify({'success': False, 'message': 'Failed to export donors'}), 500
+
+    fetch_size = app.config['DONOR_EXPORT_FETCH_SIZE']
+
+    def batches():
+        try:
+            while True:
+                rows = cur.fetchmany(fetch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cur.close()
+
+    if fmt == 'csv':
+        body, mimetype = csv_chunks(batches()), 'text/csv'
+    else:
+        body, mimetype = ndjson_chunks(batches()), 'application/x-ndjson'
+    log.info(f"📤 Donor export started ({fmt})")
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=donors.{fmt}'}
+    )
+
+# --- Eligible donors for emergency call-outs ---
+
+ELIGIBLE_EXPORT_FIELDS = ['id', 'name', 'phone', 'blood', 'location', 'lastDonation', 'distanceKm']
+# Served by idx_donors_group_last_donation / idx_donors_group_city_last_donation (migrations/0010)
+ELIGIBLE_WHERE = " WHERE Blood_Group = %s AND (Last_Donation_Date IS NULL OR Last_Donation_Date <= %s)"
+
+def eligible_search():
+    """(donor groups, deferral cutoff, near city or None, radius km) from the query string."""
+    blood = request.args.get('blood')
+    if blood not in COMPATIBLE:
+        raise ValueError(f"blood must be one of {', '.join(COMPATIBLE)}")
+    groups = COMPATIBLE[blood] if request.args.get('compatible') in ('1', 'true') else (blood,)
+    try:
+        deferral_days = int(request.args.get('deferral_days', app.config['DONOR_DEFERRAL_DAYS']))
+        radius_km = float(request.args.get('radius_km', app.config['ELIGIBLE_RADIUS_KM']))
+    except ValueError as e:
+        raise ValueError('deferral_days and radius_km must be numbers') from e
+    if deferral_days < 0:
+        raise ValueError('deferral_days must not be negative')
+    if not 0 < radius_km <= app.config['ELIGIBLE_MAX_RADIUS_KM']:
+        raise ValueError(f"radius_km must be between 0 and {app.config['ELIGIBLE_MAX_RADIUS_KM']}")
+    cutoff = datetime.now().date() - timedelta(days=deferral_days)
+    return groups, cutoff, request.args.get('near', '').strip() or None, radius_km
+
+def nearby_cities(cur, near, radius_km):
+    """[(city, km)] to search, nearest first. No `near`: [(None, None)], i.e. anywhere.
+
+    A city missing from City_Locations only matches itself.
+    """
+    if near is None:
+        return [(None, None)]
+    if city_index.stale():
+        cur.execute(CITIES_QUERY)
+        city_index.fill(cur.fetchall())
+    cities = city_index.nearby(near, radius_km)
+    return cities if cities is not None else [(near, 0.0)]
+
+def eligible_query(groups, cutoff, city, limit=None):
+    """SQL and params for eligible donors of `groups` in `city` (None: anywhere).
+
+    One index range per group; with `limit`, each is read longest-rested
+    first and cut at `limit`.
+    """
+    parts, params = [], []
+    for group in groups:
+        query = DONOR_SELECT + ELIGIBLE_WHERE
+        params += [group, cutoff]
+        if city is not None:
+            query += " AND City = %s"
+            params.append(city)
+        if limit is not None:
+            query += " ORDER BY Last_Donation_Date LIMIT %s"
+            params.append(limit)
+        parts.append(f"({query})")
+    return ' UNION ALL '.join(parts), params
+
+def call_out_order(groups):
+    """Sort key within a city: the requested group before substitutes, then
+    never donated, then the oldest last donation."""
+    rank = {group: i for i, group in enumerate(groups)}
+    return lambda row: (rank[row['blood']], row['lastDonation'] != 'Never', row['lastDonation'])
+
+@app.route('/api/donors/eligible', methods=['GET'])
+@login_required
+def eligible_donors():
+    """Donors who can give now: nearest city first, then as `call_out_order`.
+
+    ?blood= (required), &near=<city>&radius_km=, &compatible=1 to include
+    donors of compatible groups, &deferral_days= (default DONOR_DEFERRAL_DAYS),
+    &limit=.
+    """
+    try:
+        groups, cutoff, near, radius_km = eligible_search()
+        limit = page_size(request.args.get('limit'), app.config['API_PAGE_SIZE'], app.config['API_MAX_PAGE_SIZE'])
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    cur = mysql.connection.cursor()
+    try:
+        cities = nearby_cities(cur, near, radius_km)
+        order = call_out_order(groups)
+        donors, searched = [], []
+        for city, km in cities:
+            remaining = limit - len(donors)
+            if remaining <= 0:
+                break
+            cur.execute(*eligible_query(groups, cutoff, city, remaining))
+            rows = sorted(cur.fetchall(), key=order)[:remaining]
+            for row in rows:
+                row['distanceKm'] = km
+            donors.extend(rows)
+            if city is not None:
+                searched.append({'city': city, 'km': km, 'donors': len(rows)})
+        return jsonify({
+            'success': True,
+            'groups': list(groups),
+            'eligibleSince': cutoff.isoformat(),
+            'near': near,
+            'cities': searched,
+            'donors': donors
+        })
+    except Exception as e:
+        log.exception(f"❌ Error in eligible_donors: {str(e)}")
+        return jsonify({'success': False, 'message': 'Failed to fetch eligible donors'}), 500
     finally:
         cur.close()
 
-@app.route('/api/donors/update/<int:donor_id>', methods=['PUT'])
+@app.route('/api/donors/eligible/export', methods=['GET'])
 @login_required
+def export_eligible_donors():
+    """Streams eligible donors as CSV or NDJSON for SMS campaign batches.
+
+    Same filters as /api/donors/eligible without the limit, nearest city first.
+    """
+    try:
+        groups, cutoff, near, radius_km = eligible_search()
+        fmt = detect_format(None, request.args.get('format', 'csv'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    cur = mysql.connection.cursor(pymysql.cursors.SSDictCursor)
+    try:
+        cities = nearby_cities(cur, near, radius_km)
+    except Exception as e:
+        cur.close()
+        log.exception(f"❌ Error exporting eligible donors: {str(e)}")
+        return jsonify({'success': False, 'message': 'Failed to export eligible donors'}), 500
+
+    fetch_size = app.config['DONOR_EXPORT_FETCH_SIZE']
+
+    def batches():
+        try:
+            for city, km in cities:
+                cur.execute(*eligible_query(groups, cutoff, city))
+                while True:
+                    rows = cur.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        row['distanceKm'] = km
+                    yield rows
+        finally:
+            cur.close()
+
+    if fmt == 'csv':
+        body, mimetype = csv_chunks(batches(), ELIGIBLE_EXPORT_FIELDS), 'text/csv'
+    else:
+        body, mimetype = ndjson_chunks(batches()), 'application/x-ndjson'
+    log.info(f"📤 Eligible donor export started ({fmt}, {len(cities)} cities)")
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=eligible-donors.{fmt}'}
+    )
+
+@app.route('/api/donors/update/<int:donor_id>', methods=['PUT'])
+@role_required('staff')
 def update_donor(donor_id):
     """Updates an existing donor's information."""
-    user_role = session.get('role')
-    if user_role not in ['admin', 'staff']:
-        return jsonify({'success': False, 'message': 'Permission denied'}), 403
-    
     data = request.json
     cur = mysql.connection.cursor()
     try:
@@ -420,174 +1232,459 @@ def update_donor(donor_id):
             donor_id
         ))
         mysql.connection.commit()
-        print(f"✅ Donor updated with ID: {donor_id}")
+        log.info(f"✅ Donor updated with ID: {donor_id}")
         return jsonify({'success': True, 'message': 'Donor updated successfully'})
     except Exception as e:
         mysql.connection.rollback()
-        print(f"❌ Error updating donor: {str(e)}")
-        traceback.print_exc()
+        log.exception(f"❌ Error updating donor: {str(e)}")
         return jsonify({'success': False, 'message': str(e)}), 400
     finally:
         cur.close()
 
 @app.route('/api/donors/delete/<int:donor_id>', methods=['DELETE'])
-@login_required
+@role_required('staff')
 def delete_donor(donor_id):
     """Deletes a donor from the database."""
-    user_role = session.get('role')
-    if user_role not in ['admin', 'staff']:
-        return jsonify({'success': False, 'message': 'Permission denied'}), 403
-    
     cur = mysql.connection.cursor()
     try:
         cur.execute("DELETE FROM Donors WHERE Donor_ID = %s", (donor_id,))
         mysql.connection.commit()
-        print(f"✅ Donor deleted with ID: {donor_id}")
+        if cur.rowcount:
+            dashboard_snapshot.adjust('totalDonors', -cur.rowcount)
+        log.info(f"✅ Donor deleted with ID: {donor_id}")
         return jsonify({'success': True, 'message': 'Donor deleted successfully'})
     except Exception as e:
         mysql.connection.rollback()
-        print(f"❌ Error deleting donor: {str(e)}")
-        traceback.print_exc()
+        log.exception(f"❌ Error deleting donor: {str(e)}")
         return jsonify({'success': False, 'message': str(e)}), 400
     finally:
         cur.close()
 
 # --- Request Management APIs ---
 
+REQUEST_COLUMNS = """
+        Request_ID as id,
+        Hospital_Name as patient,
+        Blood_Group as blood,
+        CAST(Units_Requested AS SIGNED) as units,
+        Hospital_Name as hospital,
+        Priority as priority,
+        DATE_FORMAT(Request_Date, '%%Y-%%m-%%d') as date,
+        LOWER(Status) as status,
+        City as contact
+"""
+
+def request_page_sql(by_search, by_status, by_group, after):
+    query = "SELECT" + REQUEST_COLUMNS + "FROM Hospital_Requests WHERE 1=1"
+    if by_search:
+        query += " AND (Hospital_Name LIKE %s OR City LIKE %s)"
+    if by_status:
+        query += " AND Status = %s"
+    if by_group:
+        query += " AND Blood_Group = %s"
+    if after:
+        query += " AND (Request_Date < %s OR (Request_Date = %s AND Request_ID < %s))"
+    # Served by idx_requests_date_id, or idx_requests_status_date_id when filtered by status
+    return query + " ORDER BY Request_Date DESC, Request_ID DESC LIMIT %s"
+
+REQUEST_PAGE_QUERIES = {
+    flags: queries.define(
+        'request_page' + ''.join(suffix * flag for suffix, flag in zip(('_search', '_status', '_group', '_after'), flags)),
+        request_page_sql(*flags)
+    )
+    for flags in itertools.product((False, True), repeat=4)
+}
+
+def request_page_query(search, status, blood_type, cursor, limit):
+    """Statement and params for one keyset page of hospital requests (limit + 1 rows)."""
+    by_status = bool(status) and status != 'all'
+    by_group = bool(blood_type) and blood_type != 'all'
+    params = []
+    if search:
+        search_param = f"%{search}%"
+        params.extend([search_param, search_param])
+    if by_status:
+        params.append(status)
+    if by_group:
+        params.append(blood_type)
+    if cursor:
+        params.extend([cursor['date'], cursor['date'], cursor['id']])
+    params.append(limit + 1)
+    return REQUEST_PAGE_QUERIES[bool(search), by_status, by_group, bool(cursor)], params
+
 @app.route('/api/requests/all', methods=['GET'])
 @login_required
 def get_all_requests():
-    """Fetches a list of all hospital requests."""
+    """Fetches a filtered page of hospital requests, newest first.
+
+    Ordered by (Request_Date, Request_ID) so rows sharing a date page stably.
+    """
     search = request.args.get('search', '')
-    print(f"📋 Requests requested - search: '{search}'")
+    status = request.args.get('status', 'all')
+    blood_type = request.args.get('blood_type', 'all')
+    try:
+        limit = page_size(request.args.get('limit'), app.config['API_PAGE_SIZE'], app.config['API_MAX_PAGE_SIZE'])
+        cursor = decode_cursor(request.args.get('cursor'), ['date', 'id'])
+        columns = wants_columns(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    log.debug(f"📋 Requests requested - search: '{search}', status: {status}")
     
     cur = mysql.connection.cursor()
     try:
-        query = """
-            SELECT 
-                Request_ID as id,
-                Hospital_Name as patient,
-                Blood_Group as blood,
-                CAST(Units_Requested AS SIGNED) as units,
-                Hospital_Name as hospital,
-                'urgent' as priority,
-                DATE_FORMAT(Request_Date, '%%Y-%%m-%%d') as date,
-                LOWER(Status) as status,
-                City as contact
-            FROM Hospital_Requests
-            WHERE 1=1
-        """
-        params = []
-        
-        if search:
-            query += " AND (Hospital_Name LIKE %s OR City LIKE %s)"
-            search_param = f"%{search}%"
-            params.extend([search_param, search_param])
-        
-        query += " ORDER BY Request_Date DESC LIMIT 100"
-        
-        cur.execute(query, params)
-        requests_data = cur.fetchall()
-        print(f"✅ Found {len(requests_data)} requests")
-        return jsonify(requests_data)
+        etag = request_etag('requests', data_version(cur, 'Hospital_Requests'))
+        if etag and etag_matches(request.headers.get('If-None-Match'), etag):
+            return not_modified(etag)
+
+        queries.execute(cur, *request_page_query(search, status, blood_type, cursor, limit))
+        requests_data, next_cursor = paginate(
+            cur.fetchall(), limit, lambda row: {'date': row['date'], 'id': row['id']}
+        )
+        log.debug(f"✅ Found {len(requests_data)} requests")
+        return list_response({'success': True, 'requests': requests_data, 'next_cursor': next_cursor}, 'requests', columns, etag)
     except Exception as e:
-        print(f"❌ Error in get_all_requests: {str(e)}")
-        traceback.print_exc()
-        return jsonify([])
+        log.exception(f"❌ Error in get_all_requests: {str(e)}")
+        return jsonify({'success': False, 'requests': [], 'next_cursor': None}), 500
     finally:
         cur.close()
 
+INSERT_REQUEST_QUERY = queries.define('insert_request', """
+    INSERT INTO Hospital_Requests 
+    (Hospital_Name, City, Blood_Group, Component_Type, Units_Requested, Priority, Notes, Request_Date, Status)
+    VALUES (%s, %s, %s, 'Whole Blood', %s, %s, %s, CURDATE(), 'Pending')
+""")
+
 @app.route('/api/requests/add', methods=['POST'])
 @login_required
 def add_request():
-    """Adds a new blood request from a hospital."""
+    """Adds a new blood request from a hospital.
+
+    Integrations should send an Idempotency-Key header so a retried POST
+    returns the original request instead of creating a duplicate.
+    """
     data = request.json
-    cur = mysql.connection.cursor()
     try:
-        cur.execute("""
-            INSERT INTO Hospital_Requests 
-            (Hospital_Name, City, Blood_Group, Component_Type, Units_Requested, Notes, Request_Date, Status)
-            VALUES (%s, %s, %s, 'Whole Blood', %s, %s, CURDATE(), 'Pending')
-        """, (
+        ikey = idempotency_key('add_request')
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    priority = data.get('priority', 'urgent')
+    if priority not in PRIORITIES:
+        return jsonify({'success': False, 'message': f"priority must be one of {', '.join(PRIORITIES)}"}), 400
+
+    def insert(cur):
+        queries.execute(cur, INSERT_REQUEST_QUERY, (
             data['patient'],
             data.get('hospital', 'N/A'),
             data['blood'],
             data['units'],
+            priority,
             data.get('notes', '')
         ))
-        mysql.connection.commit()
-        request_id = cur.lastrowid
-        print(f"✅ Request added with ID: {request_id}")
-        return jsonify({'success': True, 'message': 'Request added successfully', 'request_id': request_id})
+        return {'success': True, 'message': 'Request added successfully', 'request_id': cur.lastrowid}
+
+    try:
+        stored = idempotency.cached(ikey) if ikey else None
+        if stored:
+            return replay_response(stored)
+        status, payload, created = write_once(ikey, insert)
+    except KeyReused as e:
+        return jsonify({'success': False, 'message': str(e)}), 422
     except Exception as e:
         mysql.connection.rollback()
-        print(f"❌ Error adding request: {str(e)}")
-        traceback.print_exc()
+        log.exception(f"❌ Error adding request: {str(e)}")
         return jsonify({'success': False, 'message': str(e)}), 400
-    finally:
-        cur.close()
+    if not created:
+        return replay_response((status, payload))
+
+    request_id = payload['request_id']
+    notify_request_change(request_id, 'pending', {
+        'id': request_id,
+        'patient': data['patient'],
+        'blood': data['blood'],
+        'units': data['units'],
+        'hospital': data['patient'],
+        'priority': priority,
+        'date': datetime.now().strftime('%Y-%m-%d'),
+        'status': 'pending',
+        'contact': data.get('hospital', 'N/A')
+    })
+    log.info(f"✅ Request added with ID: {request_id}")
+    return jsonify(payload)
+
+# Approvals lock Hospital_Requests rows in Request_ID order, then Blood_Stock rows
+# in blood_group order. Keeping that order everywhere means concurrent single and
+# batch approvals queue behind each other instead of deadlocking.
+
+LOCK_REQUEST_QUERY = queries.define('lock_request', """
+    SELECT Units_Requested, Blood_Group, Status
+    FROM Hospital_Requests
+    WHERE Request_ID = %s
+    FOR UPDATE
+""")
+# Check and decrement in one statement so two approvers can never both
+# see the same units as available.
+TAKE_STOCK_QUERY = queries.define('take_stock', """
+    UPDATE Blood_Stock 
+    SET units_available = units_available - %s, last_updated = NOW()
+    WHERE blood_group = %s AND component_type = 'Whole Blood' AND units_available >= %s
+""")
+STOCK_UNITS_QUERY = queries.define(
+    'stock_units', "SELECT units_available FROM Blood_Stock WHERE blood_group = %s AND component_type = 'Whole Blood'"
+)
+FULFILL_REQUEST_QUERY = queries.define(
+    'fulfill_request', "UPDATE Hospital_Requests SET Status = 'Fulfilled' WHERE Request_ID = %s"
+)
+RECORD_FULFILLED_QUERY = queries.define('record_fulfilled', """
+    INSERT INTO Requests_Fulfilled 
+    (Request_ID, Units_Supplied, Fulfilled_Date, Fulfilled_By_User_ID)
+    VALUES (%s, %s, CURDATE(), %s)
+""")
 
 @app.route('/api/requests/approve/<int:request_id>', methods=['POST'])
-@login_required
+@role_required('staff')
 def approve_request(request_id):
-    """Approves a request."""
-    user_role = session.get('role')
-    if user_role not in ['admin', 'staff']:
-        return jsonify({'success': False, 'message': 'Permission denied'}), 403
-    
+    """Approves a request, decrementing stock only if enough units remain."""
     cur = mysql.connection.cursor()
     try:
-        cur.execute("SELECT Units_Requested, Blood_Group, Status FROM Hospital_Requests WHERE Request_ID = %s", (request_id,))
+        queries.execute(cur, LOCK_REQUEST_QUERY, (request_id,))
         req = cur.fetchone()
         
         if not req:
+            mysql.connection.rollback()
             return jsonify({'success': False, 'message': 'Request not found'}), 404
         
         if req['Status'] != 'Pending':
-            return jsonify({'success': False, 'message': f"Request is already {req['Status']}"}), 400
+            mysql.connection.rollback()
+            return jsonify({'success': False, 'message': f"Request is already {req['Status']}"}), 409
             
         units_requested = req['Units_Requested']
         blood_group = req['Blood_Group']
         
-        cur.execute("SELECT units_available FROM Blood_Stock WHERE blood_group = %s AND component_type = 'Whole Blood'", (blood_group,))
-        stock = cur.fetchone()
+        queries.execute(cur, TAKE_STOCK_QUERY, (units_requested, blood_group, units_requested))
         
-        if not stock or stock['units_available'] < units_requested:
+        if cur.rowcount == 0:
+            queries.execute(cur, STOCK_UNITS_QUERY, (blood_group,))
+            stock = cur.fetchone()
+            mysql.connection.rollback()
             return jsonify({'success': False, 'message': f"Insufficient stock of {blood_group}. Available: {stock['units_available'] if stock else 0} units."}), 400
-
-        cur.execute("""
-            UPDATE Blood_Stock 
-            SET units_available = units_available - %s, last_updated = NOW()
-            WHERE blood_group = %s AND component_type = 'Whole Blood'
-        """, (units_requested, blood_group))
         
-        cur.execute("UPDATE Hospital_Requests SET Status = 'Fulfilled' WHERE Request_ID = %s", (request_id,))
+        # The Blood_Stock row is locked now; take the units from the lots that expire first.
+        if allocate_fefo(cur, blood_group, 'Whole Blood', units_requested, request_id) is None:
+            mysql.connection.rollback()
+            return jsonify({'success': False, 'message': f"Not enough unexpired {blood_group} units in stock lots."}), 400
         
-        cur.execute("""
-            INSERT INTO Requests_Fulfilled 
-            (Request_ID, Units_Supplied, Fulfilled_Date, Fulfilled_By_User_ID)
-            VALUES (%s, %s, CURDATE(), %s)
-        """, (request_id, units_requested, session['user_id']))
+        queries.execute(cur, FULFILL_REQUEST_QUERY, (request_id,))
+        queries.execute(cur, RECORD_FULFILLED_QUERY, (request_id, units_requested, session['user_id']))
         
         mysql.connection.commit()
-        print(f"✅ Request {request_id} approved")
+        notify_stock_change(blood_group, -units_requested)
+        stock_log.record(blood_group, 'Whole Blood', -units_requested, 'approved', session['user_id'], request_id)
+        notify_request_change(request_id, 'fulfilled')
+        log.info(f"✅ Request {request_id} approved")
         return jsonify({'success': True, 'message': 'Request approved successfully'})
     except Exception as e:
         mysql.connection.rollback()
-        print(f"❌ Error approving request: {str(e)}")
-        traceback.print_exc()
+        log.exception(f"❌ Error approving request: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    finally:
+        cur.close()
+
+@app.route('/api/requests/approve-batch', methods=['POST'])
+@role_required('staff')
+def approve_requests_batch():
+    """Approves several requests in one transaction.
+
+    Expects {"request_ids": [...]}. Requests are allocated in id order; the ones
+    that cannot be approved are reported per id and do not block the rest.
+    Each result carries the status a single approval would have returned
+    (404 unknown, 409 no longer pending, 400 not enough stock).
+    """
+    data = request.json or {}
+    try:
+        request_ids = sorted({int(request_id) for request_id in data.get('request_ids', [])})
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'request_ids must be a list of integers'}), 400
+    if not request_ids:
+        return jsonify({'success': False, 'message': 'No request_ids given'}), 400
+    if len(request_ids) > app.config['APPROVE_BATCH_MAX_SIZE']:
+        return jsonify({'success': False, 'message': f"At most {app.config['APPROVE_BATCH_MAX_SIZE']} requests per batch"}), 400
+
+    cur = mysql.connection.cursor()
+    try:
+        placeholders = ', '.join(['%s'] * len(request_ids))
+        cur.execute(f"""
+            SELECT Request_ID, Units_Requested, Blood_Group, Status
+            FROM Hospital_Requests
+            WHERE Request_ID IN ({placeholders})
+            ORDER BY Request_ID
+            FOR UPDATE
+        """, request_ids)
+        reqs = {row['Request_ID']: row for row in cur.fetchall()}
+
+        blood_groups = sorted({row['Blood_Group'] for row in reqs.values() if row['Status'] == 'Pending'})
+        stock = {}
+        if blood_groups:
+            placeholders = ', '.join(['%s'] * len(blood_groups))
+            cur.execute(f"""
+                SELECT blood_group, units_available
+                FROM Blood_Stock
+                WHERE component_type = 'Whole Blood' AND blood_group IN ({placeholders})
+                ORDER BY blood_group
+                FOR UPDATE
+            """, blood_groups)
+            stock = {row['blood_group']: row['units_available'] for row in cur.fetchall()}
+
+        results, approved, used = [], [], {}
+        for request_id in request_ids:
+            req = reqs.get(request_id)
+            if not req:
+                results.append({'id': request_id, 'success': False, 'status': 404, 'message': 'Request not found'})
+                continue
+            if req['Status'] != 'Pending':
+                results.append({'id': request_id, 'success': False, 'status': 409, 'message': f"Request is already {req['Status']}"})
+                continue
+            blood_group, units = req['Blood_Group'], req['Units_Requested']
+            remaining = stock.get(blood_group, 0) - used.get(blood_group, 0)
+            if remaining < units:
+                results.append({'id': request_id, 'success': False, 'status': 400, 'message': f"Insufficient stock of {blood_group}. Available: {remaining} units."})
+                continue
+            if allocate_fefo(cur, blood_group, 'Whole Blood', units, request_id) is None:
+                results.append({'id': request_id, 'success': False, 'status': 400, 'message': f"Not enough unexpired {blood_group} units in stock lots."})
+                continue
+            used[blood_group] = used.get(blood_group, 0) + units
+            approved.append((request_id, units))
+            results.append({'id': request_id, 'success': True, 'status': 200, 'message': 'Request approved'})
+
+        if approved:
+            for blood_group in sorted(used):
+                cur.execute("""
+                    UPDATE Blood_Stock 
+                    SET units_available = units_available - %s, last_updated = NOW()
+                    WHERE blood_group = %s AND component_type = 'Whole Blood'
+                """, (used[blood_group], blood_group))
+
+            placeholders = ', '.join(['%s'] * len(approved))
+            cur.execute(
+                f"UPDATE Hospital_Requests SET Status = 'Fulfilled' WHERE Request_ID IN ({placeholders})",
+                [request_id for request_id, _ in approved],
+            )
+            cur.executemany("""
+                INSERT INTO Requests_Fulfilled 
+                (Request_ID, Units_Supplied, Fulfilled_Date, Fulfilled_By_User_ID)
+                VALUES (%s, %s, CURDATE(), %s)
+            """, [(request_id, units, session['user_id']) for request_id, units in approved])
+
+        mysql.connection.commit()
+        for blood_group, units in used.items():
+            notify_stock_change(blood_group, -units)
+        for request_id, units in approved:
+            stock_log.record(reqs[request_id]['Blood_Group'], 'Whole Blood', -units, 'approved',
+                             session['user_id'], request_id)
+            notify_request_change(request_id, 'fulfilled')
+        log.info(f"✅ Batch approval: {len(approved)}/{len(request_ids)} requests approved")
+        return jsonify({
+            'success': True,
+            'approved': len(approved),
+            'failed': len(request_ids) - len(approved),
+            'results': results
+        })
+    except Exception as e:
+        mysql.connection.rollback()
+        log.exception(f"❌ Error in batch approval: {str(e)}")
         return jsonify({'success': False, 'message': str(e)}), 500
     finally:
         cur.close()
 
+@app.route('/api/requests/auto-allocate', methods=['POST'])
+@role_required('staff')
+def auto_allocate_requests():
+    """Matches every pending request against current stock and approves what fits.
+
+    Most urgent and oldest requests go first; a request that cannot get its
+    own group is given compatible ones (see matching.py). With ?dry_run=1 (or
+    {"dry_run": true}) the plan is computed and returned without locking or
+    writing anything.
+    """
+    data = request.get_json(silent=True) or {}
+    dry_run = request.args.get('dry_run') in ('1', 'true') or data.get('dry_run') is True
+    started = time.perf_counter()
+
+    def attempt():
+        cur = mysql.connection.cursor()
+        try:
+            pending, stock, lots = matching.load(cur, lock=not dry_run)
+            result = matching.plan(pending, stock, lots)
+            if dry_run:
+                mysql.connection.rollback()
+            else:
+                matching.apply(cur, result, session['user_id'])
+                mysql.connection.commit()
+            return len(pending), result
+        finally:
+            cur.close()
+
+    try:
+        pending_count, result = retry_transient(
+            attempt, mysql.connection.rollback,
+            app.config['WRITE_RETRY_ATTEMPTS'], app.config['WRITE_RETRY_BACKOFF']
+        )
+    except Exception as e:
+        mysql.connection.rollback()
+        log.exception(f"❌ Error in auto-allocation: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if not dry_run and result.allocations:
+        for blood_group, units in result.used.items():
+            notify_stock_change(blood_group, -units)
+        for allocation in result.allocations:
+            for blood_group, units in matching.supplied_by_group(allocation).items():
+                stock_log.record(blood_group, matching.COMPONENT, -units, 'auto_allocated',
+                                 session['user_id'], allocation.request_id)
+        if len(result.allocations) <= app.config['AUTO_ALLOCATE_NOTIFY_LIMIT']:
+            for allocation in result.allocations:
+                notify_request_change(allocation.request_id, 'fulfilled')
+        else:
+            dashboard_snapshot.adjust('pendingRequests', -len(result.allocations))
+            broker.publish('resync', {})
+        log.info(f"✅ Auto-allocation: {len(result.allocations)}/{pending_count} requests approved in {elapsed_ms:.0f} ms")
+
+    max_details = app.config['AUTO_ALLOCATE_MAX_DETAILS']
+    return jsonify({
+        'success': True,
+        'dryRun': dry_run,
+        'pending': pending_count,
+        'approved': len(result.allocations),
+        'unfilled': len(result.unfilled),
+        'substituted': sum(
+            1 for allocation in result.allocations
+            if any(group != allocation.blood_group for group, _, _ in allocation.lots)
+        ),
+        'unitsByGroup': {blood_group: units for blood_group, units in sorted(result.used.items())},
+        'ms': round(elapsed_ms, 1),
+        'results': [
+            {
+                'id': allocation.request_id,
+                'blood': allocation.blood_group,
+                'units': allocation.units,
+                'supplied': [
+                    {'blood': blood_group, 'units': units}
+                    for blood_group, units in matching.supplied_by_group(allocation).items()
+                ]
+            }
+            for allocation in result.allocations[:max_details]
+        ],
+        'unfilledResults': [
+            {'id': request_id, 'message': reason}
+            for request_id, reason in result.unfilled[:max_details]
+        ],
+        'truncated': len(result.allocations) > max_details or len(result.unfilled) > max_details
+    })
+
 @app.route('/api/requests/reject/<int:request_id>', methods=['POST'])
-@login_required
+@role_required('staff')
 def reject_request(request_id):
     """Rejects a pending hospital request."""
-    user_role = session.get('role')
-    if user_role not in ['admin', 'staff']:
-        return jsonify({'success': False, 'message': 'Permission denied'}), 403
-    
     cur = mysql.connection.cursor()
     try:
         cur.execute("UPDATE Hospital_Requests SET Status = 'Cancelled' WHERE Request_ID = %s AND Status = 'Pending'", (request_id,))
@@ -596,53 +1693,111 @@ def reject_request(request_id):
             return jsonify({'success': False, 'message': 'Request not found or already processed'}), 404
             
         mysql.connection.commit()
-        print(f"✅ Request {request_id} rejected")
+        notify_request_change(request_id, 'cancelled')
+        log.info(f"✅ Request {request_id} rejected")
         return jsonify({'success': True, 'message': 'Request rejected successfully'})
     except Exception as e:
         mysql.connection.rollback()
-        print(f"❌ Error rejecting request: {str(e)}")
-        traceback.print_exc()
+        log.exception(f"❌ Error rejecting request: {str(e)}")
         return jsonify({'success': False, 'message': str(e)}), 400
     finally:
         cur.close()
 
 # --- Inventory API ---
 
+def inventory_rows(stock):
+    return [
+        {
+            'blood': group,
+            'units': to_int(row['units']),
+            'expiring': to_int(row['expiring']),
+            'lastUpdated': row['last_updated'].strftime('%Y-%m-%d %H:%M') if row['last_updated'] else None
+        }
+        for group, row in stock.items()
+    ]
+
 @app.route('/api/inventory/all', methods=['GET'])
 @login_required
 def get_inventory():
     """Fetches the current blood stock inventory."""
-    print("📦 Inventory requested")
+    log.debug("📦 Inventory requested")
+    try:
+        columns = wants_columns(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     cur = mysql.connection.cursor()
     try:
-        cur.execute("""
-            SELECT 
-                blood_group as blood,
-                CAST(units_available AS SIGNED) as units,
-                CAST(units_available / 10 AS SIGNED) as expiring,
-                DATE_FORMAT(last_updated, '%%Y-%%m-%%d %%H:%%i') as lastUpdated
-            FROM Blood_Stock
-            WHERE component_type = 'Whole Blood'
-            ORDER BY blood_group
-        """)
-        inventory = cur.fetchall()
-        print(f"✅ Found {len(inventory)} inventory items")
-        return jsonify(inventory)
+        stock = inventory_cache.stock(cur)
+        etag = request_etag('inventory', stock.tag)
+        if etag and etag_matches(request.headers.get('If-None-Match'), etag):
+            return not_modified(etag)
+        inventory = inventory_rows(stock)
+        log.debug(f"✅ Found {len(inventory)} inventory items")
+        return list_response(inventory, None, columns, etag)
     except Exception as e:
-        print(f"❌ Error in get_inventory: {str(e)}")
-        traceback.print_exc()
+        log.exception(f"❌ Error in get_inventory: {str(e)}")
         return jsonify([])
     finally:
         cur.close()
 
-@app.route('/api/inventory/add-stock', methods=['POST'])
+@app.route('/api/inventory/expiring', methods=['GET'])
 @login_required
+def get_expiring_lots():
+    """Lots expiring within ?hours= (default EXPIRY_WINDOW_HOURS), soonest first."""
+    try:
+        hours = int(request.args.get('hours', app.config['EXPIRY_WINDOW_HOURS']))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'hours must be an integer'}), 400
+    if hours <= 0:
+        return jsonify({'success': False, 'message': 'hours must be positive'}), 400
+    cur = mysql.connection.cursor()
+    try:
+        lots = expiring_lots(cur, hours, request.args.get('component'), request.args.get('blood'))
+        for lot in lots:
+            lot['units'] = float(lot['units'])
+        return jsonify({'success': True, 'hours': hours, 'lots': lots})
+    except Exception as e:
+        log.exception(f"❌ Error in get_expiring_lots: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    finally:
+        cur.close()
+
+@app.route('/api/inventory/expire-lots', methods=['POST'])
+@role_required('staff')
+def expire_blood_lots():
+    """Writes off expired lots and removes their units from Blood_Stock.
+
+    Meant to be called periodically (e.g. from cron); safe to run concurrently
+    with approvals since it follows the same lock order.
+    """
+    cur = mysql.connection.cursor()
+    try:
+        removed = expire_lots(cur)
+        mysql.connection.commit()
+        for (blood_group, component), units in removed.items():
+            if component == 'Whole Blood':
+                notify_stock_change(blood_group, -units)
+            stock_log.record(blood_group, component, -units, 'expired', session['user_id'])
+        if removed:
+            log.info(f"🗑️ Expired lots written off: {removed}")
+        return jsonify({
+            'success': True,
+            'removed': [
+                {'blood': blood_group, 'component': component, 'units': units}
+                for (blood_group, component), units in sorted(removed.items())
+            ]
+        })
+    except Exception as e:
+        mysql.connection.rollback()
+        log.exception(f"❌ Error expiring lots: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    finally:
+        cur.close()
+
+@app.route('/api/inventory/add-stock', methods=['POST'])
+@role_required('staff')
 def add_blood_stock():
     """Add blood stock."""
-    user_role = session.get('role')
-    if user_role not in ['admin', 'staff']:
-        return jsonify({'success': False, 'message': 'Permission denied'}), 403
-    
     data = request.json
     cur = mysql.connection.cursor()
     try:
@@ -652,7 +1807,13 @@ def add_blood_stock():
         if not blood_type or units <= 0:
             return jsonify({'success': False, 'message': 'Invalid blood type or units'}), 400
         
-        print(f"📦 Adding {units} units of {blood_type}")
+        try:
+            collected_at = datetime.fromisoformat(data['collected_at']) if data.get('collected_at') else None
+            expires_at = datetime.fromisoformat(data['expires_at']) if data.get('expires_at') else None
+        except ValueError:
+            return jsonify({'success': False, 'message': 'collected_at and expires_at must be ISO dates'}), 400
+        
+        log.info(f"📦 Adding {units} units of {blood_type}")
         
         cur.execute("""
             UPDATE Blood_Stock 
@@ -661,7 +1822,18 @@ def add_blood_stock():
             WHERE blood_group = %s AND component_type = 'Whole Blood'
         """, (units, blood_type))
         
+        if cur.rowcount == 0:
+            mysql.connection.rollback()
+            return jsonify({'success': False, 'message': f'Unknown blood type {blood_type}'}), 400
+        
+        try:
+            lot_id, expires_at = add_lot(cur, blood_type, 'Whole Blood', units, collected_at, expires_at, session['user_id'])
+        except ValueError as e:
+            mysql.connection.rollback()
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
         mysql.connection.commit()
+        stock_log.record(blood_type, 'Whole Blood', units, 'stock_added', session['user_id'])
         
         cur.execute("""
             SELECT units_available 
@@ -671,26 +1843,307 @@ def add_blood_stock():
         
         result = cur.fetchone()
         new_total = result['units_available'] if result else units
+        if result:
+            notify_stock_change(blood_type, units, new_total)
         
-        print(f"✅ Stock updated. New total: {new_total}")
+        log.info(f"✅ Stock updated. New total: {new_total}")
         
         return jsonify({
             'success': True, 
-            'message': f'Successfully added {units} units of {blood_type}. New total: {new_total}'
+            'message': f'Successfully added {units} units of {blood_type}. New total: {new_total}',
+            'lot': {'id': lot_id, 'expiresAt': expires_at.strftime('%Y-%m-%d %H:%M')}
+        })
+    except Exception as e:
+        mysql.connection.rollback()
+        log.exception(f"❌ Error adding stock: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    finally:
+        cur.close()
+
+def movement_page_query(blood_type, component, request_id, cursor, limit):
+    """SQL and params for one keyset page of stock movements (limit + 1 rows)."""
+    query = """
+        SELECT
+            Movement_ID as id,
+            DATE_FORMAT(Moved_At, '%%Y-%%m-%%d %%H:%%i:%%s') as time,
+            Blood_Group as blood,
+            Component_Type as component,
+            Delta as delta,
+            Reason as reason,
+            Request_ID as request,
+            User_ID as user
+        FROM Stock_Movements
+        WHERE 1=1
+    """
+    params = []
+
+    if blood_type != 'all' and blood_type:
+        query += " AND Blood_Group = %s AND Component_Type = %s"
+        params.extend([blood_type, component])
+
+    if request_id is not None:
+        query += " AND Request_ID = %s"
+        params.append(request_id)
+
+    if cursor:
+        query += " AND Movement_ID < %s"
+        params.append(cursor['id'])
+
+    # Served by the primary key, idx_movements_group or idx_movements_request
+    query += " ORDER BY Movement_ID DESC LIMIT %s"
+    params.append(limit + 1)
+    return query, params
+
+@app.route('/api/inventory/movements', methods=['GET'])
+@role_required('staff')
+def get_stock_movements():
+    """Pages through the stock movement log, newest first.
+
+    Movements reach the table up to STOCK_LOG_FLUSH_INTERVAL seconds after
+    their transaction commits.
+    """
+    blood_type = request.args.get('blood_type', 'all')
+    component = request.args.get('component', 'Whole Blood')
+    try:
+        request_id = int(request.args['request_id']) if request.args.get('request_id') else None
+        limit = page_size(request.args.get('limit'), app.config['API_PAGE_SIZE'], app.config['API_MAX_PAGE_SIZE'])
+        cursor = decode_cursor(request.args.get('cursor'), ['id'])
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    cur = mysql.connection.cursor()
+    try:
+        cur.execute(*movement_page_query(blood_type, component, request_id, cursor, limit))
+        movements, next_cursor = paginate(cur.fetchall(), limit, lambda row: {'id': row['id']})
+        for movement in movements:
+            movement['delta'] = float(movement['delta'])
+        return jsonify({'success': True, 'movements': movements, 'next_cursor': next_cursor})
+    except Exception as e:
+        log.exception(f"❌ Error in get_stock_movements: {str(e)}")
+        return jsonify({'success': False, 'movements': [], 'next_cursor': None}), 500
+    finally:
+        cur.close()
+
+@app.route('/api/inventory/at', methods=['GET'])
+@login_required
+def get_inventory_at():
+    """Reconstructs Blood_Stock as of ?time= (ISO date/time) from the movement log."""
+    try:
+        at = datetime.fromisoformat(request.args.get('time', ''))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'time must be an ISO date or date/time'}), 400
+    cur = mysql.connection.cursor()
+    try:
+        started = log_started(cur)
+        if started is None or at < started:
+            since = started.strftime('%Y-%m-%d %H:%M:%S') if started else 'its migration'
+            return jsonify({'success': False, 'message': f"The stock movement log only covers times since {since}"}), 400
+        stock = stock_at(cur, at)
+        return jsonify({
+            'success': True,
+            'time': at.strftime('%Y-%m-%d %H:%M:%S'),
+            'stock': [
+                {'blood': blood_group, 'component': component, 'units': units}
+                for (blood_group, component), units in sorted(stock.items())
+            ]
+        })
+    except Exception as e:
+        log.exception(f"❌ Error in get_inventory_at: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    finally:
+        cur.close()
+
+
+# --- Delta Sync API ---
+
+SYNC_FEEDS = {
+    'donors': SyncFeed('donors', 'Donors', 'Donor_ID', DONOR_COLUMNS),
+    'requests': SyncFeed('requests', 'Hospital_Requests', 'Request_ID', REQUEST_COLUMNS),
+}
+
+@app.route('/api/sync/<name>', methods=['GET'])
+@login_required
+def sync_delta(name):
+    """Rows changed or deleted since ?since=<version>, for the dashboard's offline cache.
+
+    Donors and requests are versioned per row (see sync.py). Inventory is a
+    handful of rows, so it is sent whole whenever the cache state has moved
+    on from `since`, with `reset` telling the client to replace its copy.
+    """
+    if name != 'inventory' and name not in SYNC_FEEDS:
+        return jsonify({'success': False, 'message': f"Unknown sync feed '{name}'"}), 404
+    since = request.args.get('since', '0')
+    try:
+        limit = page_size(request.args.get('limit'), app.config['SYNC_PAGE_SIZE'], app.config['SYNC_MAX_PAGE_SIZE'])
+        if name != 'inventory':
+            parse_version(since)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'since must be a version returned by this endpoint'}), 400
+
+    if name == 'inventory':
+        cur = mysql.connection.cursor()
+    else:
+        # The feed's low-water mark is only meaningful on the primary, and must be
+        # read before the snapshot the rows come from: end any open transaction first.
+        conn = mysql.primary
+        conn.rollback()
+        cur = conn.cursor()
+    try:
+        if name == 'inventory':
+            stock = inventory_cache.stock(cur)
+            if stock.tag is not None and since == stock.tag:
+                return jsonify({'success': True, 'version': since, 'changed': [], 'deleted': [], 'more': False, 'reset': False})
+            return jsonify({'success': True, 'version': stock.tag, 'changed': inventory_rows(stock), 'deleted': [],
+                            'more': False, 'reset': True})
+
+        delta = SYNC_FEEDS[name].delta(cur, since, limit, app.config['SYNC_SETTLE_SECONDS'])
+        log.debug(f"🔄 Sync {name} since {since}: {len(delta['changed'])} changed, {len(delta['deleted'])} deleted")
+        return jsonify({'success': True, **delta})
+    except Exception as e:
+        log.exception(f"❌ Error in sync_delta: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    finally:
+        cur.close()
+
+# --- Analytics APIs ---
+
+def analytics_range(default_days):
+    """(start, end) dates from ?from=&to= (YYYY-MM-DD), ending today by default."""
+    end = request.args.get('to')
+    end = datetime.strptime(end, '%Y-%m-%d').date() if end else datetime.now().date()
+    start = request.args.get('from')
+    start = datetime.strptime(start, '%Y-%m-%d').date() if start else end - timedelta(days=default_days)
+    if start > end:
+        raise ValueError("'from' must not be after 'to'")
+    return start, end
+
+@app.route('/api/analytics/trends', methods=['GET'])
+@login_required
+def analytics_trends():
+    """Per-day or per-month series of one metric, optionally split by blood group or city.
+
+    ?metric=donations|requests|fulfillments&granularity=day|month&from=&to=
+    &group_by=blood_group|city&blood=&city=
+    """
+    metric = request.args.get('metric', 'donations')
+    granularity = request.args.get('granularity', 'month')
+    group_by = request.args.get('group_by') or None
+    if metric not in METRICS:
+        return jsonify({'success': False, 'message': f"metric must be one of {', '.join(METRICS)}"}), 400
+    if granularity not in ('day', 'month'):
+        return jsonify({'success': False, 'message': "granularity must be 'day' or 'month'"}), 400
+    if group_by and group_by not in GROUP_COLUMNS:
+        return jsonify({'success': False, 'message': "group_by must be 'blood_group' or 'city'"}), 400
+    try:
+        start, end = analytics_range(90 if granularity == 'day' else 365)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    if granularity == 'day' and (end - start).days > app.config['ANALYTICS_MAX_DAYS']:
+        return jsonify({
+            'success': False,
+            'message': f"Day granularity is limited to {app.config['ANALYTICS_MAX_DAYS']} days; use granularity=month"
+        }), 400
+
+    cur = mysql.connection.cursor()
+    try:
+        series = rollups.trend(cur, metric, granularity, start, end, group_by,
+                               request.args.get('blood'), request.args.get('city'))
+        return jsonify({
+            'success': True,
+            'metric': metric,
+            'granularity': granularity,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'series': series
         })
     except Exception as e:
         mysql.connection.rollback()
-        print(f"❌ Error adding stock: {str(e)}")
-        traceback.print_exc()
+        log.exception(f"❌ Error in analytics_trends: {str(e)}")
+        return jsonify({'success': False, 'message': 'Failed to fetch analytics'}), 500
+    finally:
+        cur.close()
+
+@app.route('/api/analytics/totals', methods=['GET'])
+@login_required
+def analytics_totals():
+    """Totals of every metric over ?from=&to=, by ?group_by=blood_group (default) or city."""
+    group_by = request.args.get('group_by', 'blood_group')
+    if group_by not in GROUP_COLUMNS:
+        return jsonify({'success': False, 'message': "group_by must be 'blood_group' or 'city'"}), 400
+    try:
+        start, end = analytics_range(30)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    cur = mysql.connection.cursor()
+    try:
+        return jsonify({
+            'success': True,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'groupBy': group_by,
+            'totals': rollups.totals(cur, start, end, group_by)
+        })
+    except Exception as e:
+        mysql.connection.rollback()
+        log.exception(f"❌ Error in analytics_totals: {str(e)}")
+        return jsonify({'success': False, 'message': 'Failed to fetch analytics'}), 500
+    finally:
+        cur.close()
+
+@app.route('/api/analytics/refresh', methods=['POST'])
+@role_required('staff')
+def refresh_analytics():
+    """Brings the rollups up to date now; ?full=1 rebuilds them from scratch.
+
+    Each worker also refreshes in the background every
+    ANALYTICS_REFRESH_INTERVAL seconds; call this after a backdated import.
+    """
+    full = request.args.get('full') in ('1', 'true')
+    cur = mysql.connection.cursor()
+    try:
+        started = time.perf_counter()
+        since = rollups.refresh(cur, full=full)
+        mysql.connection.commit()
+        rollups.mark_refreshed()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        log.info(f"📈 Analytics rollups refreshed from {since} in {elapsed_ms:.0f} ms")
+        return jsonify({'success': True, 'full': full, 'since': since.isoformat(), 'ms': round(elapsed_ms, 1)})
+    except Exception as e:
+        mysql.connection.rollback()
+        log.exception(f"❌ Error refreshing analytics: {str(e)}")
         return jsonify({'success': False, 'message': str(e)}), 500
     finally:
         cur.close()
 
 
-if __name__ == '__main__':
+def start_background_tasks():
+    """Per-process background work: pool warm-up and reaping, analytics refresh.
+
+    Call once in each serving process (in the worker, after a fork).
+    """
+    mysql.start()
+    rollups.start()
+
+
+if __name__ == '__main__' and sys.argv[1:2] == ['serve']:
+    # `python -m app serve`: let `import app` (asgi.py, gunicorn) reuse this module
+    sys.modules.setdefault('app', sys.modules[__name__])
+    from serve import main
+    main(sys.argv[2:])
+elif __name__ == '__main__':
     print("🚀 Starting Flask application...")
     print("🚨 IMPORTANT: Ensure MySQL is running and BloodDonationDB is set up.")
     print("📍 Dashboard URL: http://localhost:5000/dashboard-react")
     print("🔧 Test API URL: http://localhost:5000/api/test")
     print("🔐 Login with username: 'admin' or 'staff' (any password)")
-    app.run(debug=True, port=5000, host='0.0.0.0')
\ No newline at end of file
+    if '--async' in sys.argv:
+        # Async handlers for the read APIs, Flask for the rest (see asgi.py).
+        import uvicorn
+        # asgi.py does `from app import ...`: reuse this module instead of importing it twice
+        sys.modules.setdefault('app', sys.modules[__name__])
+        start_background_tasks()
+        uvicorn.run('asgi:application', port=5000, host='0.0.0.0')
+    else:
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            start_background_tasks()  # in the reloader's serving child, not the watcher
+        app.run(debug=True, port=5000, host='0.0.0.0')
\ No newline at end of file
@@ -0,0 +1,667 @@
+"""ASGI entry point: async handlers for the read-heavy /api/* routes.
+
+    uvicorn asgi:application --port 5000      (or: python app.py --async)
+
+The list, dashboard and inventory GETs are pure database waits, so here they
+run as coroutines on an aiomysql pool and one worker can keep hundreds of
+them in flight; the dashboard's independent queries are issued concurrently
+on separate connections. The /api/stream SSE feed is native too: it waits
+on the broker without holding a thread and ends when the client goes away.
+Every other route (writes, login, templates) is the unchanged Flask app
+behind a2wsgi's WSGI adapter, run on a pool of ASGI_FALLBACK_THREADS
+threads so slow requests do not queue behind each other. Both kinds of
+handler share this process's inventory cache, dashboard snapshot, broker
+and metrics. `python app.py` without --async stays the sync server.
+
+The async handlers reuse the SQL and response shapes of their Flask twins
+(donor_page_query, request_page_query, STOCK_QUERY, ...) so the two modes
+return identical payloads.
+"""
+import asyncio
+import contextvars
+import time
+from datetime import date
+from functools import wraps
+from http.cookies import CookieError, SimpleCookie
+from urllib.parse import parse_qsl
+
+import aiomysql
+from a2wsgi import WSGIMiddleware
+
+from app import (DATA_VERSION_QUERY, app, broker, dashboard_snapshot, donor_page_query, inventory_cache, log,
+                 metrics, pinned_to_primary, request_page_query, search_pass_query, users)
+from analytics import DONATIONS_IN_RANGE_QUERY, month_range
+from auth import MISSING, USER_QUERY
+from db import PoolTimeout, ReplicaSet
+from events import format_sse
+from inventory import STOCK_QUERY, to_int
+from lots import EXPIRING_TOTALS_QUERY
+from pagination import decode_cursor, page_size, paginate
+from responses import columnar, compress, encode, etag_matches, list_etag, wants_columns
+from search import search_passes
+from snapshot import COUNTERS_QUERY, RECENT_DONATIONS_LIMIT, RECENT_DONATIONS_QUERY, critical_groups
+
+# Statements issued by the current request; a list so tasks spawned by
+# asyncio.gather (which copy the context) add to the same counter.
+_round_trips = contextvars.ContextVar('round_trips')
+# (index, AsyncPool) of the replica the current request reads from, if any.
+_replica = contextvars.ContextVar('replica', default=None)
+
+
+class AsyncPool:
+    """aiomysql pool sized and timed out like db.ConnectionPool.
+
+    Reads run in autocommit mode, so every statement sees the latest
+    committed data and a connection goes straight back to the pool.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.timeout = config['MYSQL_POOL_TIMEOUT']
+        self._pool = None
+        self._opening = None
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+
+    async def open(self):
+        if self._pool is None:
+            if self._opening is None:
+                self._opening = asyncio.ensure_future(aiomysql.create_pool(
+                    host=self.config['MYSQL_HOST'],
+                    port=self.config['MYSQL_PORT'],
+                    user=self.config['MYSQL_USER'],
+                    password=self.config['MYSQL_PASSWORD'],
+                    db=self.config['MYSQL_DB'],
+                    charset=self.config['MYSQL_CHARSET'],
+                    autocommit=True,
+                    cursorclass=aiomysql.DictCursor,
+                    minsize=self.config['MYSQL_POOL_MIN_SIZE'],
+                    maxsize=self.config['MYSQL_POOL_MAX_SIZE'],
+                    pool_recycle=self.config['MYSQL_POOL_IDLE_TIMEOUT'],
+                ))
+            try:
+                self._pool = await self._opening
+            except Exception:
+                self._opening = None
+                raise
+        return self._pool
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = self._opening = None
+
+    async def fetchall(self, query, params=None):
+        pool = await self.open()
+        started = time.monotonic()
+        try:
+            conn = await asyncio.wait_for(pool.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise PoolTimeout(f"no database connection free after {self.timeout}s") from None
+        self._checkouts += 1
+        self._wait_total += time.monotonic() - started
+        try:
+            async with conn.cursor() as cur:
+                started = time.perf_counter()
+                try:
+                    await cur.execute(query, params)
+                    return await cur.fetchall()
+                finally:
+                    _round_trips.get([0])[0] += 1
+                    metrics.observe_sql(query, time.perf_counter() - started, cur.rowcount)
+        finally:
+            pool.release(conn)
+
+    async def fetchone(self, query, params=None):
+        rows = await self.fetchall(query, params)
+        return rows[0] if rows else None
+
+    def load(self):
+        pool = self._pool
+        return pool.size - pool.freesize if pool else 0
+
+    def stats(self):
+        pool = self._pool
+        return {
+            'size': pool.size if pool else 0,
+            'idle': pool.freesize if pool else 0,
+            'max_size': self.config['MYSQL_POOL_MAX_SIZE'],
+            'checkouts': self._checkouts,
+            'timeouts': self._timeouts,
+            'checkout_wait_avg_ms': round(self._wait_total / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+        }
+
+
+class RoutedPool:
+    """The primary AsyncPool plus replicas, with the same fetch interface.
+
+    `route()` picks a replica for the current request (MYSQL_REPLICA_POLICY)
+    unless the session is pinned to the primary after a write; fetches then
+    go to that replica, falling back to the primary if it cannot be reached.
+    """
+
+    def __init__(self, config):
+        self.primary = AsyncPool(config)
+        self.replicas = ReplicaSet(
+            [AsyncPool(dict(config, **overrides)) for overrides in config['MYSQL_REPLICAS']],
+            config['MYSQL_REPLICA_POLICY'],
+            config['MYSQL_REPLICA_RETRY_AFTER'],
+        )
+
+    def route(self, session):
+        if self.replicas and not pinned_to_primary(session):
+            _replica.set(self.replicas.choose())
+
+    async def fetchall(self, query, params=None):
+        chosen = _replica.get()
+        if chosen is not None:
+            i, pool = chosen
+            try:
+                return await pool.fetchall(query, params)
+            except PoolTimeout:
+                raise
+            except (OSError, aiomysql.OperationalError) as e:
+                self.replicas.mark_down(i)
+                _replica.set(None)
+                log.warning(f"⚠️ Replica {i} unreachable, reading from the primary: {str(e)}")
+        return await self.primary.fetchall(query, params)
+
+    async def fetchone(self, query, params=None):
+        rows = await self.fetchall(query, params)
+        return rows[0] if rows else None
+
+    async def open(self):
+        await self.primary.open()
+
+    async def close(self):
+        for pool in [self.primary] + self.replicas.pools:
+            await pool.close()
+
+    def stats(self):
+        return self.primary.stats()
+
+
+db = RoutedPool(app.config)
+
+metrics.add_gauges(lambda: {
+    'db_async_pool_connections': ('Connections open in the async pool.', db.stats()['size']),
+    'db_async_pool_connections_idle': ('Async pool connections idle.', db.stats()['idle']),
+    'db_async_pool_timeouts_total': ('Async checkouts that gave up and returned 503.', db.stats()['timeouts']),
+})
+
+
+class Request:
+    """The bits of an ASGI HTTP scope the async handlers need."""
+
+    def __init__(self, scope):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1')
+                        for name, value in scope['headers']}
+        self.args = {}
+        self.query = parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True)
+        for key, value in self.query:
+            self.args.setdefault(key, value)
+        self.session = load_session(self.headers.get('cookie', ''))
+        self.user = None
+
+
+def load_session(cookie_header):
+    """Decode Flask's signed session cookie, or {} if missing/invalid/expired."""
+    try:
+        cookie = SimpleCookie(cookie_header).get(app.config['SESSION_COOKIE_NAME'])
+    except CookieError:
+        return {}
+    if cookie is None:
+        return {}
+    return app.session_interface.loads(app, cookie.value) or {}
+
+
+async def current_user(req):
+    """app.current_user() for the async handlers: same cache, async lookups on a miss."""
+    user_id = req.session.get('user_id')
+    if user_id is None:
+        return None
+    if users.version_check_due():
+        users.observe_version(await data_version('Users'))
+    user = users.get(user_id)
+    if user is MISSING:
+        user = await db.fetchone(USER_QUERY, (user_id,))
+        users.put(user_id, user)
+    return user
+
+
+def login_required(handler):
+    @wraps(handler)
+    async def decorated(req):
+        req.user = await current_user(req)
+        if req.user is None:
+            log.warning("❌ Unauthorized access attempt to %s", req.path)
+            return 401, {'success': False, 'message': 'Unauthorized - Please login'}
+        return await handler(req)
+    return decorated
+
+
+async def current_stock():
+    """inventory_cache.stock() for coroutines: reloads both queries concurrently on a miss."""
+    stock = inventory_cache.cached()
+    if stock is None:
+        seen = inventory_cache.version
+        stock_rows, expiring_rows = await asyncio.gather(
+            db.fetchall(STOCK_QUERY),
+            db.fetchall(EXPIRING_TOTALS_QUERY, (inventory_cache.expiry_hours,)),
+        )
+        stock = inventory_cache.fill(stock_rows, expiring_rows, seen)
+    return stock
+
+
+async def data_version(table):
+    row = await db.fetchone(DATA_VERSION_QUERY, (table,))
+    return row['Version'] if row else None
+
+
+def request_etag(req, name, version):
+    return list_etag(name, version, req.query) if version is not None else None
+
+
+def not_modified(etag):
+    return 304, None, {'etag': etag}
+
+
+def list_response(payload, key, columns, etag=None):
+    """Async twin of app.list_response: (status, payload, headers)."""
+    if columns:
+        if key is None:
+            payload = columnar(payload)
+        else:
+            payload = dict(payload)
+            payload.update(columnar(payload.pop(key)))
+    return 200, payload, {'etag': etag} if etag else {}
+
+
+# --- Handlers (async twins of the Flask views of the same name) ---
+
+async def test_api(req):
+    row = await db.fetchone("SELECT DATABASE() as db_name")
+    return 200, {
+        'success': True,
+        'message': 'API is working!',
+        'database': row['db_name'],
+        'session': {
+            'logged_in': 'user_id' in req.session,
+            'username': req.session.get('username'),
+            'role': req.session.get('role')
+        }
+    }
+
+
+@login_required
+async def dashboard_stats(req):
+    try:
+        donors, pending, donations, inventory = await asyncio.gather(
+            db.fetchone("SELECT COUNT(DISTINCT Donor_ID) as total_donors FROM Donors"),
+            db.fetchone("SELECT COUNT(*) as pending_requests FROM Hospital_Requests WHERE Status = 'Pending'"),
+            db.fetchone(DONATIONS_IN_RANGE_QUERY, month_range()),
+            current_stock(),
+        )
+        stock = {group: row['units'] for group, row in inventory.items()}
+        return 200, {
+            'success': True,
+            'stats': {
+                'totalDonors': donors['total_donors'] or 0,
+                'unitsInStock': to_int(sum(stock.values())),
+                'pendingRequests': pending['pending_requests'] or 0,
+                'donationsThisMonth': donations['donations_month'] or 0,
+                'criticalStock': len(critical_groups(stock))
+            }
+        }
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        log.exception(f"❌ Error in dashboard_stats: {str(e)}")
+        return 500, {'success': False, 'message': 'Failed to fetch dashboard stats'}
+
+
+@login_required
+async def dashboard_summary(req):
+    try:
+        inventory = await current_stock()
+        payload = dashboard_snapshot.cached(inventory)
+        if payload is None:
+            seen = dashboard_snapshot.version
+            counters, recent = await asyncio.gather(
+                db.fetchone(COUNTERS_QUERY, (date.today().replace(day=1),)),
+                db.fetchall(RECENT_DONATIONS_QUERY, (RECENT_DONATIONS_LIMIT,)),
+            )
+            payload = dashboard_snapshot.fill(counters, recent, seen, inventory)
+        return 200, payload
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        log.exception(f"❌ Error in dashboard_summary: {str(e)}")
+        return 500, {'success': False, 'message': 'Failed to fetch dashboard summary'}
+
+
+@login_required
+async def critical_stock(req):
+    try:
+        inventory = await current_stock()
+        stock = {group: row['units'] for group, row in inventory.items()}
+        return 200, [
+            {'blood': group, 'units': to_int(stock[group]), 'expiring': to_int(inventory[group]['expiring'])}
+            for group in critical_groups(stock)
+        ]
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        log.exception(f"❌ Error in critical_stock: {str(e)}")
+        return 200, []
+
+
+@login_required
+async def recent_donations(req):
+    try:
+        return 200, list(await db.fetchall(RECENT_DONATIONS_QUERY, (RECENT_DONATIONS_LIMIT,)))
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        log.exception(f"❌ Error in recent_donations: {str(e)}")
+        return 200, []
+
+
+@login_required
+async def expiring_stock(req):
+    try:
+        inventory = await current_stock()
+        return 200, [
+            {'blood': group, 'expiring': to_int(inventory[group]['expiring'])}
+            for group in sorted(inventory, key=lambda group: -inventory[group]['expiring'])
+            if inventory[group]['expiring'] > 0
+        ][:5]
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        log.exception(f"❌ Error in expiring_stock: {str(e)}")
+        return 200, []
+
+
+@login_required
+async def get_all_donors(req):
+    search = req.args.get('search', '').strip()
+    blood_type = req.args.get('blood_type', 'all')
+    try:
+        limit = page_size(req.args.get('limit'), app.config['API_PAGE_SIZE'], app.config['API_MAX_PAGE_SIZE'])
+        cursor = decode_cursor(req.args.get('cursor'), ['id'])
+        columns = wants_columns(req.args)
+    except ValueError as e:
+        return 400, {'success': False, 'message': str(e)}
+    try:
+        etag = request_etag(req, 'donors', await data_version('Donors'))
+        if etag and etag_matches(req.headers.get('if-none-match'), etag):
+            return not_modified(etag)
+
+        if search:
+            donors, seen = [], set()
+            for search_pass in search_passes(search):
+                for row in await db.fetchall(*search_pass_query(search_pass, blood_type, limit + len(seen))):
+                    if row['id'] not in seen and len(donors) < limit:
+                        seen.add(row['id'])
+                        donors.append(row)
+                if len(donors) >= limit:
+                    break
+            return list_response({'success': True, 'donors': donors, 'next_cursor': None}, 'donors', columns, etag)
+
+        rows = await db.fetchall(*donor_page_query(blood_type, cursor, limit))
+        donors, next_cursor = paginate(rows, limit, lambda row: {'id': row['id']})
+        return list_response({'success': True, 'donors': donors, 'next_cursor': next_cursor}, 'donors', columns, etag)
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        log.exception(f"❌ Error in get_all_donors: {str(e)}")
+        return 500, {'success': False, 'donors': [], 'next_cursor': None}
+
+
+@login_required
+async def get_all_requests(req):
+    try:
+        limit = page_size(req.args.get('limit'), app.config['API_PAGE_SIZE'], app.config['API_MAX_PAGE_SIZE'])
+        cursor = decode_cursor(req.args.get('cursor'), ['date', 'id'])
+        columns = wants_columns(req.args)
+    except ValueError as e:
+        return 400, {'success': False, 'message': str(e)}
+    try:
+        etag = request_etag(req, 'requests', await data_version('Hospital_Requests'))
+        if etag and etag_matches(req.headers.get('if-none-match'), etag):
+            return not_modified(etag)
+
+        rows = await db.fetchall(*request_page_query(
+            req.args.get('search', ''), req.args.get('status', 'all'), req.args.get('blood_type', 'all'),
+            cursor, limit))
+        requests_data, next_cursor = paginate(rows, limit, lambda row: {'date': row['date'], 'id': row['id']})
+        return list_response({'success': True, 'requests': requests_data, 'next_cursor': next_cursor}, 'requests', columns, etag)
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        log.exception(f"❌ Error in get_all_requests: {str(e)}")
+        return 500, {'success': False, 'requests': [], 'next_cursor': None}
+
+
+@login_required
+async def get_inventory(req):
+    try:
+        columns = wants_columns(req.args)
+    except ValueError as e:
+        return 400, {'success': False, 'message': str(e)}
+    try:
+        stock = await current_stock()
+        etag = request_etag(req, 'inventory', stock.tag)
+        if etag and etag_matches(req.headers.get('if-none-match'), etag):
+            return not_modified(etag)
+        inventory = [
+            {
+                'blood': group,
+                'units': to_int(row['units']),
+                'expiring': to_int(row['expiring']),
+                'lastUpdated': row['last_updated'].strftime('%Y-%m-%d %H:%M') if row['last_updated'] else None
+            }
+            for group, row in stock.items()
+        ]
+        return list_response(inventory, None, columns, etag)
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        log.exception(f"❌ Error in get_inventory: {str(e)}")
+        return 200, []
+
+
+async def stream(req, receive, send):
+    """Async twin of app.stream: SSE feed of stock and request changes.
+
+    Sleeps until the broker has something for this subscriber (or the
+    keep-alive is due) and stops as soon as the client disconnects, so an
+    open dashboard costs a coroutine, not a thread.
+    """
+    try:
+        req.user = await current_user(req)
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        log.exception(f"❌ Error in stream: {str(e)}")
+        return 500, {'success': False, 'message': str(e)}
+    if req.user is None:
+        log.warning("❌ Unauthorized access attempt to %s", req.path)
+        return 401, {'success': False, 'message': 'Unauthorized - Please login'}
+    try:
+        last_event_id = int(req.headers.get('last-event-id', ''))
+    except ValueError:
+        last_event_id = None
+    keepalive = app.config['STREAM_KEEPALIVE']
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    sub = broker.subscribe(last_event_id, notify=lambda: loop.call_soon_threadsafe(wake.set))
+    try:
+        headers = [(b'content-type', b'text/event-stream; charset=utf-8'), (b'cache-control', b'no-cache'),
+                   (b'x-accel-buffering', b'no')] + cors_headers(req)
+        await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+        chunk = "retry: 3000\n\n"
+        while not disconnected.done():
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+            chunk = None
+            while chunk is None:
+                if sub.overflowed:
+                    sub.overflowed = False
+                    while sub.get(timeout=0) is not None:
+                        pass
+                    chunk = "event: resync\ndata: {}\n\n"
+                    break
+                # Cleared before looking, so an event published after the look still wakes us.
+                wake.clear()
+                event = sub.get(timeout=0)
+                if event is not None:
+                    chunk = format_sse(event)
+                    break
+                woken = asyncio.ensure_future(wake.wait())
+                await asyncio.wait({woken, disconnected}, timeout=keepalive, return_when=asyncio.FIRST_COMPLETED)
+                woken.cancel()
+                if disconnected.done():
+                    return None
+                if not wake.is_set():
+                    chunk = ": keep-alive\n\n"
+    finally:
+        sub.close()
+        disconnected.cancel()
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+# GET routes served natively; everything else falls through to Flask.
+ROUTES = {
+    '/api/test': test_api,
+    '/api/dashboard/stats': dashboard_stats,
+    '/api/dashboard/summary': dashboard_summary,
+    '/api/dashboard/critical-stock': critical_stock,
+    '/api/dashboard/recent-donations': recent_donations,
+    '/api/dashboard/expiring-stock': expiring_stock,
+    '/api/donors/all': get_all_donors,
+    '/api/requests/all': get_all_requests,
+    '/api/inventory/all': get_inventory,
+}
+
+
+# Long-lived GET responses served natively; the handler sends its own body.
+STREAMS = {
+    '/api/stream': stream,
+}
+
+
+def cors_headers(req):
+    origin = req.headers.get('origin')
+    if origin not in app.config['CORS_ORIGINS']:
+        return []
+    return [(b'access-control-allow-origin', origin.encode('latin-1')),
+            (b'access-control-allow-credentials', b'true'),
+            (b'vary', b'Origin')]
+
+
+class Application:
+    def __init__(self, routes, fallback, streams=None):
+        self.routes = routes
+        self.fallback = fallback
+        self.streams = streams or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        native = scope['type'] == 'http' and scope['method'] == 'GET'
+        path = scope.get('path')
+        handler = self.routes.get(path) if native else None
+        streamer = self.streams.get(path) if native else None
+        if handler is None and streamer is None:
+            await self.fallback(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        _round_trips.set([0])
+        req = Request(scope)
+        db.route(req.session)
+        if streamer is not None:
+            await self._stream(streamer, req, receive, send, started)
+            return
+        extra = {}
+        try:
+            result = await handler(req)
+            status, payload = result[:2]
+            if len(result) > 2:
+                extra = result[2]
+        except PoolTimeout as e:
+            log.warning(f"⚠️ Connection pool exhausted on {req.path}: {str(e)}")
+            status, payload = 503, {'success': False, 'message': 'Database is busy, please retry shortly'}
+        except Exception as e:
+            log.exception(f"❌ Error in {handler.__name__}: {str(e)}")
+            status, payload = 500, {'success': False, 'message': str(e)}
+
+        headers = []
+        etag = extra.get('etag')
+        if status == 304:
+            body = b''
+        else:
+            body, encoding = compress(
+                encode(payload), req.headers.get('accept-encoding'),
+                app.config['COMPRESS_MIN_BYTES'], app.config['COMPRESS_LEVEL']
+            )
+            headers += [(b'content-type', b'application/json'), (b'vary', b'Accept-Encoding')]
+            if encoding:
+                headers.append((b'content-encoding', encoding.encode()))
+                if etag:
+                    etag = f'{etag}-{encoding}'
+            headers.append((b'content-length', str(len(body)).encode()))
+        if etag:
+            headers += [(b'etag', f'"{etag}"'.encode('latin-1')), (b'cache-control', b'private, no-cache')]
+        headers += cors_headers(req)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+        metrics.observe_request(req.method, req.path, status, time.perf_counter() - started, _round_trips.get()[0])
+
+    async def _stream(self, streamer, req, receive, send, started):
+        # Like the Flask route, the request is recorded when the stream opens, not when it ends.
+        try:
+            error = await streamer(req, receive, send)
+        except PoolTimeout as e:
+            log.warning(f"⚠️ Connection pool exhausted on {req.path}: {str(e)}")
+            error = 503, {'success': False, 'message': 'Database is busy, please retry shortly'}
+        if error is None:
+            metrics.observe_request(req.method, req.path, 200, time.perf_counter() - started, _round_trips.get()[0])
+            return
+        status, payload = error
+        body = encode(payload)
+        headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers + cors_headers(req)})
+        await send({'type': 'http.response.body', 'body': body})
+        metrics.observe_request(req.method, req.path, status, time.perf_counter() - started, _round_trips.get()[0])
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await db.open()
+                except Exception as e:
+                    # Same as the sync app: start anyway, report DB errors per request.
+                    log.error(f"❌ Async pool could not connect at startup: {str(e)}")
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await db.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+# Flask requests run on a pool of ASGI_FALLBACK_THREADS threads, so a slow one does not hold up the rest.
+application = Application(ROUTES, WSGIMiddleware(app, workers=app.config['ASGI_FALLBACK_THREADS']), STREAMS)
@@ -0,0 +1,80 @@
+"""Precompiled front-end bundles from frontend/ (see frontend/build.mjs).
+
+The build writes content-hashed files (dashboard.<hash>.js) with .gz and
+.br copies into static/dist, plus manifest.json mapping the names the
+templates use to the current files. `AssetManifest.filename()` resolves a
+name through the manifest, re-reading it when a new build replaces it, so
+templates always link the latest bundle. Because a file's name changes
+whenever its contents do, `send()` can serve it with a year-long immutable
+Cache-Control: browsers never revalidate it, and a deploy is picked up via
+the new name in the page. The precompressed copy is sent when the client
+accepts it, so nothing is compressed per request.
+"""
+import json
+import mimetypes
+import os
+import threading
+
+from flask import send_from_directory
+from werkzeug.exceptions import NotFound
+from werkzeug.http import parse_accept_header
+
+# Preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class MissingBuild(RuntimeError):
+    pass
+
+
+class AssetManifest:
+    def __init__(self, dist_dir, max_age=365 * 24 * 3600):
+        self.dist_dir = dist_dir
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._files = {}  # logical name -> hashed file name
+        self._mtime = None
+
+    @property
+    def path(self):
+        return os.path.join(self.dist_dir, 'manifest.json')
+
+    def filename(self, name):
+        """The current hashed file for `name`, e.g. 'dashboard.js' -> 'dashboard.3f9a0c1b2d4e.js'."""
+        files = self._load()
+        if name not in files:
+            raise MissingBuild(f"{name} is not in {self.path}; rebuild with `npm run build` in frontend/")
+        return files[name]
+
+    def send(self, filename, accept_encoding):
+        """Response for a file of the current build, precompressed when the client accepts it; 404 otherwise."""
+        if filename not in self._load().values():
+            raise NotFound()
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        accepted = parse_accept_header(accept_encoding or '')
+        encoding, suffix = None, ''
+        for name, ext in ENCODINGS:
+            if accepted[name] and os.path.isfile(os.path.join(self.dist_dir, filename + ext)):
+                encoding, suffix = name, ext
+                break
+        response = send_from_directory(self.dist_dir, filename + suffix, mimetype=mimetype, max_age=self.max_age)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    def _load(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            raise MissingBuild(
+                f"{self.path} not found; build the dashboard with `npm install && npm run build` in frontend/"
+            ) from None
+        with self._lock:
+            if mtime != self._mtime:
+                with open(self.path, encoding='utf-8') as f:
+                    self._files = json.load(f)
+                self._mtime = mtime
+            return self._files
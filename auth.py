@@ -0,0 +1,143 @@
+"""User lookups for the per-request auth check.
+
+The signed session cookie says who the user is, but the role stored in it
+can go stale when the user is changed or removed. The auth middleware
+resolves the current row from Users instead, through `UserCache`:
+
+* rows are kept for `ttl` seconds, keyed by user id and by username (for
+  login); ids with no row are cached too, so a stale cookie does not cost a
+  query per request;
+* `invalidate()` drops entries after a change made by this process;
+* changes made elsewhere bump the Users counter in Data_Versions
+  (migrations/0008). Callers read it at most every `check_interval` seconds
+  and pass it to `observe_version()`, which empties the cache when it moved.
+
+`CachedSessionInterface` saves the other per-request cost: verifying the
+session cookie's HMAC signature and decoding it. A client sends the same
+cookie on every request, so verified values are remembered (with their
+signing time, so expiry is still enforced) in a bounded LRU.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask.sessions import SecureCookieSessionInterface
+from itsdangerous import BadSignature
+
+from queries import registry
+
+USER_QUERY = registry.define('user_by_id', "SELECT user_id, username, role FROM Users WHERE user_id = %s")
+LOGIN_QUERY = "SELECT user_id, username, role FROM Users WHERE username = %s"
+
+MISSING = object()
+
+
+class UserCache:
+    def __init__(self, ttl=300, max_size=10000, check_interval=5.0):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._users = OrderedDict()  # user_id -> (row or None, expires_at)
+        self._names = {}  # username -> user_id
+        self._version = None
+        self._checked_at = 0.0
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, user_id):
+        """The cached row, None if the user is known not to exist, or MISSING."""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None or entry[1] < time.monotonic():
+                self._misses += 1
+                return MISSING
+            self._users.move_to_end(user_id)
+            self._hits += 1
+            return entry[0]
+
+    def find(self, username):
+        """The cached row for `username`, or MISSING."""
+        with self._lock:
+            user_id = self._names.get(username)
+        return MISSING if user_id is None else self.get(user_id)
+
+    def put(self, user_id, user):
+        with self._lock:
+            self._drop(user_id)
+            self._users[user_id] = (user, time.monotonic() + self.ttl)
+            if user is not None:
+                self._names[user['username']] = user_id
+            while len(self._users) > self.max_size:
+                self._drop(next(iter(self._users)))
+
+    def invalidate(self, user_id=None):
+        """Forget one user, or everyone."""
+        with self._lock:
+            if user_id is None:
+                self._users.clear()
+                self._names.clear()
+            else:
+                self._drop(user_id)
+
+    def version_check_due(self):
+        return time.monotonic() - self._checked_at >= self.check_interval
+
+    def observe_version(self, version):
+        """Record the Users data version; a change empties the cache."""
+        with self._lock:
+            if version != self._version:
+                self._users.clear()
+                self._names.clear()
+                self._version = version
+            self._checked_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {'cached': len(self._users), 'hits': self._hits, 'misses': self._misses}
+
+    def _drop(self, user_id):
+        entry = self._users.pop(user_id, None)
+        if entry is not None and entry[0] is not None:
+            self._names.pop(entry[0]['username'], None)
+
+
+class CachedSessionInterface(SecureCookieSessionInterface):
+    """Flask's signed-cookie sessions, skipping verification of cookies seen before."""
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._verified = OrderedDict()  # cookie value -> (data, signed_at)
+
+    def loads(self, app, value):
+        """Session data for a cookie value, or None if it is invalid or expired."""
+        max_age = app.permanent_session_lifetime.total_seconds()
+        with self._lock:
+            entry = self._verified.get(value)
+            if entry is not None:
+                if time.time() - entry[1] > max_age:
+                    del self._verified[value]
+                    return None
+                self._verified.move_to_end(value)
+                return dict(entry[0])
+        serializer = self.get_signing_serializer(app)
+        if serializer is None:
+            return None
+        try:
+            data, signed_at = serializer.loads(value, max_age=int(max_age), return_timestamp=True)
+        except BadSignature:
+            return None
+        with self._lock:
+            self._verified[value] = (data, signed_at.timestamp())
+            while len(self._verified) > self.max_size:
+                self._verified.popitem(last=False)
+        return dict(data)
+
+    def open_session(self, app, request):
+        if not app.secret_key:
+            return None
+        value = request.cookies.get(self.get_cookie_name(app))
+        if not value:
+            return self.session_class()
+        return self.session_class(self.loads(app, value) or {})
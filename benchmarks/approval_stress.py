@@ -0,0 +1,141 @@
+"""Concurrency stress test for request approval.
+
+Creates a batch of pending requests for one blood group with less stock than
+they ask for in total, then lets many threads race to approve them through
+/api/requests/approve and /api/requests/approve-batch. Afterwards it checks
+that stock never went negative, that no request was fulfilled twice and that
+the units supplied add up to the units taken out of stock.
+
+    python benchmarks/approval_stress.py --workers 100 --requests 400 --stock 500
+
+Run it against a scratch database: it overwrites the chosen group's stock and
+leaves its requests behind unless --cleanup is given.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pymysql  # noqa: E402
+
+from app import app, mysql  # noqa: E402
+from db import PooledMySQL  # noqa: E402
+
+MARKER = 'STRESS TEST'
+
+
+def setup(conn, blood_group, stock, count, units):
+    cur = conn.cursor()
+    cur.execute("""
+        UPDATE Blood_Stock SET units_available = %s, last_updated = NOW()
+        WHERE blood_group = %s AND component_type = 'Whole Blood'
+    """, (stock, blood_group))
+    cur.executemany("""
+        INSERT INTO Hospital_Requests
+        (Hospital_Name, City, Blood_Group, Component_Type, Units_Requested, Notes, Request_Date, Status)
+        VALUES (%s, 'N/A', %s, 'Whole Blood', %s, '', CURDATE(), 'Pending')
+    """, [(MARKER, blood_group, units)] * count)
+    conn.commit()
+    cur.execute("SELECT Request_ID FROM Hospital_Requests WHERE Hospital_Name = %s AND Status = 'Pending'", (MARKER,))
+    ids = [row['Request_ID'] for row in cur.fetchall()]
+    cur.close()
+    return ids
+
+
+def worker(ids, batch_every, results, lock):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+        sess['username'] = 'stress'
+        sess['role'] = 'admin'
+    ids = ids[:]
+    random.shuffle(ids)
+    counts = {}
+    for i in range(0, len(ids), 5):
+        if batch_every and (i // 5) % batch_every == 0:
+            status = client.post('/api/requests/approve-batch', json={'request_ids': ids[i:i + 5]}).status_code
+            counts[f'batch {status}'] = counts.get(f'batch {status}', 0) + 1
+        else:
+            for request_id in ids[i:i + 5]:
+                status = client.post(f'/api/requests/approve/{request_id}').status_code
+                counts[status] = counts.get(status, 0) + 1
+    with lock:
+        for key, value in counts.items():
+            results[key] = results.get(key, 0) + value
+
+
+def verify(conn, blood_group, stock, ids):
+    cur = conn.cursor()
+    cur.execute("SELECT units_available FROM Blood_Stock WHERE blood_group = %s AND component_type = 'Whole Blood'", (blood_group,))
+    final = cur.fetchone()['units_available']
+    placeholders = ', '.join(['%s'] * len(ids))
+    cur.execute(f"""
+        SELECT COUNT(*) as fulfilments, COUNT(DISTINCT Request_ID) as requests, COALESCE(SUM(Units_Supplied), 0) as supplied
+        FROM Requests_Fulfilled WHERE Request_ID IN ({placeholders})
+    """, ids)
+    row = cur.fetchone()
+    cur.close()
+
+    print(f"stock: {stock} -> {final}, supplied {row['supplied']} units to {row['requests']} requests")
+    problems = []
+    if final < 0:
+        problems.append(f"stock went negative ({final})")
+    if row['fulfilments'] != row['requests']:
+        problems.append(f"{row['fulfilments'] - row['requests']} requests fulfilled more than once")
+    if stock - final != row['supplied']:
+        problems.append(f"stock moved by {stock - final} but {row['supplied']} units were supplied")
+    return problems
+
+
+def cleanup(conn, ids):
+    cur = conn.cursor()
+    placeholders = ', '.join(['%s'] * len(ids))
+    cur.execute(f"DELETE FROM Requests_Fulfilled WHERE Request_ID IN ({placeholders})", ids)
+    cur.execute(f"DELETE FROM Hospital_Requests WHERE Request_ID IN ({placeholders})", ids)
+    conn.commit()
+    cur.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--blood-group', default='AB-')
+    parser.add_argument('--stock', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--units', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=100)
+    parser.add_argument('--batch-every', type=int, default=3, help='every Nth chunk of 5 goes through approve-batch (0 = never)')
+    parser.add_argument('--cleanup', action='store_true')
+    args = parser.parse_args()
+
+    mysql.pool.max_size = max(mysql.pool.max_size, args.workers)
+    mysql.pool.timeout = 30.0
+    conn = PooledMySQL.connect(app.config)
+    conn.cursorclass = pymysql.cursors.DictCursor
+    ids = setup(conn, args.blood_group, args.stock, args.requests, args.units)
+
+    results, lock = {}, threading.Lock()
+    threads = [threading.Thread(target=worker, args=(ids, args.batch_every, results, lock)) for _ in range(args.workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"{args.workers} approvers finished in {time.perf_counter() - started:.2f}s: {results}")
+
+    problems = verify(conn, args.blood_group, args.stock, ids)
+    if args.cleanup:
+        cleanup(conn, ids)
+    conn.close()
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK: no oversell, no double fulfilment")
+
+
+if __name__ == '__main__':
+    main()
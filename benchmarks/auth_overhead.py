@@ -0,0 +1,102 @@
+"""Per-request cost of the auth check.
+
+Times, inside a request context carrying a valid session cookie:
+
+* decoding and verifying the signed session cookie, as Flask's default
+  session interface does on every request, and the same cookie through
+  `CachedSessionInterface` once it has been seen;
+* the old wrapper-style `login_required`, which wrote a line to stdout on
+  every authorized request (here to /dev/null, so terminal speed does not
+  count);
+* the current `authenticate` middleware resolving the user from a warm
+  cache.
+
+No database is needed; a cache miss costs one primary-key lookup on Users
+on top of this, once per `AUTH_USER_CACHE_TTL` per user and worker.
+
+    python benchmarks/auth_overhead.py --iterations 200000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from functools import wraps
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import g, jsonify, request, session  # noqa: E402
+
+from app import app, authenticate, login_required, users  # noqa: E402
+
+USER = {'user_id': 1, 'username': 'bench', 'role': 'admin'}
+
+
+def legacy_login_required(f, out):
+    """The decorator as it was: a wrapper that wrote a line per authorized request."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            print(f"❌ Unauthorized access attempt to {request.path}", file=out)
+            print(f"   Session data: {dict(session)}", file=out)
+            return jsonify({'success': False, 'message': 'Unauthorized - Please login'}), 401
+        print(f"✅ Authorized user {session.get('username')} accessing {request.path}", file=out)
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def noop():
+    return 'ok'
+
+
+def per_call(fn, iterations, rounds):
+    """Median over `rounds` of the mean time per call, in microseconds."""
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.perf_counter() - started) / iterations)
+    return statistics.median(samples) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--iterations', type=int, default=200000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    app.add_url_rule('/api/bench', 'bench', login_required(noop))
+    users.check_interval = float('inf')
+    users.observe_version(None)
+    users.put(USER['user_id'], USER)
+
+    serializer = app.session_interface.get_signing_serializer(app)
+    cookie = serializer.dumps(USER)
+    max_age = int(app.permanent_session_lifetime.total_seconds())
+    headers = {'Cookie': f"{app.config['SESSION_COOKIE_NAME']}={cookie}"}
+
+    with open(os.devnull, 'w') as devnull, app.test_request_context('/api/bench', headers=headers):
+        legacy = legacy_login_required(noop, devnull)
+        assert legacy() == 'ok'
+
+        def current():
+            g.pop('user', None)
+            return authenticate()
+        assert current() is None
+
+        cases = [
+            ('session cookie verify', lambda: serializer.loads(cookie, max_age=max_age)),
+            ('session cookie cached', lambda: app.session_interface.loads(app, cookie)),
+            ('legacy decorator', legacy),
+            ('middleware + cache', current),
+        ]
+        print(f"{args.iterations} calls x {args.rounds} rounds")
+        print(f"{'case':24s} {'us/request':>11s}")
+        for label, fn in cases:
+            print(f"{label:24s} {per_call(fn, args.iterations, args.rounds):11.2f}")
+    print(f"user cache: {users.stats()}")
+
+
+if __name__ == '__main__':
+    main()
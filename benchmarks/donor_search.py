@@ -0,0 +1,124 @@
+"""Donor search latency benchmark.
+
+Seeds synthetic donors into the configured MySQL database (optional) and
+measures p50/p95/p99 of the indexed search in app.search_donors against
+the old `%term%` LIKE query, using a realistic mix of name prefixes,
+substrings, typos and phone fragments.
+
+    python benchmarks/donor_search.py --seed 1000000 --queries 2000
+
+Apply migrations/0002_donor_search_indexes.sql before running.
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pymysql  # noqa: E402
+
+from app import app, search_donors  # noqa: E402
+from db import PooledMySQL  # noqa: E402
+
+FIRST_NAMES = ['Aarav', 'Vivaan', 'Aditya', 'Ananya', 'Diya', 'Ishaan', 'Kavya', 'Meera', 'Rohan', 'Saanvi',
+               'John', 'Maria', 'Priya', 'Rahul', 'Sneha', 'Arjun', 'Neha', 'Vikram', 'Pooja', 'Karan']
+LAST_NAMES = ['Sharma', 'Patel', 'Deshmukh', 'Iyer', 'Reddy', 'Nair', 'Gupta', 'Kulkarni', 'Joshi', 'Singh',
+              'Mehta', 'Rao', 'Shah', 'Verma', 'Pillai', 'Chatterjee', 'Das', 'Bose', 'Naidu', 'Khan']
+CITIES = ['Pune', 'Mumbai', 'Nagpur', 'Nashik', 'Delhi', 'Bengaluru', 'Chennai', 'Hyderabad']
+BLOOD_GROUPS = ['A+', 'A-', 'B+', 'B-', 'O+', 'O-', 'AB+', 'AB-']
+
+
+def random_donor(rng):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    suffix = ''.join(rng.choices(string.ascii_lowercase, k=3))
+    phone = f"+91 {rng.randint(70000, 99999)}-{rng.randint(10000, 99999)}"
+    return (f"{first} {last}", rng.choice(BLOOD_GROUPS), phone,
+            f"{first.lower()}.{last.lower()}.{suffix}@example.com", rng.choice(CITIES),
+            '1990-01-01', 'Other')
+
+
+def seed(conn, count, batch=5000):
+    rng = random.Random(42)
+    cur = conn.cursor()
+    for start in range(0, count, batch):
+        rows = [random_donor(rng) for _ in range(min(batch, count - start))]
+        cur.executemany("""
+            INSERT INTO Donors (Name, Blood_Group, Contact_Number, Email, City, Date_Of_Birth, Gender)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, rows)
+        conn.commit()
+        print(f"seeded {start + len(rows)}/{count}", end='\r')
+    print()
+    cur.close()
+
+
+def query_mix(rng, count):
+    terms = []
+    for _ in range(count):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        kind = rng.random()
+        if kind < 0.4:
+            terms.append(name[:rng.randint(2, 6)])
+        elif kind < 0.6:
+            start = rng.randint(0, len(name) - 4)
+            terms.append(name[start:start + 4])
+        elif kind < 0.8:
+            i = rng.randint(1, len(name) - 2)
+            terms.append(name[:i] + name[i + 1] + name[i] + name[i + 2:])
+        else:
+            terms.append(str(rng.randint(700, 999)))
+    return terms
+
+
+def like_search(cur, term, limit):
+    like = f"%{term}%"
+    cur.execute("""
+        SELECT Donor_ID FROM Donors
+        WHERE Name LIKE %s OR Email LIKE %s OR Contact_Number LIKE %s
+        ORDER BY Donor_ID DESC LIMIT %s
+    """, (like, like, like, limit))
+    return cur.fetchall()
+
+
+def measure(label, fn, terms):
+    timings = []
+    for term in terms:
+        started = time.perf_counter()
+        fn(term)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    pct = statistics.quantiles(timings, n=100)
+    print(f"{label:>8}: n={len(timings)} p50={pct[49]:.2f}ms p95={pct[94]:.2f}ms "
+          f"p99={pct[98]:.2f}ms max={timings[-1]:.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--seed', type=int, default=0, help='insert this many synthetic donors first')
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--compare-like', action='store_true', help='also time the old LIKE query')
+    args = parser.parse_args()
+
+    conn = PooledMySQL.connect(app.config)
+    if args.seed:
+        seed(conn, args.seed)
+
+    cur = conn.cursor(pymysql.cursors.DictCursor)
+    cur.execute("SELECT COUNT(*) as n FROM Donors")
+    print(f"donors: {cur.fetchone()['n']}")
+
+    terms = query_mix(random.Random(7), args.queries)
+    measure('indexed', lambda term: search_donors(cur, term, 'all', args.limit), terms)
+    if args.compare_like:
+        measure('like', lambda term: like_search(cur, term, args.limit), terms)
+    cur.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
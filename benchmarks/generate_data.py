@@ -0,0 +1,247 @@
+"""Synthetic data for load tests: donors, donations, requests and stock.
+
+Fills a database built with migrate.py at one of three scales (or any
+--donors count) with data shaped like a regional blood bank's:
+
+* blood groups in roughly Indian population shares, donors concentrated in
+  a few large cities (Zipf over City_Locations), ages skewed young;
+* ~40% of donors never donated, the rest donated a geometric number of
+  times at least DONOR_DEFERRAL_DAYS apart over the last five years, with
+  Last_Donation_Date and Total_Donations consistent with Donations;
+* one hospital request per 20 donors over the last two years: old ones
+  mostly fulfilled (with Requests_Fulfilled rows), recent ones pending;
+* 35 days of Whole Blood lots per group, with Blood_Stock and a
+  'generated' Stock_Movements row matching them.
+
+Rows go in as multi-row INSERTs committed every --chunk rows. Donations
+for a chunk are written before its donors, so the Total_Donations trigger
+(0003) finds no row to update and the generator supplies the totals itself.
+The output is deterministic for a given --seed.
+
+    python benchmarks/generate_data.py --scale 10k
+    python benchmarks/generate_data.py --scale 1m --chunk 10000
+    python benchmarks/generate_data.py --donors 250000 --append
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import Rollups  # noqa: E402
+from app import app  # noqa: E402
+from db import PooledMySQL  # noqa: E402
+from matching import PRIORITIES  # noqa: E402
+
+SCALES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+GROUP_WEIGHTS = {'O+': 37, 'B+': 32, 'A+': 22, 'AB+': 7, 'O-': 0.8, 'B-': 0.6, 'A-': 0.5, 'AB-': 0.1}
+GENDER_WEIGHTS = {'Male': 62, 'Female': 36, 'Other': 2}
+PRIORITY_WEIGHTS = (5, 35, 60)  # emergency, urgent, routine
+FIRST_NAMES = ['Aarav', 'Aditi', 'Akash', 'Ananya', 'Arjun', 'Diya', 'Ishaan', 'Kavya', 'Meera', 'Neha',
+               'Nikhil', 'Pooja', 'Priya', 'Rahul', 'Riya', 'Rohan', 'Sakshi', 'Sanjay', 'Sneha', 'Vikram']
+LAST_NAMES = ['Deshmukh', 'Patil', 'Kulkarni', 'Joshi', 'Shinde', 'Pawar', 'Jadhav', 'More', 'Gaikwad',
+              'Kale', 'Sharma', 'Iyer', 'Nair', 'Reddy', 'Singh', 'Gupta', 'Mehta', 'Shah', 'Rao', 'Das']
+HOSPITAL_KINDS = ['Civil Hospital', 'General Hospital', 'Medical College', 'Children\'s Hospital', 'Care Centre']
+
+DONOR_QUERY = """
+    INSERT INTO Donors
+    (Donor_ID, Name, Blood_Group, Contact_Number, Email, City, Date_Of_Birth, Gender,
+     Last_Donation_Date, Total_Donations)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+DONATION_QUERY = "INSERT INTO Donations (Donor_ID, Donation_Date) VALUES (%s, %s)"
+REQUEST_QUERY = """
+    INSERT INTO Hospital_Requests
+    (Request_ID, Hospital_Name, City, Blood_Group, Component_Type, Units_Requested, Priority, Notes,
+     Request_Date, Status)
+    VALUES (%s, %s, %s, %s, 'Whole Blood', %s, %s, '', %s, %s)
+"""
+FULFILLED_QUERY = """
+    INSERT INTO Requests_Fulfilled (Request_ID, Units_Supplied, Fulfilled_Date, Fulfilled_By_User_ID)
+    VALUES (%s, %s, %s, 1)
+"""
+LOT_QUERY = """
+    INSERT INTO Blood_Lots
+    (Blood_Group, Component_Type, Units_Collected, Units_Remaining, Collected_At, Expires_At)
+    VALUES (%s, 'Whole Blood', %s, %s, %s, %s)
+"""
+
+
+class Generator:
+    def __init__(self, rng, cities, deferral_days, today=None):
+        self.rng = rng
+        self.today = today or date.today()
+        self.deferral_days = deferral_days
+        self.groups, self.group_weights = zip(*GROUP_WEIGHTS.items())
+        self.genders, self.gender_weights = zip(*GENDER_WEIGHTS.items())
+        self.cities = cities
+        self.city_weights = [1 / (rank + 1) ** 1.1 for rank in range(len(cities))]
+
+    def donor(self, donor_id):
+        """(donor row, [donation rows])."""
+        rng = self.rng
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        age = int(rng.triangular(18, 65, 24))
+        dob = self.today - timedelta(days=age * 365 + rng.randint(0, 364))
+        donations = []
+        if rng.random() >= 0.4:
+            count = min(1 + int(rng.expovariate(1 / 2.5)), 20)
+            day = self.today - timedelta(days=int(rng.expovariate(1 / 120)))
+            earliest = self.today - timedelta(days=5 * 365)
+            for _ in range(count):
+                if day < earliest:
+                    break
+                donations.append((donor_id, day))
+                day -= timedelta(days=self.deferral_days + int(rng.expovariate(1 / 150)))
+        row = (
+            donor_id,
+            f'{first} {last}',
+            rng.choices(self.groups, self.group_weights)[0],
+            f'9{rng.randint(100000000, 999999999)}',
+            f'{first.lower()}.{last.lower()}{donor_id}@example.com',
+            rng.choices(self.cities, self.city_weights)[0],
+            dob,
+            rng.choices(self.genders, self.gender_weights)[0],
+            donations[0][1] if donations else None,
+            len(donations),
+        )
+        return row, donations
+
+    def request(self, request_id):
+        """(request row, fulfilled row or None)."""
+        rng = self.rng
+        age_days = int(rng.triangular(0, 730, 0))
+        day = self.today - timedelta(days=age_days)
+        units = rng.choices((1, 2, 3, 4), (40, 35, 15, 10))[0]
+        if age_days < 3:
+            status = rng.choices(('Pending', 'Fulfilled'), (70, 30))[0]
+        elif age_days < 14:
+            status = rng.choices(('Pending', 'Fulfilled', 'Cancelled'), (20, 70, 10))[0]
+        else:
+            status = rng.choices(('Fulfilled', 'Cancelled'), (90, 10))[0]
+        city = rng.choices(self.cities, self.city_weights)[0]
+        row = (
+            request_id,
+            f'{city} {rng.choice(HOSPITAL_KINDS)}',
+            city,
+            rng.choices(self.groups, self.group_weights)[0],
+            units,
+            rng.choices(PRIORITIES, PRIORITY_WEIGHTS)[0],
+            day,
+            status,
+        )
+        fulfilled = None
+        if status == 'Fulfilled':
+            fulfilled = (request_id, units, min(day + timedelta(days=rng.randint(0, 2)), self.today))
+        return row, fulfilled
+
+
+def insert_chunks(conn, cur, label, total, chunk, start_id, make):
+    """Generate and insert `total` rows in chunks; `make(first_id, count)` writes one chunk."""
+    started, done = time.monotonic(), 0
+    while done < total:
+        count = min(chunk, total - done)
+        make(start_id + done, count)
+        conn.commit()
+        done += count
+        elapsed = time.monotonic() - started
+        print(f"\r{label}: {done}/{total} ({done / max(elapsed, 1e-9):,.0f}/s)", end='', flush=True)
+    print()
+
+
+def generate_stock(cur, gen, donors):
+    """35 days of Whole Blood lots per group, about one unit per 25 donors in all."""
+    now = datetime.now().replace(microsecond=0)
+    total_weight = sum(gen.group_weights)
+    lots, added = [], {}
+    for group, weight in zip(gen.groups, gen.group_weights):
+        units = max(5, int(donors / 25 * weight / total_weight))
+        added[group] = 0
+        for _ in range(units // 5):
+            collected = now - timedelta(days=gen.rng.uniform(0, 34), hours=gen.rng.uniform(0, 23))
+            lots.append((group, 5, 5, collected, collected + timedelta(days=35)))
+            added[group] += 5
+    cur.executemany(LOT_QUERY, lots)
+    for group, units in added.items():
+        cur.execute("""
+            UPDATE Blood_Stock SET units_available = units_available + %s, last_updated = NOW()
+            WHERE blood_group = %s AND component_type = 'Whole Blood'
+        """, (units, group))
+    cur.executemany("""
+        INSERT INTO Stock_Movements (Event_ID, Moved_At, Blood_Group, Component_Type, Delta, Reason)
+        VALUES (REPLACE(UUID(), '-', ''), NOW(6), %s, 'Whole Blood', %s, 'generated')
+    """, list(added.items()))
+    return len(lots), added
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scale', choices=sorted(SCALES), default='10k')
+    parser.add_argument('--donors', type=int, help='donor count (overrides --scale)')
+    parser.add_argument('--chunk', type=int, default=5000, help='rows per INSERT and commit')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--append', action='store_true', help='add to a database that already has donors')
+    args = parser.parse_args()
+    donors = args.donors or SCALES[args.scale]
+
+    conn = PooledMySQL.connect(app.config)
+    cur = conn.cursor()
+    cur.execute("SELECT COALESCE(MAX(Donor_ID), 0) as last_id FROM Donors")
+    first_donor = cur.fetchone()['last_id'] + 1
+    if first_donor > 1 and not args.append:
+        raise SystemExit("Donors is not empty; pass --append to add to it")
+    cur.execute("SELECT COALESCE(MAX(Request_ID), 0) as last_id FROM Hospital_Requests")
+    first_request = cur.fetchone()['last_id'] + 1
+    cur.execute("SELECT City FROM City_Locations ORDER BY City")
+    cities = [row['City'] for row in cur.fetchall()] or ['Pune']
+    cur.execute("INSERT IGNORE INTO Users (username, role) VALUES ('admin', 'admin')")
+    conn.commit()
+
+    rng = random.Random(args.seed)
+    cities.sort(key=lambda _: rng.random())  # which cities are the big ones
+    gen = Generator(rng, cities, app.config['DONOR_DEFERRAL_DAYS'])
+    counts = {'donations': 0, 'fulfilled': 0}
+    started = time.monotonic()
+
+    def donor_chunk(first_id, count):
+        rows, donations = [], []
+        for donor_id in range(first_id, first_id + count):
+            row, given = gen.donor(donor_id)
+            rows.append(row)
+            donations.extend(given)
+        cur.executemany(DONATION_QUERY, donations)
+        cur.executemany(DONOR_QUERY, rows)
+        counts['donations'] += len(donations)
+
+    def request_chunk(first_id, count):
+        rows, fulfilled = [], []
+        for request_id in range(first_id, first_id + count):
+            row, done = gen.request(request_id)
+            rows.append(row)
+            if done:
+                fulfilled.append(done)
+        cur.executemany(REQUEST_QUERY, rows)
+        if fulfilled:
+            cur.executemany(FULFILLED_QUERY, fulfilled)
+        counts['fulfilled'] += len(fulfilled)
+
+    insert_chunks(conn, cur, 'donors', donors, args.chunk, first_donor, donor_chunk)
+    insert_chunks(conn, cur, 'requests', max(1, donors // 20), args.chunk, first_request, request_chunk)
+    lots, added = generate_stock(cur, gen, donors)
+    conn.commit()
+    print("rollups: full refresh")
+    Rollups().refresh(cur, full=True)
+    conn.commit()
+    cur.close()
+    conn.close()
+
+    print(f"✅ {donors} donors, {counts['donations']} donations, {max(1, donors // 20)} requests "
+          f"({counts['fulfilled']} fulfilled), {lots} lots in {time.monotonic() - started:.0f}s")
+    print(f"   stock added: {added}")
+
+
+if __name__ == '__main__':
+    main()
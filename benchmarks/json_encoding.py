@@ -0,0 +1,85 @@
+"""Payload size and encode time of the list responses.
+
+Builds `--rows` donor rows shaped like /api/donors/all and compares the old
+encoding (stdlib json, sorted keys, one dict per row) with the response
+layer in responses.py: orjson, the columnar shape, and gzip/brotli on top.
+No database is needed.
+
+    python benchmarks/json_encoding.py --rows 10000
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from responses import brotli, columnar, encode, orjson  # noqa: E402
+
+BLOOD_GROUPS = ['A+', 'A-', 'B+', 'B-', 'O+', 'O-', 'AB+', 'AB-']
+CITIES = ['Pune', 'Mumbai', 'Nagpur', 'Nashik', 'Delhi', 'Bengaluru', 'Chennai', 'Hyderabad']
+
+
+def donor_rows(count, rng):
+    return [
+        {
+            'id': count - i,
+            'name': f"Donor {rng.randint(1, 10 ** 6)}",
+            'blood': rng.choice(BLOOD_GROUPS),
+            'phone': f"+91 {rng.randint(70000, 99999)}-{rng.randint(10000, 99999)}",
+            'email': f"donor{i}@example.com",
+            'location': rng.choice(CITIES),
+            'lastDonation': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'totalDonations': rng.randint(0, 30),
+            'status': 'active',
+        }
+        for i in range(count)
+    ]
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        samples.append(time.perf_counter() - started)
+    return body, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rows = donor_rows(args.rows, random.Random(7))
+    payload = {'success': True, 'donors': rows, 'next_cursor': None}
+    columns_payload = {'success': True, 'next_cursor': None, **columnar(rows)}
+
+    cases = [
+        ('stdlib rows (old jsonify)',
+         lambda: (json.dumps(payload, sort_keys=True, separators=(',', ':')) + '\n').encode('utf-8')),
+        ('encode() rows', lambda: encode(payload)),
+        ('encode() columns', lambda: encode({'success': True, 'next_cursor': None, **columnar(rows)})),
+        ('stdlib columns', lambda: json.dumps(columns_payload, separators=(',', ':')).encode('utf-8')),
+    ]
+    print(f"{args.rows} rows, orjson {'on' if orjson else 'not installed'}, "
+          f"brotli {'on' if brotli else 'not installed'}")
+    print(f"{'case':28s} {'encode ms':>10s} {'bytes':>10s} {'gzip':>9s} {'gzip ms':>8s} {'br':>9s} {'br ms':>7s}")
+    for label, fn in cases:
+        body, encode_time = timed(fn, args.repeat)
+        gz, gzip_time = timed(lambda: gzip.compress(body, compresslevel=5, mtime=0), max(args.repeat // 4, 1))
+        line = (f"{label:28s} {encode_time * 1000:10.2f} {len(body):10d} "
+                f"{len(gz):9d} {gzip_time * 1000:8.2f}")
+        if brotli:
+            br, br_time = timed(lambda: brotli.compress(body, quality=5), max(args.repeat // 4, 1))
+            line += f" {len(br):9d} {br_time * 1000:7.2f}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+"""Per-route load test with saved baselines.
+
+Drives every /api/* route in READS (and, with --writes, the create
+routes in WRITES) from `--concurrency` keep-alive clients for `--duration`
+seconds, each client cycling through the routes. Per route it reports
+requests/s, p50/p99 latency, errors and DB round trips per request, the
+last taken from the server's /metrics (db_round_trips_per_request) before
+and after the run, so run it against a single-process server: the one it
+spawns by default, or --url for one you started yourself.
+
+Routes in neither list must be named in SKIPPED with a reason; the run
+warns about any /api route that is in none of them, so new routes get a
+load profile when they are added.
+
+    python benchmarks/generate_data.py --scale 1m
+    python benchmarks/load_test.py --concurrency 50 --duration 60 --save benchmarks/baselines/1m.json
+    python benchmarks/load_test.py --concurrency 50 --duration 60 --compare benchmarks/baselines/1m.json
+
+--compare prints the change per route and exits non-zero if any route's
+p99 grew by more than --tolerance or its round trips per request went up.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import app  # noqa: E402
+
+READS = [
+    '/api/test',
+    '/api/ready',
+    '/api/auth/check',
+    '/api/dashboard/stats',
+    '/api/dashboard/summary',
+    '/api/dashboard/critical-stock',
+    '/api/dashboard/recent-donations',
+    '/api/dashboard/expiring-stock',
+    '/api/donors/all?limit=50',
+    '/api/donors/all?limit=50&blood_type=O-',
+    '/api/donors/all?limit=50&search=patil',
+    '/api/donors/eligible?blood=O-&limit=50',
+    '/api/donors/eligible?blood=B%2B&near=Pune&limit=50',
+    '/api/donors/export?blood_type=AB-',
+    '/api/donors/eligible/export?blood=AB-',
+    '/api/requests/all?limit=50',
+    '/api/requests/all?limit=50&status=Pending',
+    '/api/inventory/all',
+    '/api/inventory/expiring',
+    '/api/inventory/movements?limit=50',
+    '/api/inventory/at?time={now}',
+    '/api/analytics/trends?metric=donations&granularity=month',
+    '/api/analytics/trends?metric=requests&granularity=day&group_by=blood_group',
+    '/api/analytics/totals',
+    '/api/pool/stats',
+    '/api/cache/stats',
+]
+
+BLOOD_GROUPS = ['A+', 'A-', 'B+', 'B-', 'O+', 'O-', 'AB+', 'AB-']
+WRITES = [
+    ('/api/donors/add', lambda rng: {
+        'name': 'Load Test', 'blood': rng.choice(BLOOD_GROUPS), 'phone': f'9{rng.randint(100000000, 999999999)}',
+        'email': 'load@example.com', 'location': 'Pune', 'dob': '1995-05-05', 'gender': 'Other',
+    }),
+    ('/api/requests/add', lambda rng: {
+        'patient': 'LOAD TEST', 'hospital': 'Pune', 'blood': rng.choice(BLOOD_GROUPS),
+        'units': rng.randint(1, 3), 'priority': 'routine',
+    }),
+    ('/api/inventory/add-stock', lambda rng: {'blood_type': rng.choice(BLOOD_GROUPS), 'units': 1}),
+]
+
+SKIPPED = {
+    '/api/stream': 'long-lived SSE connection',
+    '/api/donors/import': 'bulk upload; see its own timing in the response',
+    '/api/donors/update/<int:donor_id>': 'needs existing ids',
+    '/api/donors/delete/<int:donor_id>': 'destroys data',
+    '/api/requests/approve/<int:request_id>': 'see approval_stress.py',
+    '/api/requests/approve-batch': 'see approval_stress.py',
+    '/api/requests/reject/<int:request_id>': 'needs pending ids',
+    '/api/requests/auto-allocate': 'see auto_allocate.py',
+    '/api/inventory/expire-lots': 'maintenance job',
+    '/api/analytics/refresh': 'maintenance job',
+    '/api/sync/<name>': 'clients resume from their own version; a fixed ?since is a full download',
+}
+
+ROUND_TRIPS = re.compile(r'^db_round_trips_per_request_(sum|count)\{endpoint="([^"]*)"\} (\S+)$')
+
+
+def session_cookie():
+    serializer = app.session_interface.get_signing_serializer(app)
+    value = serializer.dumps({'user_id': 1, 'username': 'admin', 'role': 'admin'})
+    return f"{app.config['SESSION_COOKIE_NAME']}={value}"
+
+
+def uncovered():
+    driven = {urlsplit(path).path for path in READS} | {path for path, _ in WRITES}
+    return sorted(
+        rule.rule for rule in app.url_map.iter_rules()
+        if rule.rule.startswith('/api/') and rule.rule not in driven and rule.rule not in SKIPPED
+    )
+
+
+def start_server(port):
+    proc = subprocess.Popen(
+        [sys.executable, '-c', 'import sys; from app import app; app.run(port=int(sys.argv[1]), threaded=True)',
+         str(port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/test')
+            conn.getresponse().read()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit(f"server did not come up on port {port}")
+
+
+def round_trips(url, cookie):
+    """{route: (sum, count)} from the server's /metrics."""
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    conn.request('GET', '/metrics', headers={'Cookie': cookie})
+    body = conn.getresponse().read().decode()
+    conn.close()
+    totals = {}
+    for line in body.splitlines():
+        match = ROUND_TRIPS.match(line)
+        if match:
+            kind, endpoint, value = match.groups()
+            entry = totals.setdefault(endpoint, [0.0, 0.0])
+            entry[0 if kind == 'sum' else 1] = float(value)
+    return totals
+
+
+def client(url, cookie, plan, stop_at, results, lock, seed):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+    rng = random.Random(seed)
+    mine = {}
+    i = seed
+    while time.monotonic() < stop_at:
+        method, route, path, body = plan[i % len(plan)]
+        i += 1
+        headers = {'Cookie': cookie}
+        payload = None
+        if body:
+            payload = json.dumps(body(rng))
+            headers['Content-Type'] = 'application/json'
+        started = time.perf_counter()
+        ok = True
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status < 400
+        except (OSError, http.client.HTTPException):
+            ok = False
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+        entry = mine.setdefault(route, ([], [0]))
+        if ok:
+            entry[0].append(time.perf_counter() - started)
+        else:
+            entry[1][0] += 1
+    conn.close()
+    with lock:
+        for route, (latencies, errors) in mine.items():
+            entry = results.setdefault(route, ([], [0]))
+            entry[0].extend(latencies)
+            entry[1][0] += errors[0]
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def run(url, cookie, plan, concurrency, duration):
+    results, lock = {}, threading.Lock()
+    stop_at = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=client, args=(url, cookie, plan, stop_at, results, lock, i))
+        for i in range(concurrency)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.monotonic() - started
+
+
+def summarize(results, elapsed, before, after):
+    routes = {}
+    for route, (latencies, errors) in sorted(results.items()):
+        latencies.sort()
+        trips_sum = after.get(route, [0, 0])[0] - before.get(route, [0, 0])[0]
+        trips_count = after.get(route, [0, 0])[1] - before.get(route, [0, 0])[1]
+        routes[route] = {
+            'requests': len(latencies),
+            'rps': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.5) * 1000, 2) if latencies else None,
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+            'errors': errors[0],
+            'round_trips': round(trips_sum / trips_count, 2) if trips_count else None,
+        }
+    total = sum(entry['requests'] for entry in routes.values())
+    return {'rps': round(total / elapsed, 1), 'errors': sum(e['errors'] for e in routes.values()), 'routes': routes}
+
+
+def report(summary, baseline=None, tolerance=0.2):
+    """Print the per-route table; returns the routes that regressed against `baseline`."""
+    regressed = []
+    print(f"{'route':48s} {'req/s':>8s} {'p50 ms':>8s} {'p99 ms':>8s} {'errors':>6s} {'trips':>6s}")
+    for route, entry in summary['routes'].items():
+        line = (f"{route:48s} {entry['rps']:8.1f} {_num(entry['p50_ms'])} {_num(entry['p99_ms'])} "
+                f"{entry['errors']:6d} {_num(entry['round_trips'], 6)}")
+        old = (baseline or {}).get('routes', {}).get(route)
+        if old:
+            notes = []
+            if old['p99_ms'] and entry['p99_ms']:
+                change = entry['p99_ms'] / old['p99_ms'] - 1
+                notes.append(f"p99 {change:+.0%}")
+                if change > tolerance:
+                    regressed.append(route)
+            if old['round_trips'] is not None and entry['round_trips'] is not None:
+                if entry['round_trips'] > old['round_trips'] + 0.01:
+                    notes.append(f"trips {old['round_trips']:g} -> {entry['round_trips']:g}")
+                    if route not in regressed:
+                        regressed.append(route)
+            line += '  ' + ', '.join(notes)
+        print(line)
+    print(f"{'total':48s} {summary['rps']:8.1f} {'':8s} {'':8s} {summary['errors']:6d}")
+    if baseline:
+        print(f"baseline total {baseline['rps']:.1f} req/s ({summary['rps'] / baseline['rps'] - 1:+.0%})")
+    return regressed
+
+
+def _num(value, width=8):
+    return f"{value:{width}.2f}" if value is not None else ' ' * (width - 1) + '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', help='server to test; default: spawn a threaded server on --port')
+    parser.add_argument('--port', type=int, default=5200)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--warmup', type=float, default=5.0)
+    parser.add_argument('--writes', action='store_true', help='include the create routes in WRITES')
+    parser.add_argument('--save', metavar='PATH', help='write the results as a baseline')
+    parser.add_argument('--compare', metavar='PATH', help='baseline to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p99 growth with --compare')
+    args = parser.parse_args()
+
+    for rule in uncovered():
+        print(f"⚠️ {rule} is not load tested; add it to READS, WRITES or SKIPPED")
+
+    now = datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+    plan = [('GET', urlsplit(path).path, path.format(now=now), None) for path in READS]
+    if args.writes:
+        plan += [('POST', path, path, body) for path, body in WRITES]
+    random.Random(0).shuffle(plan)
+
+    cookie = session_cookie()
+    proc = None
+    url = args.url
+    if not url:
+        proc = start_server(args.port)
+        url = f'http://127.0.0.1:{args.port}'
+    try:
+        if args.warmup:
+            run(url, cookie, plan, min(args.concurrency, 10), args.warmup)
+        before = round_trips(url, cookie)
+        results, elapsed = run(url, cookie, plan, args.concurrency, args.duration)
+        after = round_trips(url, cookie)
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+    summary = summarize(results, elapsed, before, after)
+    summary['meta'] = {
+        'recorded_at': now,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'writes': args.writes,
+        'host': platform.node(),
+        'python': platform.python_version(),
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        meta = baseline.get('meta', {})
+        print(f"comparing with {args.compare} (recorded {meta.get('recorded_at')}, "
+              f"concurrency {meta.get('concurrency')}, duration {meta.get('duration')}s)")
+    regressed = report(summary, baseline, args.tolerance)
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(summary, f, indent=2, sort_keys=True)
+        print(f"saved baseline to {args.save}")
+    if regressed:
+        print(f"❌ regressed: {', '.join(regressed)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""How much of each registered statement's time is server-side parsing.
+
+For each hot-path statement in queries.py, on one plain connection to the
+configured MySQL database:
+
+* parse: a PREPARE of the statement alone, about what the server spends
+  parsing and resolving it each time it arrives as a query;
+* execute: the statement as the handlers run it, a parameterised text
+  query, fetched in full.
+
+`parse / execute` bounds what server-side prepared statements could save
+per call; the registry does not prepare them (see queries.py), and this is
+the number to look at before changing that. Run it against data from
+generate_data.py so the parameters hit real rows.
+
+    python benchmarks/prepared_statements.py --iterations 2000
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import DATA_VERSION_QUERY, app, donor_page_query, request_page_query  # noqa: E402
+from auth import USER_QUERY  # noqa: E402
+from db import PooledMySQL  # noqa: E402
+from queries import registry  # noqa: E402
+
+
+def cases(cur):
+    """[(label, statement, params)] with parameters taken from the data."""
+    cur.execute("SELECT MAX(Donor_ID) as id FROM Donors")
+    donor_id = cur.fetchone()['id'] or 1
+    cur.execute("SELECT Request_Date as date, Request_ID as id FROM Hospital_Requests ORDER BY Request_ID DESC LIMIT 1")
+    last_request = cur.fetchone() or {'date': '2000-01-01', 'id': 1}
+    after = {'date': str(last_request['date']), 'id': last_request['id']}
+    return [
+        ('data_version', DATA_VERSION_QUERY, ('Donors',)),
+        ('user_by_id', USER_QUERY, (1,)),
+        ('donor_page', *donor_page_query('all', None, 50)),
+        ('donor_page_group_after', *donor_page_query('O+', {'id': donor_id // 2}, 50)),
+        ('request_page_status', *request_page_query('', 'Pending', 'all', None, 50)),
+        ('request_page_search_group_after', *request_page_query('Pune', 'all', 'B+', after, 50)),
+    ]
+
+
+def timed(fn, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    pct = statistics.quantiles(timings, n=100)
+    return statistics.fmean(timings), pct[49], pct[98]
+
+
+def parse_cost(cur, conn, statement, iterations):
+    # PREPARE takes ? placeholders, and %% was only escaping % for the driver.
+    sql = re.sub(r'%[%s]', lambda m: '?' if m.group() == '%s' else '%', statement)
+
+    def prepare():
+        cur.execute(f"PREPARE bench_parse FROM {conn.escape(sql)}")
+    result = timed(prepare, iterations)
+    cur.execute("DEALLOCATE PREPARE bench_parse")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--iterations', type=int, default=1000, help='executions per statement and mode')
+    args = parser.parse_args()
+
+    conn = PooledMySQL.connect(app.config)
+    cur = conn.cursor()
+
+    print(f"{'statement':34s} {'parse':>8s} {'execute':>18s} {'parse':>7s}")
+    print(f"{'':34s} {'mean':>8s} {'mean / p99 ms':>18s} {'share':>7s}")
+    for label, statement, params in cases(cur):
+        parse, _, _ = parse_cost(cur, conn, statement, args.iterations)
+
+        def execute():
+            registry.execute(cur, statement, params)
+            cur.fetchall()
+
+        mean, _, p99 = timed(execute, args.iterations)
+        conn.rollback()
+        share = parse / mean * 100 if mean else 0.0
+        print(f"{label:34s} {parse:8.3f} {mean:8.3f} / {p99:7.3f} {share:6.1f}%")
+
+    cur.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Load test: sync (Werkzeug, threaded) vs async (uvicorn + asgi.py) serving.
+
+Starts each server on its own port against the configured database, then
+hammers a mix of read endpoints from `--concurrency` keep-alive clients for
+`--duration` seconds and reports requests/s, p50/p99 latency and errors.
+
+    python benchmarks/serving_modes.py --concurrency 200 --duration 30
+
+Pass --sync-url/--async-url to measure servers you started yourself (e.g.
+behind a real WSGI server) instead of spawning them.
+"""
+import argparse
+import http.client
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import app  # noqa: E402
+
+ENDPOINTS = [
+    '/api/dashboard/stats',
+    '/api/dashboard/summary',
+    '/api/inventory/all',
+    '/api/donors/all?limit=50',
+    '/api/requests/all?limit=50&status=Pending',
+]
+
+SERVERS = {
+    'sync': [sys.executable, '-c', 'import sys; from app import app; app.run(port=int(sys.argv[1]), threaded=True)'],
+    'async': [sys.executable, '-m', 'uvicorn', 'asgi:application', '--log-level', 'warning', '--port'],
+}
+
+
+def session_cookie():
+    serializer = app.session_interface.get_signing_serializer(app)
+    value = serializer.dumps({'user_id': 1, 'username': 'bench', 'role': 'admin'})
+    return f"{app.config['SESSION_COOKIE_NAME']}={value}"
+
+
+def start_server(mode, port):
+    proc = subprocess.Popen(SERVERS[mode] + [str(port)], cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/test')
+            conn.getresponse().read()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit(f"{mode} server did not come up on port {port}")
+
+
+def client(url, cookie, stop_at, latencies, errors, lock, offset):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    mine, failed, i = [], 0, offset
+    while time.monotonic() < stop_at:
+        path = ENDPOINTS[i % len(ENDPOINTS)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            conn.request('GET', path, headers={'Cookie': cookie})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                failed += 1
+        except (OSError, http.client.HTTPException):
+            failed += 1
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+            continue
+        mine.append(time.perf_counter() - started)
+    conn.close()
+    with lock:
+        latencies.extend(mine)
+        errors[0] += failed
+
+
+def run(label, url, concurrency, duration, cookie):
+    latencies, errors, lock = [], [0], threading.Lock()
+    stop_at = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=client, args=(url, cookie, stop_at, latencies, errors, lock, i))
+        for i in range(concurrency)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    if not latencies:
+        print(f"{label:6s} no successful requests ({errors[0]} errors)")
+        return
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:6s} {len(latencies) / elapsed:9.1f} req/s  "
+          f"p50 {statistics.median(latencies) * 1000:7.1f}ms  p99 {p99 * 1000:7.1f}ms  "
+          f"errors {errors[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds per mode')
+    parser.add_argument('--warmup', type=float, default=3.0)
+    parser.add_argument('--sync-url')
+    parser.add_argument('--async-url')
+    parser.add_argument('--port', type=int, default=5100, help='first port for spawned servers')
+    args = parser.parse_args()
+
+    cookie = session_cookie()
+    for offset, mode in enumerate(('sync', 'async')):
+        url = getattr(args, f'{mode}_url')
+        proc = None
+        if not url:
+            port = args.port + offset
+            proc = start_server(mode, port)
+            url = f'http://127.0.0.1:{port}'
+        try:
+            run('warmup', url, min(args.concurrency, 10), args.warmup, cookie)
+            run(mode, url, args.concurrency, args.duration, cookie)
+        finally:
+            if proc:
+                proc.terminate()
+                proc.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,513 @@
+"""Bounded, process-wide MySQL connection pool.
+
+`ConnectionPool` knows nothing about Flask or MySQL: it is handed a `connect`
+callable, so it works the same against PyMySQL, sqlite3 or any DB-API driver.
+`PooledMySQL` is the Flask glue and keeps the `mysql.connection` interface
+that flask_mysqldb gave the routes in app.py, optionally spreading reads
+over replicas (`ReplicaSet`). `retry_transient` re-runs a transaction that
+lost a deadlock or timed out waiting for a row lock.
+"""
+import itertools
+import random
+import threading
+import time
+from collections import deque
+
+import pymysql
+import pymysql.cursors
+from flask import g
+from instrumentation import log
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection became free within the checkout timeout."""
+
+
+# MySQL errors after which re-running the whole transaction is safe.
+LOCK_WAIT_TIMEOUT = 1205
+DEADLOCK = 1213
+TRANSIENT_ERRORS = (LOCK_WAIT_TIMEOUT, DEADLOCK)
+
+retry_stats = {'retries': 0, 'gave_up': 0}
+
+
+def retry_transient(attempt, rollback, attempts=3, backoff=0.05):
+    """Call `attempt()` until it stops failing with a deadlock or lock wait timeout.
+
+    `attempt` must run the whole transaction, commit included. Between tries
+    the transaction is rolled back (a lock wait timeout only rolls back the
+    statement) and we sleep `backoff` seconds, doubled each time, with
+    jitter so the competing transactions do not collide again in step.
+    """
+    for tries in range(1, attempts + 1):
+        try:
+            return attempt()
+        except pymysql.err.OperationalError as e:
+            if e.args[0] not in TRANSIENT_ERRORS:
+                raise
+            rollback()
+            if tries == attempts:
+                retry_stats['gave_up'] += 1
+                raise
+            retry_stats['retries'] += 1
+            time.sleep(backoff * 2 ** (tries - 1) * random.uniform(0.5, 1.5))
+
+
+def default_ping(conn):
+    """Cheap liveness check used before reusing a connection that sat idle."""
+    if hasattr(conn, 'ping'):
+        conn.ping(reconnect=False)
+    else:
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT 1")
+        finally:
+            cur.close()
+
+
+class ConnectionPool:
+    """Fixed-ceiling pool with health checks, idle reaping and a wait queue.
+
+    Connections are handed out LIFO so the hottest ones stay warm and the
+    cold tail is what `reap()` closes once it has been idle for
+    `idle_timeout` seconds (never dropping below `min_size`). A connection
+    is pinged on checkout only if it has been idle longer than
+    `ping_interval`, so busy traffic pays no extra round trip.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=5.0,
+                 idle_timeout=300.0, ping_interval=30.0, ping=default_ping):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("pool sizes must satisfy 0 <= min_size <= max_size, max_size >= 1")
+        self._connect = connect
+        self._ping = ping
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, last_used), oldest on the left
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+        self._health_lock = threading.Lock()
+        self._health = None  # (checked_at, ok, error)
+        self._reaper = None
+        self._reaper_stop = threading.Event()
+
+    def warm(self):
+        """Open connections up to `min_size` ahead of the first request."""
+        conns = []
+        try:
+            for _ in range(max(self.min_size - self._size, 0)):
+                conns.append(self.acquire())
+        finally:
+            for conn in conns:
+                self.release(conn)
+
+    def start_reaper(self, interval):
+        """Call `reap()` every `interval` seconds from a daemon thread in this process.
+
+        Without it idle connections are only closed by a later `acquire()`,
+        so a worker that goes quiet would hold them open indefinitely.
+        """
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+        self._reaper_stop = threading.Event()
+        self._reaper = threading.Thread(target=self._reap_every, args=(interval, self._reaper_stop),
+                                        name='db-pool-reaper', daemon=True)
+        self._reaper.start()
+
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        conn = last_used = None
+        stale = []
+
+        try:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise PoolTimeout("connection pool is closed")
+                    stale.extend(self._collect_stale(time.monotonic()))
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(f"no database connection free after {timeout}s")
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+        finally:
+            self._close_all(stale)
+
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif time.monotonic() - last_used > self.ping_interval and not self._is_alive(conn):
+                self._close_all([conn])
+                with self._cond:
+                    self._discarded += 1
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def release(self, conn, discard=False):
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._size -= 1
+                self._discarded += discard
+            else:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._cond.notify()
+        if conn is not None:
+            self._close_all([conn])
+
+    def reap(self):
+        """Close connections idle longer than `idle_timeout`."""
+        with self._cond:
+            stale = self._collect_stale(time.monotonic())
+        self._close_all(stale)
+        return len(stale)
+
+    def _reap_every(self, interval, stop):
+        while not stop.wait(interval):
+            try:
+                self.reap()
+            except Exception as e:
+                log.warning(f"⚠️ Pool reaper failed: {str(e)}")
+
+    def health(self, max_age=5.0, timeout=1.0):
+        """Return (ok, error) from a checkout + ping done at most every `max_age` s.
+
+        Concurrent callers share one check, so a burst of probes costs a
+        single round trip.
+        """
+        with self._health_lock:
+            now = time.monotonic()
+            if self._health and now - self._health[0] <= max_age:
+                return self._health[1], self._health[2]
+            try:
+                conn = self.acquire(timeout)
+            except Exception as e:
+                ok, error = False, str(e)
+            else:
+                ok = self._is_alive(conn)
+                error = None if ok else 'ping failed'
+                self.release(conn, discard=not ok)
+            self._health = (now, ok, error)
+            return ok, error
+
+    def after_fork(self):
+        """Forget connections inherited from a parent process; call in the child.
+
+        The sockets are shared with the parent, so they are dropped without
+        sending QUIT; the child opens its own on demand.
+        """
+        self._cond = threading.Condition()
+        self._health_lock = threading.Lock()
+        self._idle.clear()
+        self._size = self._in_use = self._waiting = 0
+        self._health = None
+        # Threads do not survive fork(); the child starts its own reaper.
+        self._reaper = None
+
+    def close(self):
+        self._reaper_stop.set()
+        with self._cond:
+            self._closed = True
+            conns = [conn for conn, _ in self._idle]
+            self._size -= len(conns)
+            self._idle.clear()
+            self._cond.notify_all()
+        self._close_all(conns)
+
+    def load(self):
+        """Connections checked out or waited for; a lock-free estimate for routing."""
+        return self._in_use + self._waiting
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'discarded': self._discarded,
+                'checkout_wait_avg_ms': round(self._wait_total / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                'checkout_wait_max_ms': round(self._wait_max * 1000, 3),
+            }
+
+    def _collect_stale(self, now):
+        # Caller holds self._cond.
+        stale = []
+        while (self._idle and self._size > self.min_size
+               and now - self._idle[0][1] > self.idle_timeout):
+            stale.append(self._idle.popleft()[0])
+            self._size -= 1
+        return stale
+
+    def _is_alive(self, conn):
+        try:
+            self._ping(conn)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_all(conns):
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+class ReplicaSet:
+    """Read replicas and the policy that picks one for each request.
+
+    'round_robin' rotates through them; 'least_loaded' takes the pool with
+    the fewest connections checked out or waited for in this process. A
+    replica that fails to connect is skipped for `retry_after` seconds.
+    """
+
+    POLICIES = ('round_robin', 'least_loaded')
+
+    def __init__(self, pools, policy='round_robin', retry_after=30.0):
+        if policy not in self.POLICIES:
+            raise ValueError(f"replica policy must be one of {', '.join(self.POLICIES)}")
+        self.pools = list(pools)
+        self.policy = policy
+        self.retry_after = retry_after
+        self._turn = itertools.count()
+        self._down_until = [0.0] * len(self.pools)
+        self._reads = [0] * len(self.pools)
+        self._fallbacks = 0
+
+    def __len__(self):
+        return len(self.pools)
+
+    def choose(self):
+        """(index, pool) to read from, or None if every replica is marked down."""
+        now = time.monotonic()
+        up = [i for i, until in enumerate(self._down_until) if until <= now]
+        if not up:
+            return None
+        if self.policy == 'least_loaded':
+            i = min(up, key=lambda i: self.pools[i].load())
+        else:
+            i = up[next(self._turn) % len(up)]
+        self._reads[i] += 1
+        return i, self.pools[i]
+
+    def mark_down(self, i):
+        self._down_until[i] = time.monotonic() + self.retry_after
+        self._fallbacks += 1
+
+    def after_fork(self):
+        for pool in self.pools:
+            pool.after_fork()
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            'policy': self.policy,
+            'fallbacks': self._fallbacks,
+            'replicas': [
+                dict(pool.stats(), reads=self._reads[i], up=self._down_until[i] <= now)
+                for i, pool in enumerate(self.pools)
+            ],
+        }
+
+
+class PooledMySQL:
+    """Drop-in replacement for flask_mysqldb.MySQL backed by a ConnectionPool.
+
+    `mysql.connection` checks a connection out on first use within an app
+    context and the teardown hook rolls back whatever was left open and
+    returns it to the pool. `wrap`, if given, is applied to each checked-out
+    connection (e.g. to instrument it) before the routes see it.
+
+    With MYSQL_REPLICAS configured, a request that calls `use_replica()`
+    before its first query reads from a replica instead; `primary` still
+    reaches the primary from such a request. If the chosen replica cannot be
+    reached the request falls back to the primary.
+    """
+
+    def __init__(self, app=None, connect=None, wrap=None):
+        self.pool = None
+        self.replicas = None
+        self.wrap = wrap
+        self._connect = connect
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('MYSQL_HOST', 'localhost')
+        app.config.setdefault('MYSQL_PORT', 3306)
+        app.config.setdefault('MYSQL_USER', None)
+        app.config.setdefault('MYSQL_PASSWORD', None)
+        app.config.setdefault('MYSQL_DB', None)
+        app.config.setdefault('MYSQL_CHARSET', 'utf8mb4')
+        app.config.setdefault('MYSQL_CURSORCLASS', None)
+        app.config.setdefault('MYSQL_POOL_MIN_SIZE', 1)
+        app.config.setdefault('MYSQL_POOL_MAX_SIZE', 10)
+        app.config.setdefault('MYSQL_POOL_TIMEOUT', 5.0)
+        app.config.setdefault('MYSQL_POOL_IDLE_TIMEOUT', 300.0)
+        app.config.setdefault('MYSQL_POOL_PING_INTERVAL', 30.0)
+        app.config.setdefault('MYSQL_POOL_REAP_INTERVAL', 60.0)
+        app.config.setdefault('MYSQL_REPLICAS', [])
+        app.config.setdefault('MYSQL_REPLICA_POLICY', 'round_robin')
+        app.config.setdefault('MYSQL_REPLICA_RETRY_AFTER', 30.0)
+
+        config = app.config
+        connect = self._connect or (lambda: self.connect(config))
+        self.pool = self._make_pool(connect, config)
+        # Each replica entry overrides the primary's settings, e.g. {'MYSQL_PORT': 3307}.
+        replica_configs = [dict(config, **overrides) for overrides in config['MYSQL_REPLICAS']]
+        self.replicas = ReplicaSet(
+            [self._make_pool(lambda c=c: self.connect(c), c) for c in replica_configs],
+            config['MYSQL_REPLICA_POLICY'],
+            config['MYSQL_REPLICA_RETRY_AFTER'],
+        )
+        self.reap_interval = config['MYSQL_POOL_REAP_INTERVAL']
+        app.teardown_appcontext(self.teardown)
+        app.extensions['pooled_mysql'] = self
+
+    @staticmethod
+    def _make_pool(connect, config):
+        return ConnectionPool(
+            connect,
+            min_size=config['MYSQL_POOL_MIN_SIZE'],
+            max_size=config['MYSQL_POOL_MAX_SIZE'],
+            timeout=config['MYSQL_POOL_TIMEOUT'],
+            idle_timeout=config['MYSQL_POOL_IDLE_TIMEOUT'],
+            ping_interval=config['MYSQL_POOL_PING_INTERVAL'],
+        )
+
+    @staticmethod
+    def connect(config):
+        kwargs = {
+            'host': config['MYSQL_HOST'],
+            'port': config['MYSQL_PORT'],
+            'user': config['MYSQL_USER'],
+            'password': config['MYSQL_PASSWORD'],
+            'database': config['MYSQL_DB'],
+            'charset': config['MYSQL_CHARSET'],
+            'autocommit': False,
+        }
+        if config['MYSQL_CURSORCLASS']:
+            kwargs['cursorclass'] = getattr(pymysql.cursors, config['MYSQL_CURSORCLASS'])
+        return pymysql.connect(**kwargs)
+
+    def use_replica(self):
+        """Route this request's `connection` to a replica, if any are configured."""
+        if self.replicas:
+            g.mysql_use_replica = True
+
+    @property
+    def on_replica(self):
+        return g.get('mysql_pool', self.pool) is not self.pool
+
+    @property
+    def connection(self):
+        if 'mysql_conn' not in g:
+            pool, conn = self._checkout()
+            g.mysql_pool = pool
+            g.mysql_raw_conn = conn
+            g.mysql_conn = self.wrap(conn) if self.wrap else conn
+        return g.mysql_conn
+
+    @property
+    def primary(self):
+        """The primary's connection, even in a request that reads from a replica."""
+        if not g.get('mysql_use_replica') or ('mysql_conn' in g and not self.on_replica):
+            return self.connection
+        if 'mysql_primary_conn' not in g:
+            conn = self.pool.acquire()
+            g.mysql_primary_raw_conn = conn
+            g.mysql_primary_conn = self.wrap(conn) if self.wrap else conn
+        return g.mysql_primary_conn
+
+    def start(self):
+        """Open MYSQL_POOL_MIN_SIZE connections per pool and start their reapers.
+
+        Call once in each serving process: at startup, or after forking a
+        worker. A database that is down only delays the warm-up to the
+        first request; it does not stop the process from starting.
+        """
+        for name, pool in [('primary', self.pool)] + [(f'replica {i}', p) for i, p in enumerate(self.replicas.pools)]:
+            try:
+                pool.warm()
+            except Exception as e:
+                log.warning(f"⚠️ Could not pre-open {name} connections: {str(e)}")
+            pool.start_reaper(self.reap_interval)
+
+    def after_fork(self):
+        """Forget every pooled connection inherited from a parent process."""
+        self.pool.after_fork()
+        self.replicas.after_fork()
+
+    def _checkout(self):
+        if g.get('mysql_use_replica'):
+            chosen = self.replicas.choose()
+            if chosen is not None:
+                i, pool = chosen
+                try:
+                    return pool, pool.acquire()
+                except PoolTimeout:
+                    raise
+                except Exception as e:
+                    self.replicas.mark_down(i)
+                    log.warning(f"⚠️ Replica {i} unreachable, reading from the primary: {str(e)}")
+        return self.pool, self.pool.acquire()
+
+    def teardown(self, exception):
+        self._return(g.pop('mysql_pool', None), g.pop('mysql_conn', None), g.pop('mysql_raw_conn', None))
+        self._return(self.pool, g.pop('mysql_primary_conn', None), g.pop('mysql_primary_raw_conn', None))
+
+    @staticmethod
+    def _return(pool, wrapped, conn):
+        if conn is None:
+            return
+        try:
+            wrapped.rollback()
+        except Exception:
+            pool.release(conn, discard=True)
+        else:
+            pool.release(conn)
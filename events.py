@@ -0,0 +1,100 @@
+"""In-process change broker behind the /api/stream Server-Sent Events feed.
+
+Write handlers call `broker.publish()` once per change; every open stream
+holds a `Subscription` with its own bounded queue, so one producer fans out
+to any number of dashboards without them polling the database. Recent
+events are kept in a ring buffer so a reconnecting EventSource can replay
+what it missed via Last-Event-ID.
+
+A subscriber that cannot block on `get()` (the async stream in asgi.py)
+passes `notify`, which is called from the publishing thread whenever its
+queue changes.
+"""
+import itertools
+import json
+import queue
+import threading
+from collections import deque
+
+
+class Subscription:
+    """One subscriber's queue. Created by `Broker.subscribe()`."""
+
+    def __init__(self, broker, maxsize, notify=None):
+        self._broker = broker
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._notify = notify
+        self.overflowed = False
+
+    def get(self, timeout=None):
+        """Return the next event, or None if nothing arrived within `timeout`."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._broker.unsubscribe(self)
+
+    def _offer(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # A subscriber that fell this far behind has to resync anyway;
+            # mark it so the stream can tell the client to refetch.
+            self.overflowed = True
+        if self._notify is not None:
+            self._notify()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Broker:
+    def __init__(self, queue_size=256, history=256):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._history = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        self._published = 0
+
+    def subscribe(self, last_event_id=None, notify=None):
+        """Register a subscriber, pre-loaded with events after `last_event_id`."""
+        sub = Subscription(self, self.queue_size, notify)
+        with self._lock:
+            if last_event_id is not None:
+                oldest = self._history[0]['id'] if self._history else None
+                if oldest is not None and last_event_id < oldest - 1:
+                    sub.overflowed = True
+                for event in self._history:
+                    if event['id'] > last_event_id:
+                        sub._offer(event)
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def publish(self, event_type, data):
+        with self._lock:
+            event = {'id': next(self._ids), 'type': event_type, 'data': data}
+            self._history.append(event)
+            self._published += 1
+            for sub in self._subscribers:
+                sub._offer(event)
+        return event
+
+    def stats(self):
+        with self._lock:
+            return {'subscribers': len(self._subscribers), 'published': self._published}
+
+
+def format_sse(event):
+    """Serialize a broker event into the text/event-stream wire format."""
+    payload = json.dumps(event['data'], default=str)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
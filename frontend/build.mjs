@@ -0,0 +1,104 @@
+// Builds the /dashboard-react bundle into ../static/dist.
+//
+// src/dashboard.jsx (with React, ReactDOM and the lucide icons it uses) is
+// bundled and minified by esbuild; src/dashboard.css goes through the
+// Tailwind CLI, which keeps only the classes found in src/. Each output is
+// named after a hash of its contents (dashboard.<hash>.js) and written
+// alongside .gz and .br copies, so Flask can serve it precompressed with a
+// year-long immutable Cache-Control (assets.py). manifest.json maps the
+// logical names the templates use to the current files; older builds are
+// removed.
+//
+//     npm install && npm run build      (npm run watch rebuilds on change)
+//
+// package.json pins exact versions, and npm ci installs exactly what
+// package-lock.json records; start.bat uses it whenever the lockfile is there.
+import { execFileSync } from 'node:child_process';
+import { createHash } from 'node:crypto';
+import fs from 'node:fs';
+import path from 'node:path';
+import { fileURLToPath } from 'node:url';
+import zlib from 'node:zlib';
+
+import * as esbuild from 'esbuild';
+
+const ROOT = path.dirname(fileURLToPath(import.meta.url));
+const SRC = path.join(ROOT, 'src');
+const DIST = path.resolve(ROOT, '..', 'static', 'dist');
+const TAILWIND = path.join(ROOT, 'node_modules', '.bin', 'tailwindcss');
+
+async function bundleScript() {
+    const result = await esbuild.build({
+        entryPoints: [path.join(SRC, 'dashboard.jsx')],
+        bundle: true,
+        minify: true,
+        write: false,
+        format: 'iife',
+        jsx: 'automatic',
+        target: ['es2018', 'chrome70', 'firefox68', 'safari12'],
+        define: { 'process.env.NODE_ENV': '"production"' },
+        legalComments: 'none',
+        logLevel: 'warning',
+    });
+    return Buffer.from(result.outputFiles[0].contents);
+}
+
+function bundleStyles() {
+    return execFileSync(TAILWIND, [
+        '--config', path.join(ROOT, 'tailwind.config.js'),
+        '--input', path.join(SRC, 'dashboard.css'),
+        '--minify',
+    ], { cwd: ROOT, stdio: ['ignore', 'pipe', 'inherit'] });
+}
+
+// dashboard.js -> dashboard.<hash>.js, plus .gz and .br next to it
+function emit(name, contents) {
+    const hash = createHash('sha256').update(contents).digest('hex').slice(0, 12);
+    const ext = path.extname(name);
+    const file = `${path.basename(name, ext)}.${hash}${ext}`;
+    const target = path.join(DIST, file);
+    fs.writeFileSync(target, contents);
+    fs.writeFileSync(`${target}.gz`, zlib.gzipSync(contents, { level: 9 }));
+    fs.writeFileSync(`${target}.br`, zlib.brotliCompressSync(contents, {
+        params: {
+            [zlib.constants.BROTLI_PARAM_QUALITY]: zlib.constants.BROTLI_MAX_QUALITY,
+            [zlib.constants.BROTLI_PARAM_SIZE_HINT]: contents.length,
+        },
+    }));
+    return file;
+}
+
+const kb = (file) => `${(fs.statSync(path.join(DIST, file)).size / 1024).toFixed(1)} KB`;
+
+async function build() {
+    const started = Date.now();
+    fs.mkdirSync(DIST, { recursive: true });
+    const manifest = {
+        'dashboard.js': emit('dashboard.js', await bundleScript()),
+        'dashboard.css': emit('dashboard.css', bundleStyles()),
+    };
+
+    const keep = new Set(['manifest.json']);
+    Object.values(manifest).forEach(file => ['', '.gz', '.br'].forEach(suffix => keep.add(file + suffix)));
+    // Written last, so the server never points at files that are not there yet
+    fs.writeFileSync(path.join(DIST, 'manifest.json'), `${JSON.stringify(manifest, null, 2)}\n`);
+    fs.readdirSync(DIST)
+        .filter(file => !keep.has(file))
+        .forEach(file => fs.rmSync(path.join(DIST, file)));
+
+    Object.values(manifest).forEach(file => {
+        console.log(`  ${file.padEnd(32)} ${kb(file).padStart(9)}  gzip ${kb(`${file}.gz`).padStart(9)}  br ${kb(`${file}.br`).padStart(9)}`);
+    });
+    console.log(`Built static/dist in ${Date.now() - started} ms`);
+}
+
+await build();
+
+if (process.argv.includes('--watch')) {
+    let pending = null;
+    console.log(`Watching ${path.relative(process.cwd(), SRC) || '.'} for changes...`);
+    fs.watch(SRC, { recursive: true }, () => {
+        clearTimeout(pending);
+        pending = setTimeout(() => build().catch(error => console.error(error.message)), 100);
+    });
+}
@@ -0,0 +1,127 @@
+// IndexedDB copy of donors, requests and inventory, kept current through /api/sync/*.
+//
+// SyncCache.sync(apiBase, name) asks the server for the rows changed or deleted
+// since the version stored with the local copy and applies each page in one
+// transaction, so revisiting a page transfers only what changed. SyncCache.rows(name)
+// reads the local copy, which keeps the lists usable through brief network drops.
+// A store only counts as ready once one sync has run to the end.
+const SyncCache = (() => {
+    const DB_NAME = 'bloodbank-sync';
+    const DB_VERSION = 1;
+    const STORES = { donors: 'id', requests: 'id', inventory: 'blood' };
+
+    let dbPromise = null;
+    const running = {};
+
+    const settle = (req) => new Promise((resolve, reject) => {
+        req.onsuccess = () => resolve(req.result);
+        req.onerror = () => reject(req.error);
+    });
+
+    const finished = (tx) => new Promise((resolve, reject) => {
+        tx.oncomplete = () => resolve();
+        tx.onerror = () => reject(tx.error);
+        tx.onabort = () => reject(tx.error);
+    });
+
+    const open = () => {
+        if (!dbPromise) {
+            dbPromise = new Promise((resolve, reject) => {
+                if (!window.indexedDB) {
+                    reject(new Error('IndexedDB is not available'));
+                    return;
+                }
+                const req = indexedDB.open(DB_NAME, DB_VERSION);
+                req.onupgradeneeded = () => {
+                    const db = req.result;
+                    Object.entries(STORES).forEach(([name, keyPath]) => {
+                        if (!db.objectStoreNames.contains(name)) {
+                            db.createObjectStore(name, { keyPath });
+                        }
+                    });
+                    if (!db.objectStoreNames.contains('versions')) {
+                        db.createObjectStore('versions');
+                    }
+                };
+                req.onsuccess = () => resolve(req.result);
+                req.onerror = () => reject(req.error);
+            });
+        }
+        return dbPromise;
+    };
+
+    // { version, complete } for a store; version 0 asks for everything
+    const state = async (name) => {
+        const db = await open();
+        const saved = await settle(db.transaction('versions').objectStore('versions').get(name));
+        return saved || { version: 0, complete: false };
+    };
+
+    const apply = async (name, delta) => {
+        const db = await open();
+        const tx = db.transaction([name, 'versions'], 'readwrite');
+        const store = tx.objectStore(name);
+        if (delta.reset) {
+            store.clear();
+        }
+        delta.changed.forEach(row => store.put(row));
+        delta.deleted.forEach(id => store.delete(id));
+        tx.objectStore('versions').put({ version: delta.version, complete: !delta.more }, name);
+        await finished(tx);
+    };
+
+    const pull = async (apiBase, name) => {
+        let { version } = await state(name);
+        for (;;) {
+            const response = await fetch(
+                `${apiBase}/sync/${name}?since=${encodeURIComponent(version)}`,
+                { credentials: 'include' }
+            );
+            const data = await response.json();
+            if (!response.ok || !data.success) {
+                const error = new Error(data.message || `Sync of ${name} failed`);
+                error.status = response.status;
+                throw error;
+            }
+            await apply(name, data);
+            if (!data.more) {
+                return;
+            }
+            version = data.version;
+        }
+    };
+
+    return {
+        available: () => !!window.indexedDB,
+
+        // One sync per store at a time; callers arriving mid-sync share it.
+        sync(apiBase, name) {
+            if (!running[name]) {
+                running[name] = pull(apiBase, name).finally(() => {
+                    delete running[name];
+                });
+            }
+            return running[name];
+        },
+
+        async ready(name) {
+            return (await state(name)).complete;
+        },
+
+        async rows(name) {
+            const db = await open();
+            return settle(db.transaction(name).objectStore(name).getAll());
+        },
+
+        // Drop every local copy, e.g. on logout.
+        async clear() {
+            const db = await open();
+            const names = [...Object.keys(STORES), 'versions'];
+            const tx = db.transaction(names, 'readwrite');
+            names.forEach(name => tx.objectStore(name).clear());
+            await finished(tx);
+        }
+    };
+})();
+
+export default SyncCache;
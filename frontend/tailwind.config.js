@@ -0,0 +1,8 @@
+/** Only classes that appear in the dashboard source end up in the CSS. */
+export default {
+    content: ['./src/**/*.{js,jsx}'],
+    theme: {
+        extend: {},
+    },
+    plugins: [],
+};
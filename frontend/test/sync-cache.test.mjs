@@ -0,0 +1,194 @@
+// sync-cache.js against a scripted /api/sync/* and a small in-memory IndexedDB.
+//
+//     npm test      (node --test; needs no installed packages)
+//
+// The stand-in keeps what sync-cache.js relies on: stores keyed by keyPath,
+// requests that succeed asynchronously, and `complete` once a transaction's
+// requests are done. It does not model aborts or concurrent transactions.
+import assert from 'node:assert/strict';
+import { beforeEach, test } from 'node:test';
+
+class FakeTransaction {
+    constructor(db, names) {
+        this.db = db;
+        this.names = [].concat(names);
+        this.pending = 0;
+        this.done = false;
+        setTimeout(() => this.settle(), 0);
+    }
+
+    objectStore(name) {
+        assert.ok(this.names.includes(name), `store ${name} is not in this transaction`);
+        const tx = this;
+        const rows = this.db.stores.get(name);
+        return {
+            get: key => tx.request(() => structuredClone(rows.data.get(key))),
+            getAll: () => tx.request(() => [...rows.data.values()].map(row => structuredClone(row))),
+            put: (value, key) => tx.request(() => rows.data.set(rows.keyPath ? value[rows.keyPath] : key, structuredClone(value))),
+            delete: key => tx.request(() => rows.data.delete(key)),
+            clear: () => tx.request(() => rows.data.clear()),
+        };
+    }
+
+    request(run) {
+        const req = {};
+        this.pending++;
+        setTimeout(() => {
+            req.result = run();
+            this.pending--;
+            if (req.onsuccess) req.onsuccess();
+            this.settle();
+        }, 0);
+        return req;
+    }
+
+    settle() {
+        if (this.pending === 0 && !this.done) {
+            this.done = true;
+            setTimeout(() => this.oncomplete && this.oncomplete(), 0);
+        }
+    }
+}
+
+class FakeDatabase {
+    constructor() {
+        this.stores = new Map();
+        this.objectStoreNames = { contains: name => this.stores.has(name) };
+    }
+
+    createObjectStore(name, options = {}) {
+        this.stores.set(name, { keyPath: options.keyPath, data: new Map() });
+    }
+
+    transaction(names) {
+        return new FakeTransaction(this, names);
+    }
+}
+
+const databases = new Map();
+globalThis.window = globalThis;
+globalThis.indexedDB = {
+    open(name) {
+        const req = {};
+        setTimeout(() => {
+            const fresh = !databases.has(name);
+            if (fresh) databases.set(name, new FakeDatabase());
+            req.result = databases.get(name);
+            if (fresh) req.onupgradeneeded();
+            req.onsuccess();
+        }, 0);
+        return req;
+    },
+};
+
+// Each sync answers from `pages[since]`; anything else is a network failure.
+let pages = {};
+let asked = [];
+globalThis.fetch = async (url) => {
+    const since = new URL(url, 'http://bank.test').searchParams.get('since');
+    asked.push(since);
+    const page = pages[since];
+    if (!page) throw new TypeError('Failed to fetch');
+    const { status = 200, ...body } = page;
+    return { ok: status === 200, status, json: async () => body };
+};
+
+const { default: SyncCache } = await import('../src/sync-cache.js');
+
+const delta = (version, changed, deleted = [], more = false, reset = false) =>
+    ({ success: true, version, changed, deleted, more, reset });
+const ids = rows => rows.map(row => row.id).sort((a, b) => a - b);
+
+beforeEach(async () => {
+    await SyncCache.clear();
+    pages = {};
+    asked = [];
+});
+
+test('first sync follows `more` to the end, then the store is ready', async () => {
+    pages = {
+        '0': delta('100-2', [{ id: 1, name: 'a' }, { id: 2, name: 'b' }], [], true),
+        '100-2': delta('200', [{ id: 3, name: 'c' }]),
+    };
+
+    assert.equal(await SyncCache.ready('donors'), false);
+    await SyncCache.sync('/api', 'donors');
+
+    assert.deepEqual(asked, ['0', '100-2']);
+    assert.deepEqual(ids(await SyncCache.rows('donors')), [1, 2, 3]);
+    assert.equal(await SyncCache.ready('donors'), true);
+});
+
+test('a delta updates, adds and deletes rows from the saved version', async () => {
+    pages = { '0': delta('100', [{ id: 1, name: 'a' }, { id: 2, name: 'b' }, { id: 3, name: 'c' }]) };
+    await SyncCache.sync('/api', 'donors');
+
+    pages['100'] = delta('150', [{ id: 2, name: 'B' }, { id: 4, name: 'd' }], [3]);
+    await SyncCache.sync('/api', 'donors');
+
+    const rows = await SyncCache.rows('donors');
+    assert.deepEqual(ids(rows), [1, 2, 4]);
+    assert.equal(rows.find(row => row.id === 2).name, 'B');
+    assert.deepEqual(asked, ['0', '100']);
+});
+
+test('reset replaces the local copy', async () => {
+    pages = { '0': delta('100', [{ id: 1 }, { id: 2 }]) };
+    await SyncCache.sync('/api', 'requests');
+
+    pages['100'] = delta('0', [], [], true, true);
+    pages['0'] = delta('300', [{ id: 7 }]);
+    await SyncCache.sync('/api', 'requests');
+
+    assert.deepEqual(ids(await SyncCache.rows('requests')), [7]);
+    assert.equal(await SyncCache.ready('requests'), true);
+});
+
+test('offline: a failed sync keeps the local copy and its version', async () => {
+    pages = { '0': delta('100', [{ id: 1 }, { id: 2 }]) };
+    await SyncCache.sync('/api', 'donors');
+
+    pages = {};
+    await assert.rejects(SyncCache.sync('/api', 'donors'), TypeError);
+    assert.deepEqual(ids(await SyncCache.rows('donors')), [1, 2]);
+    assert.equal(await SyncCache.ready('donors'), true);
+
+    pages = { '100': delta('120', [{ id: 3 }]) };
+    await SyncCache.sync('/api', 'donors');
+    assert.deepEqual(ids(await SyncCache.rows('donors')), [1, 2, 3]);
+});
+
+test('a sync cut off mid-way keeps the pages it applied, not ready yet', async () => {
+    pages = { '0': delta('100-2', [{ id: 1 }, { id: 2 }], [], true) };
+
+    await assert.rejects(SyncCache.sync('/api', 'donors'));
+    assert.deepEqual(ids(await SyncCache.rows('donors')), [1, 2]);
+    assert.equal(await SyncCache.ready('donors'), false);
+
+    pages['100-2'] = delta('200', [{ id: 3 }]);
+    await SyncCache.sync('/api', 'donors');
+    assert.deepEqual(asked, ['0', '100-2', '100-2']);
+    assert.equal(await SyncCache.ready('donors'), true);
+});
+
+test('server errors carry their status', async () => {
+    pages = { '0': { status: 401, success: false, message: 'Unauthorized - Please login' } };
+
+    await assert.rejects(SyncCache.sync('/api', 'donors'), error => error.status === 401);
+});
+
+test('callers arriving mid-sync share one pull', async () => {
+    pages = { '0': delta('100', [{ id: 1 }]) };
+
+    await Promise.all([SyncCache.sync('/api', 'donors'), SyncCache.sync('/api', 'donors')]);
+    assert.deepEqual(asked, ['0']);
+});
+
+test('clear drops every store and version', async () => {
+    pages = { '0': delta('100', [{ id: 1 }]) };
+    await SyncCache.sync('/api', 'donors');
+
+    await SyncCache.clear();
+    assert.deepEqual(await SyncCache.rows('donors'), []);
+    assert.equal(await SyncCache.ready('donors'), false);
+});
@@ -0,0 +1,74 @@
+"""City proximity index for donor call-outs.
+
+Donors only carry a City name, so proximity is worked out between cities:
+City_Locations (migrations/0010) holds one coordinate per city, and
+`CityIndex` buckets those into a grid of `cell_degrees` squares in memory.
+`nearby()` looks at the cells a radius can reach and measures great-circle
+distances to the few cities in them, so "cities within 50 km of Pune" costs
+microseconds however many donors there are. The donor queries then run
+per city against the (Blood_Group, City, Last_Donation_Date) index.
+
+The table is small and rarely changes; the index reloads it every `ttl`
+seconds.
+"""
+import math
+import time
+
+CITIES_QUERY = "SELECT City, Latitude, Longitude FROM City_Locations"
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class CityIndex:
+    def __init__(self, ttl=600, cell_degrees=0.5):
+        self.ttl = ttl
+        self.cell_degrees = cell_degrees
+        self._cities = {}  # lower-cased name -> (name, lat, lon)
+        self._cells = {}  # (cell_lat, cell_lon) -> [(name, lat, lon)]
+        self._loaded_at = None
+
+    def stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def fill(self, rows):
+        """Rebuild from City_Locations rows."""
+        cities, cells = {}, {}
+        for row in rows:
+            entry = (row['City'], float(row['Latitude']), float(row['Longitude']))
+            cities[entry[0].lower()] = entry
+            cells.setdefault(self._cell(entry[1], entry[2]), []).append(entry)
+        self._cities, self._cells = cities, cells
+        self._loaded_at = time.monotonic()
+
+    def nearby(self, city, radius_km):
+        """[(city, km)] within `radius_km` of `city`, nearest first; None if `city` is unknown."""
+        origin = self._cities.get(city.strip().lower())
+        if origin is None:
+            return None
+        _, lat, lon = origin
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        dlon = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01))
+        low_lat, low_lon = self._cell(lat - dlat, lon - dlon)
+        high_lat, high_lon = self._cell(lat + dlat, lon + dlon)
+
+        found = []
+        for cell_lat in range(low_lat, high_lat + 1):
+            for cell_lon in range(low_lon, high_lon + 1):
+                for name, city_lat, city_lon in self._cells.get((cell_lat, cell_lon), ()):
+                    km = haversine_km(lat, lon, city_lat, city_lon)
+                    if km <= radius_km:
+                        found.append((name, round(km, 1)))
+        found.sort(key=lambda item: (item[1], item[0]))
+        return found
+
+    def stats(self):
+        return {'cities': len(self._cities), 'cells': len(self._cells)}
+
+    def _cell(self, lat, lon):
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
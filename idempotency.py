@@ -0,0 +1,142 @@
+"""Idempotency-Key support for the create endpoints.
+
+A client that retries a POST with the same `Idempotency-Key` header gets the
+response of the first successful attempt instead of a second row.
+
+The key row is inserted in the same transaction as the row it protects, so
+the two commit or roll back together:
+
+* `claim()` inserts the key first. A concurrent request with the same key
+  blocks on the primary key until the first transaction ends, then either
+  finds the stored response (first one committed) or takes over the key
+  (first one rolled back). A failed attempt leaves no trace, so it can be
+  retried. An expired key is only looked at after the INSERT hits it, and
+  is then overwritten in place.
+* `complete()` stores the response just before the caller commits.
+
+Completed responses are also kept in a small in-process LRU so replays from
+the same worker skip the database. Keys are scoped per endpoint and user and
+expire after `ttl` seconds.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import pymysql
+
+MAX_KEY_LENGTH = 255
+DUPLICATE_ENTRY = 1062
+
+IdempotencyKey = namedtuple('IdempotencyKey', 'scope key digest')
+
+
+class KeyReused(Exception):
+    """The key was already used with a different request body."""
+
+
+class IdempotencyStore:
+    def __init__(self, ttl=24 * 3600, cache_size=10000, purge_every=500):
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.purge_every = purge_every
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # (scope, key) -> (digest, status, payload, expires_at)
+        self._replays = 0
+
+    def key_for(self, scope, key, body):
+        """Build the key for a request, or raise ValueError for a malformed header."""
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ValueError(f'Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters')
+        canonical = json.dumps(body, sort_keys=True, separators=(',', ':'), default=str)
+        return IdempotencyKey(scope, key, hashlib.sha256(canonical.encode('utf-8')).hexdigest())
+
+    def cached(self, ikey):
+        """(status, payload) from the in-process LRU, or None."""
+        with self._lock:
+            entry = self._cache.get((ikey.scope, ikey.key))
+            if entry is None:
+                return None
+            if entry[3] < time.time():
+                del self._cache[(ikey.scope, ikey.key)]
+                return None
+            self._cache.move_to_end((ikey.scope, ikey.key))
+        return self._replay(ikey, entry[0], entry[1], entry[2])
+
+    def claim(self, cur, ikey):
+        """Reserve the key in the current transaction.
+
+        Returns None if this request owns the key, or the stored
+        (status, payload) if an earlier request already completed with it.
+        """
+        try:
+            cur.execute("""
+                INSERT INTO Idempotency_Keys (Scope, Idem_Key, Request_Hash, Created_At, Expires_At)
+                VALUES (%s, %s, %s, NOW(), NOW() + INTERVAL %s SECOND)
+            """, (ikey.scope, ikey.key, ikey.digest, self.ttl))
+            return None
+        except pymysql.err.IntegrityError as e:
+            if e.args[0] != DUPLICATE_ENTRY:
+                raise
+        # Only an existing key gets here, so only its row is locked: an expired
+        # key is taken over in place instead of deleted and re-inserted, which
+        # would lock the gap around it and deadlock concurrent claims.
+        cur.execute("""
+            UPDATE Idempotency_Keys
+            SET Request_Hash = %s, Status_Code = NULL, Response_Body = NULL,
+                Created_At = NOW(), Expires_At = NOW() + INTERVAL %s SECOND
+            WHERE Scope = %s AND Idem_Key = %s AND Expires_At < NOW()
+        """, (ikey.digest, self.ttl, ikey.scope, ikey.key))
+        if cur.rowcount:
+            return None
+        cur.execute("""
+            SELECT Request_Hash, Status_Code, Response_Body, Expires_At
+            FROM Idempotency_Keys
+            WHERE Scope = %s AND Idem_Key = %s
+            LOCK IN SHARE MODE
+        """, (ikey.scope, ikey.key))
+        row = cur.fetchone()
+        payload = json.loads(row['Response_Body'])
+        self._remember(ikey, row['Request_Hash'], row['Status_Code'], payload, row['Expires_At'].timestamp())
+        return self._replay(ikey, row['Request_Hash'], row['Status_Code'], payload)
+
+    def complete(self, cur, ikey, status, payload):
+        """Store the response in the current transaction; call right before commit."""
+        cur.execute("""
+            UPDATE Idempotency_Keys SET Status_Code = %s, Response_Body = %s
+            WHERE Scope = %s AND Idem_Key = %s
+        """, (status, json.dumps(payload, default=str), ikey.scope, ikey.key))
+
+    def committed(self, ikey, status, payload):
+        """Cache a response after its transaction committed."""
+        self._remember(ikey, ikey.digest, status, payload, time.time() + self.ttl)
+
+    def should_purge(self):
+        return self.purge_every and random.randrange(self.purge_every) == 0
+
+    @staticmethod
+    def purge(cur, limit=1000):
+        """Delete up to `limit` expired keys; the caller commits."""
+        cur.execute("DELETE FROM Idempotency_Keys WHERE Expires_At < NOW() LIMIT %s", (limit,))
+        return cur.rowcount
+
+    def stats(self):
+        with self._lock:
+            return {'cached': len(self._cache), 'replays': self._replays}
+
+    def _remember(self, ikey, digest, status, payload, expires_at):
+        with self._lock:
+            self._cache[(ikey.scope, ikey.key)] = (digest, status, payload, expires_at)
+            self._cache.move_to_end((ikey.scope, ikey.key))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _replay(self, ikey, digest, status, payload):
+        if digest != ikey.digest:
+            raise KeyReused('Idempotency-Key was already used with a different request')
+        with self._lock:
+            self._replays += 1
+        return status, payload
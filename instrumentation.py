@@ -0,0 +1,238 @@
+"""Request/SQL metrics, slow-query log and non-blocking logging.
+
+* `Metrics` keeps Prometheus-style histograms and counters in memory and
+  renders them in the text exposition format for /metrics.
+* `InstrumentedConnection` wraps a DB-API connection so every statement,
+  commit and rollback is timed, fingerprinted and counted against the
+  current request; statements over the slow-query threshold are logged.
+* `configure_logging` routes the app logger through a bounded queue drained
+  by a background thread, so handlers never block on stdout.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import re
+import sys
+import threading
+import time
+from functools import lru_cache
+
+from flask import g, has_app_context
+
+log = logging.getLogger('bloodbank')
+slow_log = logging.getLogger('bloodbank.slow_query')
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROUND_TRIP_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql):
+    """Normalize a statement so every execution of the same query shares a label."""
+    sql = _STRING.sub('?', sql.replace('%s', '?'))
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER_LIST.sub('(?+)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+class Metrics:
+    """Thread-safe registry of the histograms and counters we export."""
+
+    def __init__(self, slow_query_ms=100.0, max_fingerprints=500):
+        self.slow_query_ms = slow_query_ms
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        self._requests = {}     # (method, endpoint, status) -> Histogram (seconds)
+        self._round_trips = {}  # endpoint -> Histogram (statements per request)
+        self._sql = {}          # fingerprint -> [Histogram (seconds), rows]
+        self._slow = 0
+        self._gauges = []       # callables returning {name: (help, value)}
+
+    def add_gauges(self, collect):
+        """Register a callable returning {name: (help, value)}; names ending in _total export as counters."""
+        self._gauges.append(collect)
+
+    def observe_request(self, method, endpoint, status, seconds, round_trips):
+        with self._lock:
+            key = (method, endpoint, str(status))
+            self._requests.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self._round_trips.setdefault(endpoint, Histogram(ROUND_TRIP_BUCKETS)).observe(round_trips)
+
+    def observe_sql(self, sql, seconds, rows):
+        statement = fingerprint(sql)
+        with self._lock:
+            if statement not in self._sql and len(self._sql) >= self.max_fingerprints:
+                statement = 'other'
+            entry = self._sql.setdefault(statement, [Histogram(LATENCY_BUCKETS), 0])
+            entry[0].observe(seconds)
+            entry[1] += max(rows or 0, 0)
+            slow = seconds * 1000 >= self.slow_query_ms
+            if slow:
+                self._slow += 1
+        if slow:
+            endpoint = g.get('metrics_endpoint', '-') if has_app_context() else '-'
+            slow_log.warning('slow query %.1fms rows=%s endpoint=%s sql=%s',
+                             seconds * 1000, rows, endpoint, statement)
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        out = []
+        with self._lock:
+            self._render_histograms(
+                out, 'http_request_duration_seconds', 'Request latency by route.',
+                ('method', 'endpoint', 'status'), self._requests.items())
+            self._render_histograms(
+                out, 'db_round_trips_per_request', 'SQL statements, commits and rollbacks per request.',
+                ('endpoint',), [((key,), hist) for key, hist in self._round_trips.items()])
+            self._render_histograms(
+                out, 'db_statement_duration_seconds', 'SQL statement latency by fingerprint.',
+                ('statement',), [((key,), entry[0]) for key, entry in self._sql.items()])
+            out.append('# HELP db_statement_rows_total Rows returned or affected by fingerprint.')
+            out.append('# TYPE db_statement_rows_total counter')
+            for key, entry in self._sql.items():
+                out.append(f'db_statement_rows_total{{{_labels(("statement",), (key,))}}} {entry[1]}')
+            out.append('# HELP db_slow_queries_total Statements slower than the slow-query threshold.')
+            out.append('# TYPE db_slow_queries_total counter')
+            out.append(f'db_slow_queries_total {self._slow}')
+        for collect in self._gauges:
+            for name, (help_text, value) in collect().items():
+                out.append(f'# HELP {name} {help_text}')
+                out.append(f"# TYPE {name} {'counter' if name.endswith('_total') else 'gauge'}")
+                out.append(f'{name} {value}')
+        return '\n'.join(out) + '\n'
+
+    @staticmethod
+    def _render_histograms(out, name, help_text, label_names, items):
+        out.append(f'# HELP {name} {help_text}')
+        out.append(f'# TYPE {name} histogram')
+        for key, hist in items:
+            labels = _labels(label_names, key)
+            cumulative = 0
+            for bound, count in zip(hist.buckets, hist.counts):
+                cumulative += count
+                out.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            out.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+            out.append(f'{name}_sum{{{labels}}} {hist.sum}')
+            out.append(f'{name}_count{{{labels}}} {hist.count}')
+
+
+def count_round_trip():
+    if has_app_context():
+        g.db_round_trips = g.get('db_round_trips', 0) + 1
+
+
+class InstrumentedCursor:
+    """Cursor proxy that times execute/executemany and counts round trips."""
+
+    def __init__(self, cursor, metrics):
+        self._cursor = cursor
+        self._metrics = metrics
+
+    def execute(self, query, args=None):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(query, args)
+        finally:
+            count_round_trip()
+            self._metrics.observe_sql(query, time.perf_counter() - started, self._cursor.rowcount)
+
+    def executemany(self, query, args):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, args)
+        finally:
+            count_round_trip()
+            self._metrics.observe_sql(query, time.perf_counter() - started, self._cursor.rowcount)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors, commits and rollbacks are measured."""
+
+    def __init__(self, conn, metrics):
+        self._conn = conn
+        self._metrics = metrics
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs), self._metrics)
+
+    def commit(self):
+        self._timed('COMMIT', self._conn.commit)
+
+    def rollback(self):
+        self._timed('ROLLBACK', self._conn.rollback)
+
+    def _timed(self, label, fn):
+        started = time.perf_counter()
+        try:
+            fn()
+        finally:
+            count_round_trip()
+            self._metrics.observe_sql(label, time.perf_counter() - started, 0)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+def configure_logging(level=logging.INFO, queue_size=10000, stream=None):
+    """Send the 'bloodbank' loggers through a bounded queue to a background writer."""
+    records = queue.Queue(maxsize=queue_size)
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+    listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    log.handlers[:] = [DroppingQueueHandler(records)]
+    log.setLevel(level)
+    log.propagate = False
+    return listener
@@ -0,0 +1,178 @@
+"""Write-through cache of the Blood_Stock table.
+
+Blood_Stock is a handful of rows (one per blood group and component) that
+almost every read endpoint needs. The cache loads the whole table in one
+query, serves reads from memory, and is updated by the stock-mutating
+handlers right after they commit. Each change bumps `version`; the TTL is a
+fallback for changes made outside this process (other workers, manual SQL).
+
+Each row also carries `expiring`: units in lots that expire within
+`expiry_hours`. Lot changes mark just that figure stale, and it is reloaded
+with one indexed query on the next read.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+from lots import expiring_totals
+
+DEFAULT_COMPONENT = 'Whole Blood'
+
+STOCK_QUERY = """
+    SELECT blood_group, component_type, units_available, last_updated
+    FROM Blood_Stock
+"""
+
+
+def to_int(value):
+    """Round a DB number the way MySQL's CAST(... AS SIGNED) does."""
+    if value is None:
+        return 0
+    value = float(value)
+    return int(value + 0.5) if value >= 0 else -int(-value + 0.5)
+
+
+class StockView(dict):
+    """{blood_group: row} as returned by InventoryCache, plus the `tag` of the
+    cache state it was read from (None if it was never cached). Equal tags
+    mean identical contents, so the tag can serve as an ETag version.
+    """
+
+    def __init__(self, rows, tag=None):
+        super().__init__(rows)
+        self.tag = tag
+
+
+class InventoryCache:
+    def __init__(self, ttl=30, expiry_hours=72):
+        self.ttl = ttl
+        self.expiry_hours = expiry_hours
+        self.version = 0
+        self._lock = threading.Lock()
+        self._rows = None  # {(blood_group, component_type): {'units', 'expiring', 'last_updated'}}
+        self._loaded_at = 0.0
+        self._epoch = None  # new on every load, so tags never repeat across reloads or processes
+        self._expiring_stale = False
+        self._hits = 0
+        self._misses = 0
+        self._loads = 0
+
+    def stock(self, cur, component=DEFAULT_COMPONENT):
+        """Return {blood_group: {'units', 'expiring', 'last_updated'}} for one component type."""
+        with self._lock:
+            if self._rows is None or time.monotonic() - self._loaded_at > self.ttl:
+                self._misses += 1
+                self._load(cur)
+            elif self._expiring_stale:
+                self._misses += 1
+                self._load_expiring(cur)
+            else:
+                self._hits += 1
+            return self._view(component)
+
+    def cached(self, component=DEFAULT_COMPONENT):
+        """Like `stock()` but never queries: returns None when a reload is due.
+
+        Used by the async handlers, which run STOCK_QUERY and
+        EXPIRING_TOTALS_QUERY themselves and hand the rows to `fill()`.
+        """
+        with self._lock:
+            if (self._rows is None or self._expiring_stale
+                    or time.monotonic() - self._loaded_at > self.ttl):
+                self._misses += 1
+                return None
+            self._hits += 1
+            return self._view(component)
+
+    def fill(self, stock_rows, expiring_rows, seen_version, component=DEFAULT_COMPONENT):
+        """Install rows loaded elsewhere and return the view for `component`.
+
+        `seen_version` is `self.version` from before the rows were queried; if a
+        write was applied since, the rows may predate it and are not kept.
+        """
+        with self._lock:
+            rows = self._rows_from(stock_rows, expiring_rows)
+            if self.version == seen_version:
+                self._rows = rows
+                self._expiring_stale = False
+                self._loaded_at = time.monotonic()
+                self._epoch = os.urandom(4).hex()
+                self._loads += 1
+                self.version += 1
+                return self._view(component)
+            return StockView({
+                group: dict(row)
+                for (group, comp), row in sorted(rows.items())
+                if comp == component
+            })
+
+    def apply(self, blood_group, delta=0, units=None, component=DEFAULT_COMPONENT):
+        """Write through a committed change: either a delta or the new absolute units."""
+        with self._lock:
+            self.version += 1
+            self._expiring_stale = True
+            if self._rows is None:
+                return
+            row = self._rows.get((blood_group, component))
+            if row is None:
+                # Unknown row (e.g. created elsewhere); reload on next read.
+                self._rows = None
+                return
+            row['units'] = float(units) if units is not None else row['units'] + float(delta)
+            row['last_updated'] = datetime.now()
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._rows = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'loads': self._loads,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'version': self.version,
+                'rows': len(self._rows) if self._rows is not None else 0,
+            }
+
+    def _view(self, component):
+        return StockView({
+            group: dict(row)
+            for (group, comp), row in sorted(self._rows.items())
+            if comp == component
+        }, tag=f'{os.getpid()}.{self._epoch}.{self.version}')
+
+    @staticmethod
+    def _rows_from(stock_rows, expiring_rows):
+        totals = {
+            (row['Blood_Group'], row['Component_Type']): float(row['units'])
+            for row in expiring_rows
+        }
+        return {
+            (row['blood_group'], row['component_type']): {
+                'units': float(row['units_available'] or 0),
+                'expiring': totals.get((row['blood_group'], row['component_type']), 0.0),
+                'last_updated': row['last_updated'],
+            }
+            for row in stock_rows
+        }
+
+    def _load(self, cur):
+        cur.execute(STOCK_QUERY)
+        self._rows = self._rows_from(cur.fetchall(), [])
+        self._load_expiring(cur)
+        self._loaded_at = time.monotonic()
+        self._epoch = os.urandom(4).hex()
+        self._loads += 1
+        self.version += 1
+
+    def _load_expiring(self, cur):
+        totals = expiring_totals(cur, self.expiry_hours)
+        for key, row in self._rows.items():
+            row['expiring'] = totals.get(key, 0.0)
+        self._expiring_stale = False
+        self.version += 1
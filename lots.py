@@ -0,0 +1,220 @@
+"""Lot-level blood stock: one Blood_Lots row per bag or batch of bags.
+
+Blood_Stock stays the per-group aggregate the rest of the app reads; every
+function here changes it in the same transaction as the lots it describes.
+Available lots are indexed by (Blood_Group, Component_Type, Is_Available,
+Expires_At), so first-expired-first-out allocation and "what expires in N
+hours" are single index range scans however many historical lots exist
+(see migrations/0004).
+
+Callers follow the app-wide lock order: Hospital_Requests rows, then
+Blood_Stock rows, then Blood_Lots rows. Lots of a group are only locked by
+a transaction that already holds that group's Blood_Stock row.
+"""
+import math
+from datetime import datetime, timedelta
+
+from queries import registry
+
+# Shelf life by component when the caller does not give an expiry.
+SHELF_LIFE = {
+    'Whole Blood': timedelta(days=35),
+    'Red Cells': timedelta(days=42),
+    'Platelets': timedelta(days=5),
+    'Plasma': timedelta(days=365),
+}
+DEFAULT_SHELF_LIFE = timedelta(days=35)
+FEFO_PAGE_SIZE = 16
+LOT_UPDATE_CHUNK = 500  # lots per CASE update in record_allocations
+EPSILON = 1e-9
+
+FEFO_SQL = """
+    SELECT Lot_ID, Units_Remaining, Expires_At
+    FROM Blood_Lots
+    WHERE Blood_Group = %s AND Component_Type = %s AND Is_Available = 1 AND Expires_At > NOW()
+    {after}
+    ORDER BY Expires_At, Lot_ID LIMIT %s FOR UPDATE
+"""
+# A page of FEFO lots, first page and after a (Expires_At, Lot_ID) key.
+FEFO_QUERIES = {
+    False: registry.define('fefo_lots', FEFO_SQL.format(after='')),
+    True: registry.define(
+        'fefo_lots_after', FEFO_SQL.format(after="AND (Expires_At > %s OR (Expires_At = %s AND Lot_ID > %s))")
+    ),
+}
+
+
+def add_lot(cur, blood_group, component, units, collected_at=None, expires_at=None, user_id=None):
+    """Insert a lot; the caller updates Blood_Stock in the same transaction."""
+    collected_at = collected_at or datetime.now()
+    expires_at = expires_at or collected_at + SHELF_LIFE.get(component, DEFAULT_SHELF_LIFE)
+    if expires_at <= collected_at:
+        raise ValueError('expires_at must be after collected_at')
+    cur.execute("""
+        INSERT INTO Blood_Lots
+        (Blood_Group, Component_Type, Units_Collected, Units_Remaining, Collected_At, Expires_At, Added_By_User_ID)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """, (blood_group, component, units, units, collected_at, expires_at, user_id))
+    return cur.lastrowid, expires_at
+
+
+def allocate_fefo(cur, blood_group, component, units, request_id):
+    """Take `units` from the lots that expire first, recording the allocation.
+
+    Returns the list of (lot_id, units) taken, or None without writing
+    anything if the unexpired lots cannot cover the request.
+    """
+    taken, needed = [], float(units)
+    page = max(math.ceil(needed), FEFO_PAGE_SIZE)
+    after = None
+    while needed > EPSILON:
+        params = [blood_group, component]
+        if after:
+            params.extend([after[0], after[0], after[1]])
+        registry.execute(cur, FEFO_QUERIES[bool(after)], params + [page])
+        rows = cur.fetchall()
+        for row in rows:
+            if needed <= EPSILON:
+                break
+            take = min(float(row['Units_Remaining']), needed)
+            taken.append((row['Lot_ID'], take))
+            needed -= take
+        if len(rows) < page:
+            break
+        after = (rows[-1]['Expires_At'], rows[-1]['Lot_ID'])
+    if needed > EPSILON:
+        return None
+
+    record_allocations(cur, [(request_id, lot_id, take) for lot_id, take in taken])
+    return taken
+
+
+def available_lots(cur, component, blood_groups, lock=True):
+    """{blood_group: [[lot_id, units_remaining], ...]} in FEFO order, for bulk allocation.
+
+    With `lock`, the lots are locked; the caller must already hold the
+    groups' Blood_Stock rows.
+    """
+    lots = {blood_group: [] for blood_group in blood_groups}
+    if not blood_groups:
+        return lots
+    placeholders = ', '.join(['%s'] * len(blood_groups))
+    cur.execute(f"""
+        SELECT Lot_ID, Blood_Group, Units_Remaining
+        FROM Blood_Lots
+        WHERE Component_Type = %s AND Is_Available = 1 AND Expires_At > NOW()
+        AND Blood_Group IN ({placeholders})
+        ORDER BY Blood_Group, Expires_At, Lot_ID
+        {'FOR UPDATE' if lock else ''}
+    """, [component] + sorted(blood_groups))
+    for row in cur.fetchall():
+        lots[row['Blood_Group']].append([row['Lot_ID'], float(row['Units_Remaining'])])
+    return lots
+
+
+def record_allocations(cur, allocations):
+    """Take units out of lots and log them; `allocations` is [(request_id, lot_id, units)].
+
+    The lots must be locked by the caller.
+    """
+    per_lot = {}
+    for _, lot_id, units in allocations:
+        per_lot[lot_id] = per_lot.get(lot_id, 0) + units
+    lot_ids = sorted(per_lot)
+    for start in range(0, len(lot_ids), LOT_UPDATE_CHUNK):
+        chunk = lot_ids[start:start + LOT_UPDATE_CHUNK]
+        cases = ' '.join(['WHEN %s THEN %s'] * len(chunk))
+        placeholders = ', '.join(['%s'] * len(chunk))
+        params = [value for lot_id in chunk for value in (lot_id, per_lot[lot_id])] + chunk
+        cur.execute(f"""
+            UPDATE Blood_Lots
+            SET Units_Remaining = Units_Remaining - CASE Lot_ID {cases} END
+            WHERE Lot_ID IN ({placeholders})
+        """, params)
+    cur.executemany("""
+        INSERT INTO Lot_Allocations (Request_ID, Lot_ID, Units, Allocated_At)
+        VALUES (%s, %s, %s, NOW())
+    """, allocations)
+
+
+def expiring_lots(cur, hours, component=None, blood_group=None):
+    """Unexpired lots with units left that expire within `hours`, soonest first."""
+    query = """
+        SELECT
+            Lot_ID as id,
+            Blood_Group as blood,
+            Component_Type as component,
+            Units_Remaining as units,
+            DATE_FORMAT(Expires_At, '%%Y-%%m-%%d %%H:%%i') as expiresAt
+        FROM Blood_Lots
+        WHERE Is_Available = 1 AND Expires_At > NOW() AND Expires_At <= NOW() + INTERVAL %s HOUR
+    """
+    params = [hours]
+    if component:
+        query += " AND Component_Type = %s"
+        params.append(component)
+    if blood_group:
+        query += " AND Blood_Group = %s"
+        params.append(blood_group)
+    cur.execute(query + " ORDER BY Expires_At, Lot_ID", params)
+    return cur.fetchall()
+
+
+EXPIRING_TOTALS_QUERY = """
+    SELECT Blood_Group, Component_Type, SUM(Units_Remaining) as units
+    FROM Blood_Lots
+    WHERE Is_Available = 1 AND Expires_At > NOW() AND Expires_At <= NOW() + INTERVAL %s HOUR
+    GROUP BY Blood_Group, Component_Type
+"""
+
+
+def expiring_totals(cur, hours):
+    """{(blood_group, component_type): units} expiring within `hours`."""
+    cur.execute(EXPIRING_TOTALS_QUERY, (hours,))
+    return {(row['Blood_Group'], row['Component_Type']): float(row['units']) for row in cur.fetchall()}
+
+
+def expire_lots(cur):
+    """Write off expired lots and take their units out of Blood_Stock.
+
+    Returns {(blood_group, component_type): units_removed}. The caller commits.
+    """
+    cutoff = datetime.now()
+    cur.execute("""
+        SELECT DISTINCT Blood_Group, Component_Type
+        FROM Blood_Lots
+        WHERE Is_Available = 1 AND Expires_At <= %s
+    """, (cutoff,))
+    groups = sorted((row['Blood_Group'], row['Component_Type']) for row in cur.fetchall())
+    if not groups:
+        return {}
+
+    # Lock order: Blood_Stock rows before Blood_Lots rows, as in approvals.
+    for blood_group, component in groups:
+        cur.execute("""
+            SELECT units_available FROM Blood_Stock
+            WHERE blood_group = %s AND component_type = %s
+            FOR UPDATE
+        """, (blood_group, component))
+
+    cur.execute("""
+        SELECT Blood_Group, Component_Type, SUM(Units_Remaining) as units
+        FROM Blood_Lots
+        WHERE Is_Available = 1 AND Expires_At <= %s
+        GROUP BY Blood_Group, Component_Type
+        FOR UPDATE
+    """, (cutoff,))
+    removed = {(row['Blood_Group'], row['Component_Type']): float(row['units']) for row in cur.fetchall()}
+
+    cur.execute("""
+        UPDATE Blood_Lots
+        SET Units_Remaining = 0, Discarded_At = NOW()
+        WHERE Is_Available = 1 AND Expires_At <= %s
+    """, (cutoff,))
+    for (blood_group, component), units in sorted(removed.items()):
+        cur.execute("""
+            UPDATE Blood_Stock
+            SET units_available = GREATEST(units_available - %s, 0), last_updated = NOW()
+            WHERE blood_group = %s AND component_type = %s
+        """, (units, blood_group, component))
+    return removed
@@ -0,0 +1,156 @@
+"""Batch matching of pending hospital requests against whole-blood stock.
+
+`plan()` walks the pending requests once, most urgent first and oldest first
+within a priority, and fills each one from its own blood group or, failing
+that, from ABO/Rh-compatible groups. A request is filled whole or not at
+all. Within a group, units come from the lots that expire first (FEFO), and
+a group is only drawn on while both its Blood_Stock figure and its
+unexpired lots cover the units.
+
+Substitutes are tried closest first (same ABO group Rh-negative, then O),
+so O- is the last resort and is still there for O- recipients, who can take
+nothing else.
+
+`apply()` writes a plan in bulk: one UPDATE per blood group, chunked lot
+updates and multi-row inserts. Tens of thousands of requests cost a few
+dozen round trips instead of several per request.
+"""
+from collections import namedtuple
+
+from lots import EPSILON, available_lots, record_allocations
+
+COMPONENT = 'Whole Blood'
+PRIORITIES = ('emergency', 'urgent', 'routine')
+PRIORITY_RANK = {priority: rank for rank, priority in enumerate(PRIORITIES)}
+STATUS_CHUNK = 1000  # request ids per UPDATE ... IN (...)
+
+# Recipient group -> donor groups it can receive red cells from, preferred first.
+COMPATIBLE = {
+    'O-': ('O-',),
+    'O+': ('O+', 'O-'),
+    'A-': ('A-', 'O-'),
+    'A+': ('A+', 'A-', 'O+', 'O-'),
+    'B-': ('B-', 'O-'),
+    'B+': ('B+', 'B-', 'O+', 'O-'),
+    'AB-': ('AB-', 'A-', 'B-', 'O-'),
+    'AB+': ('AB+', 'AB-', 'A+', 'A-', 'B+', 'B-', 'O+', 'O-'),
+}
+
+# lots: [(blood_group, lot_id, units)] supplied to the request
+Allocation = namedtuple('Allocation', 'request_id blood_group units lots')
+Plan = namedtuple('Plan', 'allocations unfilled used')
+
+PENDING_QUERY = """
+    SELECT Request_ID, Blood_Group, Units_Requested, Priority, Request_Date
+    FROM Hospital_Requests
+    WHERE Status = 'Pending' AND Component_Type = %s
+    ORDER BY Request_ID
+"""
+
+
+def load(cur, lock=True):
+    """(pending requests, {group: stock units}, {group: FEFO lots}) for `plan()`.
+
+    With `lock`, rows are locked in the app-wide order: requests by id, then
+    Blood_Stock by group, then lots.
+    """
+    cur.execute(PENDING_QUERY + (" FOR UPDATE" if lock else ""), (COMPONENT,))
+    pending = cur.fetchall()
+    groups = sorted({donor for row in pending for donor in COMPATIBLE.get(row['Blood_Group'], ())})
+    if not groups:
+        return pending, {}, {}
+    placeholders = ', '.join(['%s'] * len(groups))
+    cur.execute(f"""
+        SELECT blood_group, units_available
+        FROM Blood_Stock
+        WHERE component_type = %s AND blood_group IN ({placeholders})
+        ORDER BY blood_group
+        {'FOR UPDATE' if lock else ''}
+    """, [COMPONENT] + groups)
+    stock = {row['blood_group']: float(row['units_available']) for row in cur.fetchall()}
+    return pending, stock, available_lots(cur, COMPONENT, groups, lock)
+
+
+def priority_key(row):
+    return PRIORITY_RANK.get(row['Priority'], len(PRIORITIES)), row['Request_Date'], row['Request_ID']
+
+
+def plan(pending, stock, lots):
+    """Match `pending` against `stock` and `lots` (consumed in place) in one pass."""
+    capacity = {
+        group: min(stock.get(group, 0.0), sum(units for _, units in group_lots))
+        for group, group_lots in lots.items()
+    }
+    next_lot = dict.fromkeys(lots, 0)
+    allocations, unfilled, used = [], [], {}
+
+    for row in sorted(pending, key=priority_key):
+        request_id, needed = row['Request_ID'], float(row['Units_Requested'])
+        donors = COMPATIBLE.get(row['Blood_Group'])
+        if donors is None:
+            unfilled.append((request_id, f"Unknown blood group {row['Blood_Group']}"))
+            continue
+        if needed <= EPSILON:
+            unfilled.append((request_id, 'No units requested'))
+            continue
+        if sum(capacity.get(group, 0.0) for group in donors) + EPSILON < needed:
+            unfilled.append((request_id, 'Insufficient compatible stock'))
+            continue
+
+        taken = []
+        for group in donors:
+            if needed <= EPSILON:
+                break
+            share = min(capacity.get(group, 0.0), needed)
+            if share <= EPSILON:
+                continue
+            capacity[group] -= share
+            used[group] = used.get(group, 0.0) + share
+            needed -= share
+            group_lots = lots[group]
+            while share > EPSILON and next_lot[group] < len(group_lots):
+                lot = group_lots[next_lot[group]]
+                take = min(lot[1], share)
+                taken.append((group, lot[0], take))
+                lot[1] -= take
+                share -= take
+                if lot[1] <= EPSILON:
+                    next_lot[group] += 1
+        allocations.append(Allocation(request_id, row['Blood_Group'], float(row['Units_Requested']), taken))
+
+    return Plan(allocations, unfilled, used)
+
+
+def apply(cur, result, user_id):
+    """Write a plan made from locked rows; the caller commits."""
+    for group in sorted(result.used):
+        cur.execute("""
+            UPDATE Blood_Stock
+            SET units_available = units_available - %s, last_updated = NOW()
+            WHERE blood_group = %s AND component_type = %s
+        """, (result.used[group], group, COMPONENT))
+
+    record_allocations(cur, [
+        (allocation.request_id, lot_id, units)
+        for allocation in result.allocations
+        for _, lot_id, units in allocation.lots
+    ])
+
+    request_ids = [allocation.request_id for allocation in result.allocations]
+    for start in range(0, len(request_ids), STATUS_CHUNK):
+        chunk = request_ids[start:start + STATUS_CHUNK]
+        placeholders = ', '.join(['%s'] * len(chunk))
+        cur.execute(f"UPDATE Hospital_Requests SET Status = 'Fulfilled' WHERE Request_ID IN ({placeholders})", chunk)
+    cur.executemany("""
+        INSERT INTO Requests_Fulfilled
+        (Request_ID, Units_Supplied, Fulfilled_Date, Fulfilled_By_User_ID)
+        VALUES (%s, %s, CURDATE(), %s)
+    """, [(allocation.request_id, allocation.units, user_id) for allocation in result.allocations])
+
+
+def supplied_by_group(allocation):
+    """{donor_group: units} for one allocation."""
+    supplied = {}
+    for group, _, units in allocation.lots:
+        supplied[group] = supplied.get(group, 0.0) + units
+    return supplied
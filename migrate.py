@@ -0,0 +1,141 @@
+"""Apply migrations/NNNN_*.sql in order, recording each in Schema_Migrations.
+
+    python migrate.py                       # apply everything pending
+    python migrate.py --status
+    python migrate.py --to 0007             # stop after 0007
+    python migrate.py --mark-applied 0011   # record 0000-0011 without running them
+
+Connects with the MYSQL_* settings in app.py. `--mark-applied` is for
+databases built before the migrations were tracked: record what they
+already have, then run the rest normally.
+
+MySQL commits DDL implicitly, so a migration that fails halfway stays
+partly applied and unrecorded; fix the file, undo or skip the statements
+that did run, and run migrate.py again. A migration's checksum is stored
+when it is applied and --status flags files edited afterwards.
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+
+from app import app
+from db import PooledMySQL
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+FILE_PATTERN = re.compile(r'^(\d{4})_([a-z0-9_]+)\.sql$')
+
+CREATE_TABLE_QUERY = """
+    CREATE TABLE IF NOT EXISTS Schema_Migrations (
+        Version CHAR(4) NOT NULL PRIMARY KEY,
+        Name VARCHAR(100) NOT NULL,
+        Checksum CHAR(64) NOT NULL,
+        Applied_At DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def available():
+    """[(version, name, path)] in version order."""
+    found = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = FILE_PATTERN.match(filename)
+        if match:
+            found.append((match.group(1), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return found
+
+
+def checksum(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def statements(sql):
+    """Split a migration into statements, honouring DELIMITER lines."""
+    delimiter, buffer = ';', []
+    for line in sql.splitlines():
+        if not _has_sql(buffer) and line.strip().upper().startswith('DELIMITER '):
+            delimiter = line.strip().split(None, 1)[1]
+            buffer = []
+            continue
+        buffer.append(line)
+        if line.rstrip().endswith(delimiter) and not line.strip().startswith('--'):
+            statement = '\n'.join(buffer).rstrip()[:-len(delimiter)].strip()
+            buffer = []
+            if _has_sql(statement.splitlines()):
+                yield statement
+    if _has_sql(buffer):
+        yield '\n'.join(buffer).strip()
+
+
+def _has_sql(lines):
+    return any(line.strip() and not line.strip().startswith('--') for line in lines)
+
+
+def applied(cur):
+    cur.execute(CREATE_TABLE_QUERY)
+    cur.execute("SELECT Version, Checksum FROM Schema_Migrations")
+    return {row['Version']: row['Checksum'] for row in cur.fetchall()}
+
+
+def record(cur, version, name, path):
+    cur.execute(
+        "INSERT INTO Schema_Migrations (Version, Name, Checksum) VALUES (%s, %s, %s)",
+        (version, name, checksum(path)),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--status', action='store_true', help='list migrations and exit')
+    parser.add_argument('--to', metavar='VERSION', help='apply up to and including VERSION')
+    parser.add_argument('--mark-applied', metavar='VERSION',
+                        help='record migrations up to VERSION as applied without running them')
+    args = parser.parse_args()
+
+    conn = PooledMySQL.connect(app.config)
+    cur = conn.cursor()
+    done = applied(cur)
+    conn.commit()
+
+    if args.status:
+        for version, name, path in available():
+            state = 'pending'
+            if version in done:
+                state = 'applied' if done[version] == checksum(path) else 'applied, file changed since'
+            print(f"{version} {name:40s} {state}")
+        return
+
+    if args.mark_applied:
+        for version, name, path in available():
+            if version > args.mark_applied:
+                break
+            if version not in done:
+                record(cur, version, name, path)
+                print(f"📝 {version} {name} marked as applied")
+        conn.commit()
+        return
+
+    pending = [m for m in available() if m[0] not in done and (not args.to or m[0] <= args.to)]
+    if not pending:
+        print("✅ Schema is up to date")
+        return
+    for version, name, path in pending:
+        print(f"🔄 {version} {name}")
+        with open(path) as f:
+            sql = f.read()
+        try:
+            for statement in statements(sql):
+                cur.execute(statement)
+            record(cur, version, name, path)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ {version} {name} failed: {e}", file=sys.stderr)
+            sys.exit(1)
+    print(f"✅ Applied {len(pending)} migration(s)")
+
+
+if __name__ == '__main__':
+    main()
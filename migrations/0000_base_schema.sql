@@ -0,0 +1,80 @@
+-- Base schema: the tables as they stood before 0001, written down from the
+-- queries in app.py so a database can be built from scratch with migrate.py.
+-- Later migrations add every secondary index, column and table on top.
+--
+-- Databases created by hand before this file existed already have these
+-- tables; record them without running anything:
+--     python migrate.py --mark-applied 0000
+-- (or the number of the last migration that database has).
+
+CREATE TABLE Users (
+    user_id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    username VARCHAR(50) NOT NULL,
+    role VARCHAR(20) NOT NULL DEFAULT 'staff',
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    -- Login lookup
+    UNIQUE KEY uq_users_username (username)
+);
+
+CREATE TABLE Donors (
+    Donor_ID INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    Name VARCHAR(100) NOT NULL,
+    Blood_Group VARCHAR(5) NOT NULL,
+    Contact_Number VARCHAR(20) NOT NULL,
+    Email VARCHAR(100) NULL,
+    City VARCHAR(100) NULL,
+    Date_Of_Birth DATE NULL,
+    Gender ENUM('Male', 'Female', 'Other') NULL,
+    Last_Donation_Date DATE NULL
+);
+
+CREATE TABLE Donations (
+    Donation_ID INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    Donor_ID INT NOT NULL,
+    Donation_Date DATE NOT NULL,
+    INDEX idx_donations_donor (Donor_ID)
+);
+
+CREATE TABLE Donor_Rewards (
+    donor_id INT NOT NULL PRIMARY KEY,
+    total_donations INT UNSIGNED NOT NULL DEFAULT 0
+);
+
+-- One row per (group, component); the app keeps units_available equal to
+-- the units left in that group's unexpired lots (0004).
+CREATE TABLE Blood_Stock (
+    blood_group VARCHAR(5) NOT NULL,
+    component_type VARCHAR(50) NOT NULL DEFAULT 'Whole Blood',
+    units_available DECIMAL(10,2) NOT NULL DEFAULT 0,
+    last_updated DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (blood_group, component_type)
+);
+
+CREATE TABLE Hospital_Requests (
+    Request_ID INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    Hospital_Name VARCHAR(150) NOT NULL,
+    City VARCHAR(100) NULL,
+    Blood_Group VARCHAR(5) NOT NULL,
+    Component_Type VARCHAR(50) NOT NULL DEFAULT 'Whole Blood',
+    Units_Requested INT NOT NULL,
+    Notes TEXT NULL,
+    Request_Date DATE NOT NULL,
+    Status ENUM('Pending', 'Fulfilled', 'Cancelled') NOT NULL DEFAULT 'Pending'
+);
+
+CREATE TABLE Requests_Fulfilled (
+    Fulfillment_ID INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    Request_ID INT NOT NULL,
+    Units_Supplied DECIMAL(10,2) NOT NULL,
+    Fulfilled_Date DATE NOT NULL,
+    Fulfilled_By_User_ID INT NULL,
+    INDEX idx_fulfilled_request (Request_ID)
+);
+
+INSERT INTO Blood_Stock (blood_group, component_type, units_available) VALUES
+    ('A+', 'Whole Blood', 0), ('A-', 'Whole Blood', 0),
+    ('B+', 'Whole Blood', 0), ('B-', 'Whole Blood', 0),
+    ('O+', 'Whole Blood', 0), ('O-', 'Whole Blood', 0),
+    ('AB+', 'Whole Blood', 0), ('AB-', 'Whole Blood', 0);
+
+INSERT INTO Users (username, role) VALUES ('admin', 'admin');
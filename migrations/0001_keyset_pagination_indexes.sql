@@ -0,0 +1,12 @@
+-- Indexes for keyset pagination on /api/donors/all and /api/requests/all.
+-- Each index ends with the tie-breaking primary key so "WHERE key < cursor
+-- ORDER BY key DESC LIMIT n" is a single backward range scan.
+
+-- Donors filtered by blood group, newest first (unfiltered pages use the PK).
+CREATE INDEX idx_donors_blood_group_id ON Donors (Blood_Group, Donor_ID);
+
+-- Requests ordered by (Request_Date, Request_ID).
+CREATE INDEX idx_requests_date_id ON Hospital_Requests (Request_Date, Request_ID);
+
+-- Requests filtered by status, e.g. the pending queue.
+CREATE INDEX idx_requests_status_date_id ON Hospital_Requests (Status, Request_Date, Request_ID);
@@ -0,0 +1,22 @@
+-- Indexes behind the donor search in search.py, replacing "%term%" LIKE scans.
+-- InnoDB maintains all of them on INSERT/UPDATE/DELETE, so add_donor,
+-- update_donor and delete_donor need no extra work to keep search in sync.
+
+-- Substring name/email matching. The ngram parser splits text into
+-- ngram_token_size (default 2) character tokens, so any substring of two or
+-- more characters is found by a phrase search. Typos are matched by phrase
+-- searches for the term's one-edit variants (search.py), not by shared
+-- tokens: "jhon" and "John" have no bigram in common.
+ALTER TABLE Donors ADD FULLTEXT INDEX ftx_donors_name_email (Name, Email) WITH PARSER ngram;
+
+-- One-character name prefixes.
+CREATE INDEX idx_donors_name ON Donors (Name);
+
+-- Phone numbers normalized to digits so "+91 98765-43210" and "9876543210"
+-- match the same prefix range.
+ALTER TABLE Donors
+    ADD COLUMN Contact_Digits VARCHAR(32) AS (
+        REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(
+            Contact_Number, ' ', ''), '-', ''), '(', ''), ')', ''), '+', ''), '.', '')
+    ) STORED,
+    ADD INDEX idx_donors_contact_digits (Contact_Digits);
@@ -0,0 +1,44 @@
+-- Denormalized donation counter on Donors, replacing the correlated
+-- Donor_Rewards subquery that /api/donors/all ran once per output row.
+--
+-- The counter is maintained by triggers on Donations, so it changes in the
+-- same transaction as the donation row no matter which client records it.
+
+ALTER TABLE Donors ADD COLUMN Total_Donations INT UNSIGNED NOT NULL DEFAULT 0;
+
+-- Backfill with the totals the donors page displayed until now.
+UPDATE Donors d
+JOIN Donor_Rewards r ON r.donor_id = d.Donor_ID
+SET d.Total_Donations = r.total_donations;
+
+DELIMITER //
+
+CREATE TRIGGER trg_donations_after_insert
+AFTER INSERT ON Donations
+FOR EACH ROW
+BEGIN
+    UPDATE Donors SET Total_Donations = Total_Donations + 1
+    WHERE Donor_ID = NEW.Donor_ID;
+END//
+
+CREATE TRIGGER trg_donations_after_delete
+AFTER DELETE ON Donations
+FOR EACH ROW
+BEGIN
+    UPDATE Donors SET Total_Donations = GREATEST(CAST(Total_Donations AS SIGNED) - 1, 0)
+    WHERE Donor_ID = OLD.Donor_ID;
+END//
+
+CREATE TRIGGER trg_donations_after_update
+AFTER UPDATE ON Donations
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.Donor_ID <=> OLD.Donor_ID) THEN
+        UPDATE Donors SET Total_Donations = GREATEST(CAST(Total_Donations AS SIGNED) - 1, 0)
+        WHERE Donor_ID = OLD.Donor_ID;
+        UPDATE Donors SET Total_Donations = Total_Donations + 1
+        WHERE Donor_ID = NEW.Donor_ID;
+    END IF;
+END//
+
+DELIMITER ;
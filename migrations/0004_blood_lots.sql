@@ -0,0 +1,56 @@
+-- Lot-level stock tracking. Blood_Stock stays the per-group aggregate; each
+-- Blood_Lots row is one collected bag (or batch) with its own expiry, and
+-- approvals draw from the lots that expire first (FEFO).
+
+CREATE TABLE Blood_Lots (
+    Lot_ID BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    Blood_Group VARCHAR(5) NOT NULL,
+    Component_Type VARCHAR(50) NOT NULL DEFAULT 'Whole Blood',
+    Units_Collected DECIMAL(10,2) NOT NULL,
+    Units_Remaining DECIMAL(10,2) NOT NULL,
+    Collected_At DATETIME NOT NULL,
+    Expires_At DATETIME NOT NULL,
+    Donation_ID INT NULL,
+    Added_By_User_ID INT NULL,
+    Is_Available TINYINT AS (Units_Remaining > 0) STORED,
+    Discarded_At DATETIME NULL,
+    -- FEFO allocation: available lots of one group in expiry order.
+    INDEX idx_lots_fefo (Blood_Group, Component_Type, Is_Available, Expires_At),
+    -- "What expires in the next N hours", answered from the index alone.
+    INDEX idx_lots_expiring (Is_Available, Expires_At, Blood_Group, Component_Type, Units_Remaining)
+);
+
+CREATE TABLE Lot_Allocations (
+    Request_ID INT NOT NULL,
+    Lot_ID BIGINT UNSIGNED NOT NULL,
+    Units DECIMAL(10,2) NOT NULL,
+    Allocated_At DATETIME NOT NULL,
+    PRIMARY KEY (Request_ID, Lot_ID),
+    INDEX idx_allocations_lot (Lot_ID)
+);
+
+-- Existing stock has no lot history; record it as one legacy lot per row.
+--
+-- Inventory impact: the real expiry of that stock is unknown. Counting the
+-- shelf life from last_updated would make every row untouched for 35 days
+-- expire at once, and the next expire_lots() run would write its units off
+-- Blood_Stock. So legacy lots expire 35 days (the Whole Blood shelf life)
+-- after the later of last_updated and the migration itself: no unit is
+-- written off by the migration, and what is left of the legacy stock is
+-- written off 35 days after it at the latest. Where that is longer than
+-- the real shelf life, correct it before then; the legacy lots are the ones
+-- without a Donation_ID or Added_By_User_ID, e.g.
+--
+--   UPDATE Blood_Lots SET Expires_At = '2026-11-30 00:00:00'
+--   WHERE Donation_ID IS NULL AND Added_By_User_ID IS NULL AND Blood_Group = 'O-';
+INSERT INTO Blood_Lots
+    (Blood_Group, Component_Type, Units_Collected, Units_Remaining, Collected_At, Expires_At)
+SELECT
+    blood_group,
+    component_type,
+    units_available,
+    units_available,
+    COALESCE(last_updated, NOW()),
+    GREATEST(COALESCE(last_updated, NOW()), NOW()) + INTERVAL 35 DAY
+FROM Blood_Stock
+WHERE units_available > 0;
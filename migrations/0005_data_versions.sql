@@ -0,0 +1,55 @@
+-- Per-table change counters. The list endpoints derive their ETags from
+-- these, so a client revalidating an unchanged list gets a 304 after one
+-- short index range read instead of the list query.
+--
+-- Triggers bump the counter in the same transaction as the change, whoever
+-- makes it. Donation triggers (0003) update Donors.Total_Donations, which
+-- in turn bumps the Donors counter.
+--
+-- A bumped counter row stays locked until the writer commits, so one row
+-- per table would make every writer to that table wait for the one before.
+-- Each table's counter is split into 32 shards instead; a transaction bumps
+-- the shard picked by its connection id and only waits for a transaction
+-- on another connection that landed on the same shard. The version is the
+-- sum of the shards: it goes up with every commit a reader can see, which
+-- is all an ETag needs.
+
+CREATE TABLE Data_Versions (
+    Table_Name VARCHAR(64) NOT NULL,
+    Shard TINYINT UNSIGNED NOT NULL,
+    Version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    PRIMARY KEY (Table_Name, Shard)
+);
+
+INSERT INTO Data_Versions (Table_Name, Shard)
+WITH RECURSIVE shards (n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM shards WHERE n < 31)
+SELECT tables.name, shards.n
+FROM (SELECT 'Donors' as name UNION ALL SELECT 'Hospital_Requests') tables CROSS JOIN shards;
+
+DELIMITER //
+
+CREATE TRIGGER trg_donors_version_insert AFTER INSERT ON Donors
+FOR EACH ROW
+    UPDATE Data_Versions SET Version = Version + 1 WHERE Table_Name = 'Donors' AND Shard = CONNECTION_ID() % 32//
+
+CREATE TRIGGER trg_donors_version_update AFTER UPDATE ON Donors
+FOR EACH ROW
+    UPDATE Data_Versions SET Version = Version + 1 WHERE Table_Name = 'Donors' AND Shard = CONNECTION_ID() % 32//
+
+CREATE TRIGGER trg_donors_version_delete AFTER DELETE ON Donors
+FOR EACH ROW
+    UPDATE Data_Versions SET Version = Version + 1 WHERE Table_Name = 'Donors' AND Shard = CONNECTION_ID() % 32//
+
+CREATE TRIGGER trg_requests_version_insert AFTER INSERT ON Hospital_Requests
+FOR EACH ROW
+    UPDATE Data_Versions SET Version = Version + 1 WHERE Table_Name = 'Hospital_Requests' AND Shard = CONNECTION_ID() % 32//
+
+CREATE TRIGGER trg_requests_version_update AFTER UPDATE ON Hospital_Requests
+FOR EACH ROW
+    UPDATE Data_Versions SET Version = Version + 1 WHERE Table_Name = 'Hospital_Requests' AND Shard = CONNECTION_ID() % 32//
+
+CREATE TRIGGER trg_requests_version_delete AFTER DELETE ON Hospital_Requests
+FOR EACH ROW
+    UPDATE Data_Versions SET Version = Version + 1 WHERE Table_Name = 'Hospital_Requests' AND Shard = CONNECTION_ID() % 32//
+
+DELIMITER ;
@@ -0,0 +1,16 @@
+-- Idempotency keys for the create endpoints (see idempotency.py). A key is
+-- inserted in the same transaction as the row it protects and keeps the
+-- response that was returned, so a retried POST replays it.
+
+CREATE TABLE Idempotency_Keys (
+    Scope VARCHAR(64) NOT NULL,
+    Idem_Key VARCHAR(255) NOT NULL,
+    Request_Hash CHAR(64) NOT NULL,
+    Status_Code SMALLINT NULL,
+    Response_Body TEXT NULL,
+    Created_At DATETIME NOT NULL,
+    Expires_At DATETIME NOT NULL,
+    PRIMARY KEY (Scope, Idem_Key),
+    -- Purging expired keys
+    INDEX idx_idempotency_expires (Expires_At)
+);
@@ -0,0 +1,37 @@
+-- Daily and monthly rollups for the analytics endpoints (see analytics.py).
+-- Metric is 'donations', 'requests' or 'fulfillments'; Events counts rows and
+-- Units sums the units involved. City is '' when the source row has none.
+
+CREATE TABLE Rollup_Daily (
+    Metric VARCHAR(16) NOT NULL,
+    Bucket_Date DATE NOT NULL,
+    Blood_Group VARCHAR(5) NOT NULL,
+    City VARCHAR(100) NOT NULL DEFAULT '',
+    Events INT UNSIGNED NOT NULL,
+    Units DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (Metric, Bucket_Date, Blood_Group, City)
+);
+
+CREATE TABLE Rollup_Monthly (
+    Metric VARCHAR(16) NOT NULL,
+    Bucket_Month DATE NOT NULL,  -- first day of the month
+    Blood_Group VARCHAR(5) NOT NULL,
+    City VARCHAR(100) NOT NULL DEFAULT '',
+    Events INT UNSIGNED NOT NULL,
+    Units DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (Metric, Bucket_Month, Blood_Group, City)
+);
+
+-- High-water mark of the incremental refresh; its row lock also serializes
+-- concurrent refreshes.
+CREATE TABLE Rollup_State (
+    Name VARCHAR(32) NOT NULL PRIMARY KEY,
+    High_Water_Mark DATE NULL,
+    Refreshed_At DATETIME NULL
+);
+
+INSERT INTO Rollup_State (Name, High_Water_Mark, Refreshed_At) VALUES ('analytics', NULL, NULL);
+
+-- Range scans for the refresh and for "donations this month".
+CREATE INDEX idx_donations_date ON Donations (Donation_Date);
+CREATE INDEX idx_fulfilled_date ON Requests_Fulfilled (Fulfilled_Date);
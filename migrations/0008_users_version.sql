@@ -0,0 +1,24 @@
+-- Change counter for Users, sharded like the others (see 0005). Workers
+-- cache user rows for the auth check (auth.py) and poll this counter every
+-- few seconds, so a role change or removed account takes effect everywhere
+-- without waiting for the TTL.
+
+INSERT INTO Data_Versions (Table_Name, Shard)
+WITH RECURSIVE shards (n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM shards WHERE n < 31)
+SELECT 'Users', n FROM shards;
+
+DELIMITER //
+
+CREATE TRIGGER trg_users_version_insert AFTER INSERT ON Users
+FOR EACH ROW
+    UPDATE Data_Versions SET Version = Version + 1 WHERE Table_Name = 'Users' AND Shard = CONNECTION_ID() % 32//
+
+CREATE TRIGGER trg_users_version_update AFTER UPDATE ON Users
+FOR EACH ROW
+    UPDATE Data_Versions SET Version = Version + 1 WHERE Table_Name = 'Users' AND Shard = CONNECTION_ID() % 32//
+
+CREATE TRIGGER trg_users_version_delete AFTER DELETE ON Users
+FOR EACH ROW
+    UPDATE Data_Versions SET Version = Version + 1 WHERE Table_Name = 'Users' AND Shard = CONNECTION_ID() % 32//
+
+DELIMITER ;
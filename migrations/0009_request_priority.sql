@@ -0,0 +1,7 @@
+-- Request priority for the matching engine (matching.py): pending requests are
+-- allocated emergency first, then urgent, then routine, oldest first within
+-- each. The list API reported every request as 'urgent' so far, which stays
+-- the default.
+
+ALTER TABLE Hospital_Requests
+    ADD COLUMN Priority ENUM('emergency', 'urgent', 'routine') NOT NULL DEFAULT 'urgent' AFTER Units_Requested;
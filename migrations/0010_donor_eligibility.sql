@@ -0,0 +1,51 @@
+-- Eligible-donor lookups for emergency call-outs (/api/donors/eligible).
+
+-- "Group X, not donated since the deferral cutoff": Last_Donation_Date IS NULL
+-- OR <= cutoff is one contiguous range of this index, in rest order.
+CREATE INDEX idx_donors_group_last_donation ON Donors (Blood_Group, Last_Donation_Date);
+
+-- The same per city, for the proximity search (one range per group and city).
+CREATE INDEX idx_donors_group_city_last_donation ON Donors (Blood_Group, City, Last_Donation_Date);
+
+-- One coordinate per city; geo.py grids these in memory to find nearby
+-- cities. Add rows here for any city donors register from; donors in
+-- cities without a row are only found by an exact city match.
+CREATE TABLE City_Locations (
+    City VARCHAR(100) NOT NULL PRIMARY KEY,
+    Latitude DECIMAL(8, 5) NOT NULL,
+    Longitude DECIMAL(8, 5) NOT NULL
+);
+
+INSERT INTO City_Locations (City, Latitude, Longitude) VALUES
+    ('Pune', 18.52040, 73.85670),
+    ('Pimpri-Chinchwad', 18.62980, 73.79970),
+    ('Mumbai', 19.07600, 72.87770),
+    ('Thane', 19.21830, 72.97810),
+    ('Navi Mumbai', 19.03300, 73.02970),
+    ('Kalyan', 19.24030, 73.13050),
+    ('Lonavala', 18.75460, 73.40620),
+    ('Nashik', 19.99750, 73.78980),
+    ('Ahmednagar', 19.09480, 74.74800),
+    ('Baramati', 18.15150, 74.58150),
+    ('Satara', 17.68050, 74.01830),
+    ('Sangli', 16.85240, 74.58150),
+    ('Kolhapur', 16.70500, 74.24330),
+    ('Solapur', 17.65990, 75.90640),
+    ('Aurangabad', 19.87620, 75.34330),
+    ('Jalgaon', 21.00770, 75.56260),
+    ('Latur', 18.40880, 76.56040),
+    ('Nanded', 19.13830, 77.32100),
+    ('Akola', 20.70020, 77.00820),
+    ('Amravati', 20.93740, 77.77960),
+    ('Nagpur', 21.14580, 79.08820),
+    ('Panaji', 15.49090, 73.82780),
+    ('Surat', 21.17020, 72.83110),
+    ('Ahmedabad', 23.02250, 72.57140),
+    ('Indore', 22.71960, 75.85770),
+    ('Bhopal', 23.25990, 77.41260),
+    ('Jaipur', 26.91240, 75.78730),
+    ('Delhi', 28.70410, 77.10250),
+    ('Hyderabad', 17.38500, 78.48670),
+    ('Bengaluru', 12.97160, 77.59460),
+    ('Chennai', 13.08270, 80.27070),
+    ('Kolkata', 22.57260, 88.36390);
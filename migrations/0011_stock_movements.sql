@@ -0,0 +1,40 @@
+-- Append-only log of Blood_Stock movements, written behind by movements.py.
+-- One row per committed change: who, which group and component, how many
+-- units (negative for issues and write-offs), why, and for which request.
+-- Event_ID is generated by the app; rows are inserted with INSERT IGNORE so
+-- a spool segment replayed after a crash never double-counts.
+
+CREATE TABLE Stock_Movements (
+    Movement_ID BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    Event_ID CHAR(32) NOT NULL,
+    Moved_At DATETIME(6) NOT NULL,
+    Blood_Group VARCHAR(5) NOT NULL,
+    Component_Type VARCHAR(50) NOT NULL,
+    Delta DECIMAL(10,2) NOT NULL,
+    Reason VARCHAR(32) NOT NULL,
+    Request_ID INT NULL,
+    User_ID INT NULL,
+    UNIQUE KEY uq_movements_event (Event_ID),
+    -- Point-in-time stock: SUM(Delta) up to a timestamp, from the index alone.
+    INDEX idx_movements_time (Moved_At, Blood_Group, Component_Type, Delta),
+    -- Per-group history pages, newest first.
+    INDEX idx_movements_group (Blood_Group, Component_Type, Movement_ID),
+    INDEX idx_movements_request (Request_ID)
+);
+
+-- Stock on hand when the log starts; reconstruction begins here.
+INSERT INTO Stock_Movements (Event_ID, Moved_At, Blood_Group, Component_Type, Delta, Reason)
+SELECT REPLACE(UUID(), '-', ''), NOW(6), blood_group, component_type, units_available, 'baseline'
+FROM Blood_Stock;
+
+DELIMITER //
+
+CREATE TRIGGER trg_movements_no_update BEFORE UPDATE ON Stock_Movements
+FOR EACH ROW
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Stock_Movements is append-only'//
+
+CREATE TRIGGER trg_movements_no_delete BEFORE DELETE ON Stock_Movements
+FOR EACH ROW
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Stock_Movements is append-only'//
+
+DELIMITER ;
@@ -0,0 +1,27 @@
+-- The last indexes the routes need, and a map of which index serves what.
+--
+--   /api/donors/all                 PRIMARY, idx_donors_blood_group_id (0001)
+--   /api/donors/all?search=         ftx_donors_name_email, idx_donors_name,
+--                                   idx_donors_contact_digits (0002)
+--   /api/donors/eligible[/export]   idx_donors_group_last_donation,
+--                                   idx_donors_group_city_last_donation (0010)
+--   /api/requests/all               idx_requests_date_id,
+--                                   idx_requests_status_date_id (0001),
+--                                   idx_requests_group_date_id (below)
+--   /api/requests/auto-allocate     idx_requests_pending (below), idx_lots_fefo (0004)
+--   /api/requests/approve*          PRIMARY, idx_lots_fefo (0004)
+--   /api/inventory/*                Blood_Stock PRIMARY, idx_lots_expiring (0004)
+--   /api/inventory/movements, /at   idx_movements_* (0011)
+--   /api/dashboard/*                idx_donations_date (0007), idx_requests_status_date_id
+--   /api/analytics/*                Rollup_* PRIMARY, idx_donations_date,
+--                                   idx_fulfilled_date (0007)
+--   ETags, auth                     Data_Versions PRIMARY (0005), uq_users_username (0000)
+
+-- matching.load() reads and locks every pending request of a component.
+-- With only the (Status, Request_Date, ...) index InnoDB also locks pending
+-- rows of other components and returns them in date order; this one covers
+-- exactly the rows it needs, already in Request_ID order.
+CREATE INDEX idx_requests_pending ON Hospital_Requests (Status, Component_Type, Request_ID);
+
+-- /api/requests/all filtered by blood group without a status filter.
+CREATE INDEX idx_requests_group_date_id ON Hospital_Requests (Blood_Group, Request_Date, Request_ID);
@@ -0,0 +1,65 @@
+-- Change times for the delta sync endpoints (/api/sync/donors, /requests;
+-- see sync.py).
+--
+-- Every Donors and Hospital_Requests row carries in Sync_At the UTC time of
+-- its last change, and deletions leave a tombstone in Sync_Deletions with
+-- the time of the delete. BEFORE triggers stamp the rows; nothing else is
+-- written or locked, and tombstones are appended at the end of their index,
+-- so concurrent writers never wait on each other here.
+--
+-- Stamps are taken while the writing transaction is open, so they do not
+-- become visible in commit order. sync.py only hands out changes stamped
+-- before the start of the oldest transaction still open on the server,
+-- read from information_schema.INNODB_TRX: the sync reader needs the
+-- PROCESS privilege.
+--
+-- Existing rows are stamped with the time of the migration; feeds page by
+-- (Sync_At, id), so a shared stamp is fine.
+
+ALTER TABLE Donors ADD COLUMN Sync_At DATETIME(6) NOT NULL DEFAULT '1970-01-01 00:00:00';
+ALTER TABLE Hospital_Requests ADD COLUMN Sync_At DATETIME(6) NOT NULL DEFAULT '1970-01-01 00:00:00';
+
+UPDATE Donors SET Sync_At = UTC_TIMESTAMP(6);
+UPDATE Hospital_Requests SET Sync_At = UTC_TIMESTAMP(6);
+
+-- /api/sync/*: rows changed after the client's position, in (Sync_At, id)
+-- order; InnoDB appends the primary key to the index.
+CREATE INDEX idx_donors_sync_at ON Donors (Sync_At);
+CREATE INDEX idx_requests_sync_at ON Hospital_Requests (Sync_At);
+
+CREATE TABLE Sync_Deletions (
+    Table_Name VARCHAR(64) NOT NULL,
+    Deleted_At DATETIME(6) NOT NULL,
+    Row_ID BIGINT NOT NULL,
+    PRIMARY KEY (Table_Name, Deleted_At, Row_ID)
+);
+
+DELIMITER //
+
+CREATE TRIGGER trg_donors_sync_insert BEFORE INSERT ON Donors
+FOR EACH ROW
+    SET NEW.Sync_At = UTC_TIMESTAMP(6)//
+
+CREATE TRIGGER trg_donors_sync_update BEFORE UPDATE ON Donors
+FOR EACH ROW
+    SET NEW.Sync_At = UTC_TIMESTAMP(6)//
+
+CREATE TRIGGER trg_donors_sync_delete AFTER DELETE ON Donors
+FOR EACH ROW
+    INSERT INTO Sync_Deletions (Table_Name, Deleted_At, Row_ID)
+    VALUES ('Donors', UTC_TIMESTAMP(6), OLD.Donor_ID)//
+
+CREATE TRIGGER trg_requests_sync_insert BEFORE INSERT ON Hospital_Requests
+FOR EACH ROW
+    SET NEW.Sync_At = UTC_TIMESTAMP(6)//
+
+CREATE TRIGGER trg_requests_sync_update BEFORE UPDATE ON Hospital_Requests
+FOR EACH ROW
+    SET NEW.Sync_At = UTC_TIMESTAMP(6)//
+
+CREATE TRIGGER trg_requests_sync_delete AFTER DELETE ON Hospital_Requests
+FOR EACH ROW
+    INSERT INTO Sync_Deletions (Table_Name, Deleted_At, Row_ID)
+    VALUES ('Hospital_Requests', UTC_TIMESTAMP(6), OLD.Request_ID)//
+
+DELIMITER ;
@@ -0,0 +1,358 @@
+"""Write-behind log of Blood_Stock movements (Stock_Movements, migrations/0011).
+
+Handlers call `record()` after their transaction has committed, so logging
+adds nothing to lock hold times: the event goes into a bounded in-process
+queue and that is all the request thread does. A background writer thread
+takes events off the queue as they arrive, appends them to the spool (below),
+and writes them to the database every `flush_interval` seconds (or as soon
+as `batch_size` are waiting) in multi-row INSERTs.
+
+Durability
+----------
+* With `spool_dir` set, the writer appends each event to a per-process
+  spool segment (one JSON line, flushed to the OS but not fsynced) as soon
+  as it is queued. It rotates the segment on each database write and
+  deletes it once its events are in the database. Every event carries a
+  random Event_ID and rows are written with INSERT IGNORE, so replaying a
+  segment is always safe.
+* A process that dies (crash, kill -9) leaves its segments behind; the next
+  writer to start in any process replays and deletes the segments of
+  processes that are no longer running. Spooled events survive a process
+  crash; they do not survive losing the machine before the OS writes the
+  page cache out.
+* Not everything is spooled: a crash after a handler commits but before
+  the writer has spooled its event (normally well under a millisecond:
+  the rest of the handler, then a queue hand-off) loses the event, and the
+  change shows in Blood_Stock but never in Stock_Movements. Closing that
+  window would mean writing the spool, or the log row, inside the
+  transaction. Events that find the queue full, which only happens while
+  the writer cannot keep up with the disk, are dropped the same way.
+* If the database is down for long, events are kept only in the segment
+  files and replayed from there later.
+* Without `spool_dir`, events still queued when the process dies uncleanly
+  are lost, and events that pile up while the database is down are dropped
+  once there are more than `queue_size`; both are counted in `stats()`.
+  Clean shutdowns flush the queue either way.
+
+Clock
+-----
+Moved_At is on the database clock, like the 'baseline' rows the migration
+stamped with NOW(6). `record()` notes the local time; each database write
+first reads NOW(6) and shifts its events by the difference between the two
+clocks, measured over that round trip. `stock_at()` sums the deltas up to
+a point in time on top of the baseline rows, so it reflects events already
+written.
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from instrumentation import log
+
+INSERT_QUERY = """
+    INSERT IGNORE INTO Stock_Movements
+    (Event_ID, Moved_At, Blood_Group, Component_Type, Delta, Reason, Request_ID, User_ID)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+STOCK_AT_QUERY = """
+    SELECT Blood_Group, Component_Type, SUM(Delta) as units
+    FROM Stock_Movements
+    WHERE Moved_At <= %s
+    GROUP BY Blood_Group, Component_Type
+    ORDER BY Blood_Group, Component_Type
+"""
+LOG_START_QUERY = "SELECT MIN(Moved_At) as started FROM Stock_Movements WHERE Reason = 'baseline'"
+CLOCK_QUERY = "SELECT NOW(6) as now"
+SEGMENT_PREFIX = 'movements-'
+_STOP = object()  # wakes the writer on close()
+
+
+class MovementLog:
+    def __init__(self, pool, spool_dir=None, queue_size=10000, batch_size=500, flush_interval=1.0):
+        self.pool = pool
+        self.spool_dir = spool_dir
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._start_lock = threading.Lock()
+        self._pid = None
+        self._registered = False
+
+    def record(self, blood_group, component, delta, reason, user_id=None, request_id=None):
+        """Queue one committed movement; touches neither the database nor the disk."""
+        if self._pid != os.getpid():
+            self._start()
+        event = (uuid.uuid4().hex, datetime.now(), blood_group, component, round(float(delta), 2),
+                 reason, request_id, user_id)
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+
+    def flush(self):
+        """Write everything queued so far; returns False if the database write failed."""
+        if self._pid != os.getpid():
+            return True
+        with self._flush_lock:
+            return self._flush()
+
+    def close(self, timeout=5.0):
+        if self._pid != os.getpid():
+            return
+        self._stopping = True
+        try:
+            self._queue.put_nowait(_STOP)
+        except queue.Full:
+            pass  # the writer is busy and checks _stopping before waiting again
+        self._thread.join(timeout)
+
+    def stats(self):
+        if self._pid != os.getpid():
+            return {'queued': 0, 'pending': 0, 'written': 0, 'dropped': 0, 'replayed': 0, 'last_error': None}
+        return {
+            'queued': self._queue.qsize(),
+            'pending': len(self._pending),
+            'written': self._written,
+            'dropped': self._dropped,
+            'replayed': self._replayed,
+            'last_error': self._last_error,
+        }
+
+    # --- writer side ---
+
+    def _start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # Fresh state in a new process (first use, or a forked worker).
+            self._pid = os.getpid()
+            self._token = uuid.uuid4().hex[:8]
+            self._lock = threading.Lock()
+            self._flush_lock = threading.Lock()
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._pending = []  # drained events not yet written
+            self._closed = []  # (seq, path) of rotated segments not yet deleted
+            self._overflowed = set()  # segments with events only on disk
+            self._stopping = False
+            self._written = self._dropped = self._replayed = 0
+            self._last_error = None
+            self._seq = 0
+            self._segment = None
+            self._segment_events = 0
+            if self.spool_dir:
+                os.makedirs(self.spool_dir, exist_ok=True)
+                self._open_segment()
+            self._thread = threading.Thread(target=self._run, name='movement-log-writer', daemon=True)
+            self._thread.start()
+            if not self._registered:
+                atexit.register(self.close)
+                self._registered = True
+
+    def _run(self):
+        if self.spool_dir:
+            self._recover()
+        deadline = time.monotonic() + self.flush_interval
+        while not self._stopping:
+            try:
+                event = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                event = None
+            with self._flush_lock:
+                self._take(event)
+                # After a failed write, wait out the interval instead of retrying per event.
+                full = len(self._pending) >= self.batch_size and self._last_error is None
+                if event is None or full or time.monotonic() >= deadline:
+                    self._flush()
+                    deadline = time.monotonic() + self.flush_interval
+        if self.flush():
+            with self._lock:
+                if self._segment is not None and not self._segment_events:
+                    self._segment.close()
+                    self._remove(self._segment_path())
+                    self._segment = None
+
+    def _take(self, event=None):
+        """Move `event` and everything queued behind it to pending, spooling them first."""
+        events = [] if event is None or event is _STOP else [event]
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if event is not _STOP:
+                events.append(event)
+        if not events:
+            return
+        with self._lock:
+            if self._segment is not None:
+                self._segment.write(''.join(json.dumps(event, default=str) + '\n' for event in events))
+                self._segment.flush()
+                self._segment_events += len(events)
+        self._pending.extend(events)
+
+    def _flush(self):
+        self._take()
+        with self._lock:
+            if self._segment is not None and self._segment_events:
+                self._segment.close()
+                self._closed.append((self._seq, self._segment_path()))
+                self._seq += 1
+                self._open_segment()
+        if not self._pending and not self._closed:
+            return True
+
+        try:
+            self._write(self._pending)
+            written = len(self._pending)
+            self._pending = []
+            for seq, path in self._closed:
+                if seq in self._overflowed:
+                    self._replay(path)
+                self._remove(path)
+            with self._lock:
+                self._overflowed -= {seq for seq, _ in self._closed}
+            self._closed = []
+            self._written += written
+            self._last_error = None
+            return True
+        except Exception as e:
+            self._last_error = str(e)
+            log.warning(f"⚠️ Stock movement log flush failed, will retry: {str(e)}")
+            if len(self._pending) > self.queue_size:
+                with self._lock:
+                    if self._segment is not None:
+                        # Everything pending is in the closed segments; reread it from there.
+                        self._overflowed.update(seq for seq, _ in self._closed)
+                    else:
+                        self._dropped += len(self._pending)
+                self._pending = []
+            return False
+
+    def _write(self, events):
+        if not events:
+            return
+        conn = self.pool.acquire()
+        try:
+            cur = conn.cursor()
+            try:
+                # Local time -> database time, measured from the middle of the round trip.
+                before = datetime.now()
+                cur.execute(CLOCK_QUERY)
+                after = datetime.now()
+                offset = cur.fetchone()['now'] - (before + (after - before) / 2)
+                rows = [event[:1] + (event[1] + offset,) + event[2:] for event in events]
+                for start in range(0, len(rows), self.batch_size):
+                    cur.executemany(INSERT_QUERY, rows[start:start + self.batch_size])
+                conn.commit()
+            finally:
+                cur.close()
+        except Exception:
+            self.pool.release(conn, discard=True)
+            raise
+        self.pool.release(conn)
+
+    def _replay(self, path):
+        events = []
+        with open(path) as segment:
+            for line in segment:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # torn last line of a crashed writer
+                event[1] = datetime.fromisoformat(event[1])
+                events.append(tuple(event))
+        self._write(events)
+        self._replayed += len(events)
+
+    def _recover(self):
+        """Replay and delete segments left by processes that are no longer running."""
+        for name in sorted(os.listdir(self.spool_dir)):
+            if not name.startswith(SEGMENT_PREFIX):
+                continue
+            try:
+                pid, token, _ = name[len(SEGMENT_PREFIX):].split('-', 2)
+                pid = int(pid)
+            except ValueError:
+                continue
+            if token == self._token or (pid != self._pid and _running(pid)):
+                continue
+            path = os.path.join(self.spool_dir, name)
+            try:
+                self._replay(path)
+            except FileNotFoundError:
+                continue  # another worker recovered it first
+            except Exception as e:
+                log.warning(f"⚠️ Could not replay stock movement spool {name}: {str(e)}")
+                continue
+            self._remove(path)
+            log.info(f"♻️ Replayed stock movement spool {name}")
+
+    def _open_segment(self):
+        self._segment = open(self._segment_path(), 'a')
+        self._segment_events = 0
+
+    def _segment_path(self):
+        return os.path.join(self.spool_dir, f'{SEGMENT_PREFIX}{self._pid}-{self._token}-{self._seq:08d}.jsonl')
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+if os.name == 'nt':
+    import ctypes
+    from ctypes import wintypes
+
+    _kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    _kernel32.OpenProcess.restype = wintypes.HANDLE
+    _kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+    _kernel32.GetExitCodeProcess.argtypes = (wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD))
+    _kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    ERROR_ACCESS_DENIED = 5
+    STILL_ACTIVE = 259
+
+    def _running(pid):
+        # os.kill(pid, 0) would send CTRL_C_EVENT on Windows, not probe the process.
+        handle = _kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            # Exists but belongs to someone we may not query; otherwise it is gone.
+            return ctypes.get_last_error() == ERROR_ACCESS_DENIED
+        try:
+            code = wintypes.DWORD()
+            if not _kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+                return True
+            return code.value == STILL_ACTIVE
+        finally:
+            _kernel32.CloseHandle(handle)
+else:
+    def _running(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+
+def log_started(cur):
+    """When the movement log starts (its baseline), or None before migration 0011."""
+    cur.execute(LOG_START_QUERY)
+    row = cur.fetchone()
+    return row['started'] if row else None
+
+
+def stock_at(cur, at):
+    """{(blood_group, component_type): units} as the log has it at `at`."""
+    cur.execute(STOCK_AT_QUERY, (at,))
+    return {(row['Blood_Group'], row['Component_Type']): float(row['units']) for row in cur.fetchall()}
@@ -0,0 +1,50 @@
+"""Opaque keyset cursors for the list endpoints.
+
+A cursor is the sort key of the last row on a page, JSON-encoded and
+base64url'd so clients treat it as a token. Filtering on the sort key
+(`WHERE key < last_key`) instead of OFFSET keeps every page an index range
+scan of `limit` rows, however deep the client pages.
+"""
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(key):
+    raw = json.dumps(key, separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_cursor(token, fields):
+    """Decode `token` into a dict holding exactly `fields`, or raise ValueError."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        key = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(key, dict) or set(key) != set(fields):
+        raise ValueError('Invalid cursor')
+    return key
+
+
+def page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Parse the `limit` query argument, clamped to [1, maximum]."""
+    if value in (None, ''):
+        return default
+    try:
+        return max(1, min(int(value), maximum))
+    except (TypeError, ValueError) as e:
+        raise ValueError('limit must be an integer') from e
+
+
+def paginate(rows, limit, key_of):
+    """Split a `limit + 1` fetch into (page, next_cursor)."""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(key_of(page[-1]))
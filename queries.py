@@ -0,0 +1,74 @@
+"""Registry of the fixed SQL on the hot paths.
+
+Each hot statement is defined once, at import, with `registry.define(name,
+sql)`. Queries whose WHERE clause depends on the filters (the donor and
+request pages, FEFO lot scans) define one statement per combination of
+filters instead of concatenating fragments per call, so the server only
+ever sees that fixed set of statement texts. A `Statement` is a `str`, so
+the async handlers and any plain `cur.execute` keep working with it
+unchanged.
+
+`registry.execute(cur, statement, params)` runs the statement as an
+ordinary parameterised query and counts it for `stats()`.
+
+The statements are not prepared on the server. PyMySQL and aiomysql only
+speak the text protocol, so the alternative is SQL-level PREPARE/EXECUTE,
+and binding its parameters costs either a second round trip per call or
+CLIENT.MULTI_STATEMENTS on the connection. Neither is worth it without a
+measured gain; benchmarks/prepared_statements.py measures how much of each
+statement's time is parsing, which is the most prepares could save.
+"""
+import re
+import threading
+from collections import Counter
+
+_NAME = re.compile(r'^[a-z][a-z0-9_]*$')
+
+
+class Statement(str):
+    """One registered statement: its SQL with %s placeholders, and its name."""
+
+    def __new__(cls, name, sql):
+        self = super().__new__(cls, sql)
+        self.name = name
+        return self
+
+
+class QueryRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._statements = {}  # name -> Statement
+        self._executions = Counter()  # name -> count
+
+    def define(self, name, sql):
+        """Register `sql` as `name` (idempotent for the same SQL) and return its Statement."""
+        if not _NAME.match(name):
+            raise ValueError(f"statement name {name!r} must be lower_snake_case")
+        with self._lock:
+            existing = self._statements.get(name)
+            if existing is not None:
+                if existing != sql:
+                    raise ValueError(f"statement {name!r} is already defined with different SQL")
+                return existing
+            statement = self._statements[name] = Statement(name, sql)
+            return statement
+
+    def get(self, name):
+        return self._statements[name]
+
+    def execute(self, cur, statement, params=()):
+        """Run `statement` on `cur`; read the rows with fetchone()/fetchall() as usual."""
+        with self._lock:
+            self._executions[statement.name] += 1
+        return cur.execute(statement, params)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'statements': len(self._statements),
+                'executions': sum(self._executions.values()),
+                'top': dict(self._executions.most_common(10)),
+            }
+
+
+registry = QueryRegistry()
@@ -0,0 +1,95 @@
+"""Donor search backed by indexes instead of `LIKE '%term%'` scans.
+
+Every search is one or two index-driven passes (see migrations/0002):
+
+* phone-like terms match the digits-only `Contact_Digits` column by prefix,
+  so "+91 98765-43" finds 919876543...;
+* one-character terms match `Name` by prefix;
+* anything longer first runs an exact substring pass (an ngram FULLTEXT
+  phrase match), then, if the page is not full yet, a typo pass.
+
+Two-character ngrams alone do not make a search typo-tolerant: "jhon" and
+"John" share no bigram. The typo pass instead searches, in one FULLTEXT
+BOOLEAN MODE query, for the term's variants at edit distance one that a
+phrase match can find: two adjacent characters swapped ("jhon" -> "john"),
+and for terms of FUZZY_DELETE_LENGTH or more one character dropped
+("johhn" -> "john"). A term has at most 2 * FUZZY_MAX_LENGTH - 1 of
+them, so the pass costs a bounded number of phrase lookups, the same kind
+the exact pass makes; terms outside FUZZY_MIN_LENGTH..FUZZY_MAX_LENGTH
+get no typo pass. Dropped or wrong letters in the middle of a word are
+not covered.
+
+Results are ranked prefix matches first, then by FULLTEXT relevance.
+"""
+import re
+
+PHONE_CHARS = re.compile(r'^[\d\s()+\-.]+$')
+NON_DIGITS = re.compile(r'\D')
+MIN_PHONE_DIGITS = 3
+NGRAM_TOKEN_SIZE = 2
+FUZZY_MIN_LENGTH = 4  # variants of shorter terms match too much to rank
+FUZZY_DELETE_LENGTH = 5  # also try dropping a character from terms this long
+FUZZY_MAX_LENGTH = 24
+
+
+def normalize_phone(value):
+    return NON_DIGITS.sub('', value or '')
+
+
+def escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _boolean_phrase(term):
+    # Double quotes are the only operator that matters inside a phrase.
+    return '"' + term.replace('"', ' ') + '"'
+
+
+def typo_variants(term):
+    """The term with two adjacent characters swapped or, if long enough, one dropped."""
+    variants = set()
+    for i in range(len(term)):
+        if len(term) >= FUZZY_DELETE_LENGTH:
+            variants.add(term[:i] + term[i + 1:])
+        if i + 1 < len(term):
+            variants.add(term[:i] + term[i + 1] + term[i] + term[i + 2:])
+    return sorted({' '.join(variant.split()) for variant in variants} - {term})
+
+
+def search_passes(term):
+    """Plan the queries for `term`.
+
+    Returns a list of (where_sql, where_params, order_sql, order_params)
+    tuples to be run in order until the requested page is full.
+    """
+    term = ' '.join((term or '').split())
+    if not term:
+        return []
+
+    digits = normalize_phone(term)
+    if PHONE_CHARS.match(term) and len(digits) >= MIN_PHONE_DIGITS:
+        return [(
+            "Contact_Digits LIKE %s", [escape_like(digits) + '%'],
+            "Donor_ID DESC", [],
+        )]
+
+    prefix = escape_like(term) + '%'
+    if len(term) < NGRAM_TOKEN_SIZE:
+        return [(
+            "Name LIKE %s", [prefix],
+            "Name, Donor_ID DESC", [],
+        )]
+
+    match = "MATCH(Name, Email) AGAINST (%s IN BOOLEAN MODE)"
+    passes = [(
+        match, [_boolean_phrase(term)],
+        f"(Name LIKE %s) DESC, {match} DESC, Donor_ID DESC", [prefix, _boolean_phrase(term)],
+    )]
+    if FUZZY_MIN_LENGTH <= len(term) <= FUZZY_MAX_LENGTH:
+        # Space-separated phrases with no operator: rows matching any of them.
+        variants = ' '.join(_boolean_phrase(variant) for variant in typo_variants(term))
+        passes.append((
+            match, [variants],
+            f"{match} DESC, Donor_ID DESC", [variants],
+        ))
+    return passes
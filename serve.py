@@ -0,0 +1,109 @@
+"""Production launcher: `python -m app serve`.
+
+Runs a gunicorn prefork master with the app imported once, before forking
+(preload), so workers share the interpreter, templates and module state
+copy-on-write instead of importing it N times.
+
+    python -m app serve                      # sync Flask, threaded workers
+    python -m app serve --async              # asgi.py on uvicorn workers
+    python -m app serve --workers 8 --threads 8 --max-requests 5000
+
+Signals, handled by the gunicorn master:
+
+* HUP   graceful reload: new workers are started and old ones finish their
+        in-flight requests (up to --graceful-timeout) before exiting, so no
+        request is dropped. Preloaded code is not re-imported; run with
+        --no-preload to have HUP pick up new code, or use USR2 to re-exec
+        the master and then TERM the old one.
+* TERM  graceful shutdown; INT/QUIT stop immediately.
+* TTIN/TTOU add/remove a worker.
+
+Each worker has its own connection pool, inventory cache, dashboard snapshot,
+event broker and metrics, so the database sees up to workers x
+MYSQL_POOL_MAX_SIZE connections, /metrics describes the worker that answered
+the scrape, and /api/stream only carries changes made through the same
+worker.
+
+gunicorn needs fork(); where it is unavailable (Windows) this falls back to
+a single threaded process.
+"""
+import argparse
+import os
+import sys
+
+from app import app, mysql, start_background_tasks
+from instrumentation import configure_logging, log
+
+
+def default_workers(use_async):
+    cores = os.cpu_count() or 1
+    # Sync workers block on the DB, so run more of them than cores; an
+    # async worker keeps a core busy on its own.
+    return cores if use_async else cores * 2 + 1
+
+
+def post_fork(server, worker):
+    """Reset per-process state the worker inherited from the preloading master."""
+    # The log writer thread and any pooled sockets belong to the master.
+    configure_logging(app.config['LOG_LEVEL'], app.config['LOG_QUEUE_SIZE'])
+    mysql.after_fork()
+    start_background_tasks()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m app serve', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--bind', default=app.config['SERVE_BIND'])
+    parser.add_argument('--workers', type=int, default=app.config['SERVE_WORKERS'])
+    parser.add_argument('--threads', type=int, default=app.config['SERVE_THREADS'])
+    parser.add_argument('--max-requests', type=int, default=app.config['SERVE_MAX_REQUESTS'])
+    parser.add_argument('--max-requests-jitter', type=int, default=app.config['SERVE_MAX_REQUESTS_JITTER'])
+    parser.add_argument('--graceful-timeout', type=int, default=app.config['SERVE_GRACEFUL_TIMEOUT'])
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='serve asgi.py on uvicorn workers')
+    parser.add_argument('--no-preload', dest='preload', action='store_false',
+                        help='import the app in each worker instead of the master')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    workers = args.workers or default_workers(args.use_async)
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        host, _, port = args.bind.rpartition(':')
+        log.warning("⚠️ gunicorn is not available on this platform; serving from a single process")
+        start_background_tasks()
+        if args.use_async:
+            import uvicorn
+            uvicorn.run('asgi:application', host=host or '0.0.0.0', port=int(port))
+        else:
+            app.run(host=host or '0.0.0.0', port=int(port), threaded=True)
+        return
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', [args.bind])
+            self.cfg.set('workers', workers)
+            self.cfg.set('preload_app', args.preload)
+            self.cfg.set('max_requests', args.max_requests)
+            self.cfg.set('max_requests_jitter', args.max_requests_jitter)
+            self.cfg.set('graceful_timeout', args.graceful_timeout)
+            self.cfg.set('post_fork', post_fork)
+            if args.use_async:
+                self.cfg.set('worker_class', 'uvicorn.workers.UvicornWorker')
+            else:
+                self.cfg.set('worker_class', 'gthread')
+                self.cfg.set('threads', args.threads)
+
+        def load(self):
+            if args.use_async:
+                from asgi import application
+                return application
+            return app
+
+    print(f"🚀 Serving on {args.bind}: {workers} {'async' if args.use_async else 'sync'} workers"
+          + ('' if args.use_async else f" x {args.threads} threads")
+          + f", up to {workers * app.config['MYSQL_POOL_MAX_SIZE']} DB connections")
+    Server().run()
@@ -0,0 +1,153 @@
+"""In-process snapshot of the dashboard payloads.
+
+The dashboard used to cost five stats queries plus one HTTP request per
+widget. The snapshot is built from a couple of queries the first time it is
+needed, kept current by the write handlers in app.py, and served straight
+from memory afterwards. Stock figures come from the shared InventoryCache.
+"""
+import threading
+import time
+from datetime import date
+
+from inventory import to_int
+
+CRITICAL_THRESHOLD = 20
+RECENT_DONATIONS_LIMIT = 5
+EXPIRING_LIMIT = 5
+
+COUNTERS_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM Donors) as total_donors,
+        (SELECT COUNT(*) FROM Hospital_Requests WHERE Status = 'Pending') as pending_requests,
+        (SELECT COUNT(*) FROM Donations WHERE Donation_Date >= %s) as donations_month
+"""
+
+RECENT_DONATIONS_QUERY = """
+    SELECT
+        d.Name as name,
+        d.Blood_Group as blood,
+        DATE_FORMAT(don.Donation_Date, '%%Y-%%m-%%d') as lastDonation
+    FROM Donations don
+    JOIN Donors d ON don.Donor_ID = d.Donor_ID
+    ORDER BY don.Donation_Date DESC
+    LIMIT %s
+"""
+
+
+class DashboardSnapshot:
+    """Thread-safe cache of everything /api/dashboard/summary returns.
+
+    `ttl` bounds how long changes made outside this process (other workers,
+    manual SQL) can stay invisible; writes made through app.py are applied
+    incrementally and never wait for the TTL.
+    """
+
+    def __init__(self, inventory, ttl=60):
+        self.inventory = inventory
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._state = None
+        self._built_at = 0.0
+        self._month = None
+        self.version = 0  # bumped by every adjust/invalidate
+
+    def get(self, cur):
+        """Return the summary payload, rebuilding it with `cur` if stale."""
+        with self._lock:
+            if self._is_stale():
+                self._state = self._build(cur)
+                self._built_at = time.monotonic()
+                self._month = date.today().replace(day=1)
+            return self._render(self.inventory.stock(cur))
+
+    def cached(self, inventory):
+        """Render from memory with the given stock rows, or None if a rebuild is due."""
+        with self._lock:
+            if self._is_stale():
+                return None
+            return self._render(inventory)
+
+    def fill(self, counters, recent, seen_version, inventory):
+        """Install COUNTERS_QUERY/RECENT_DONATIONS_QUERY rows run elsewhere and render.
+
+        The rows are rendered but not kept if an adjust/invalidate happened
+        after `seen_version` was read, since they may predate it.
+        """
+        with self._lock:
+            state = self._state_from(counters, recent)
+            if self.version == seen_version:
+                self._state = state
+                self._built_at = time.monotonic()
+                self._month = date.today().replace(day=1)
+            return self._render(inventory, state)
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._state = None
+
+    def adjust(self, counter, delta):
+        """Add `delta` to one of the scalar counters (e.g. 'totalDonors')."""
+        with self._lock:
+            self.version += 1
+            if self._state is not None:
+                self._state['counters'][counter] += delta
+
+    def _is_stale(self):
+        if self._state is None:
+            return True
+        if self._month != date.today().replace(day=1):
+            return True
+        return time.monotonic() - self._built_at > self.ttl
+
+    def _build(self, cur):
+        cur.execute(COUNTERS_QUERY, (date.today().replace(day=1),))
+        counters = cur.fetchone()
+        cur.execute(RECENT_DONATIONS_QUERY, (RECENT_DONATIONS_LIMIT,))
+        return self._state_from(counters, cur.fetchall())
+
+    @staticmethod
+    def _state_from(counters, recent):
+        return {
+            'counters': {
+                'totalDonors': counters['total_donors'] or 0,
+                'pendingRequests': counters['pending_requests'] or 0,
+                'donationsThisMonth': counters['donations_month'] or 0,
+            },
+            'recentDonations': list(recent),
+        }
+
+    def _render(self, inventory, state=None):
+        state = state or self._state
+        stock = {group: row['units'] for group, row in inventory.items()}
+        critical = critical_groups(stock)
+        expiring = sorted(
+            (group for group, row in inventory.items() if row['expiring'] > 0),
+            key=lambda group: -inventory[group]['expiring'],
+        )
+
+        stats = dict(state['counters'])
+        stats['unitsInStock'] = to_int(sum(stock.values()))
+        stats['criticalStock'] = len(critical)
+
+        return {
+            'success': True,
+            'stats': stats,
+            'criticalStock': [
+                {'blood': group, 'units': to_int(stock[group]), 'expiring': to_int(inventory[group]['expiring'])}
+                for group in critical
+            ],
+            'recentDonations': list(state['recentDonations']),
+            'expiringStock': [
+                {'blood': group, 'expiring': to_int(inventory[group]['expiring'])}
+                for group in expiring[:EXPIRING_LIMIT]
+            ],
+        }
+
+
+def critical_groups(stock):
+    """Blood groups under CRITICAL_THRESHOLD units, lowest stock first."""
+    return sorted(
+        (group for group, units in stock.items() if units < CRITICAL_THRESHOLD),
+        key=lambda group: stock[group],
+    )
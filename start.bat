@@ -1,6 +1,17 @@
 @echo off
 echo 🚀 Starting Flask Dashboard...
 
+REM --- Build the dashboard bundle (static/dist) if it is missing ---
+if not exist "static\dist\manifest.json" (
+    pushd frontend
+    if exist package-lock.json (
+        call npm ci && call npm run build
+    ) else (
+        call npm install && call npm run build
+    )
+    popd
+)
+
 REM --- Start Flask in background so the script continues ---
 start "" cmd /c "python app.py"
 
@@ -0,0 +1,129 @@
+"""Delta sync for client-side caches: rows changed or deleted since a version.
+
+Donors and Hospital_Requests rows carry the UTC time of their last change
+in Sync_At, and deletions leave tombstones in Sync_Deletions
+(migrations/0013). A version is a position in that history,
+`<microseconds since the epoch>-<id>`, or just the microseconds once
+everything stamped up to then has been sent; `0` is the beginning. A
+client keeps the `version` of its last sync and asks for everything after
+it; `delta` returns the changed rows in the list endpoints' shape, the
+deleted ids, and the version to ask from next time. Pages are bounded by
+`limit`; `more` says another request is needed to catch up.
+
+Stamps are taken before the writing transaction commits, so a change
+stamped at T can become visible after changes stamped later. Rather than
+make writers take turns, `delta` reads a low-water mark first: the start
+of the oldest transaction open on the server (information_schema.INNODB_TRX,
+PROCESS privilege), less `settle` seconds for the second resolution of
+that column and for a statement's stamp preceding its transaction's start.
+Anything stamped before the mark was committed or rolled back by then, so
+the rows read afterwards, in a fresh snapshot, hold every change up to the
+mark; only those are sent. A long transaction holds syncs back, it cannot
+make them skip a change.
+
+The mark only means something on the server that takes the writes, so
+feeds are read from the primary. A client ahead of the mark (restored
+from a backup, or the database's clock went back) gets `reset`: it must
+drop its copy and sync again from 0.
+"""
+from datetime import datetime, timedelta
+
+from queries import registry
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+LAST_ID = 2 ** 63 - 1  # a version without an id covers its whole microsecond
+
+LOW_WATER_QUERY = registry.define('sync_low_water', """
+    SELECT UTC_TIMESTAMP(6) - INTERVAL
+        COALESCE(TIMESTAMPDIFF(MICROSECOND, MIN(trx_started), NOW(6)), 0) MICROSECOND as low_water
+    FROM information_schema.INNODB_TRX
+    WHERE trx_mysql_thread_id <> CONNECTION_ID()
+""")
+
+DELETED_QUERY = registry.define('sync_deleted', """
+    SELECT Row_ID as id, Deleted_At as sync_at
+    FROM Sync_Deletions
+    WHERE Table_Name = %s AND Deleted_At <= %s
+    AND (Deleted_At > %s OR (Deleted_At = %s AND Row_ID > %s))
+    ORDER BY Deleted_At, Row_ID
+    LIMIT %s
+""")
+
+
+def parse_version(text):
+    """(stamp, id) for a version string from `delta`; ValueError if it is not one."""
+    micros, _, row_id = str(text).partition('-')
+    micros, row_id = int(micros), int(row_id) if row_id else LAST_ID
+    if micros < 0 or row_id < 0:
+        raise ValueError(f'Not a sync version: {text!r}')
+    return EPOCH + micros * MICROSECOND, row_id
+
+
+def format_version(stamp, row_id=LAST_ID):
+    micros = (stamp - EPOCH) // MICROSECOND
+    return str(micros) if row_id == LAST_ID else f'{micros}-{row_id}'
+
+
+def low_water(cur, settle):
+    """Stamp below which every change is final. Must precede the transaction's first read."""
+    registry.execute(cur, LOW_WATER_QUERY)
+    return cur.fetchone()['low_water'] - timedelta(seconds=settle)
+
+
+class SyncFeed:
+    """One synced table; `columns` is its list endpoint's SELECT list, which must alias `key` as `id`."""
+
+    def __init__(self, name, table, key, columns):
+        self.name = name
+        self.table = table
+        self.changed_query = registry.define(f'sync_{name}_changed', f"""
+            SELECT {columns}, Sync_At as sync_at
+            FROM {table}
+            WHERE Sync_At <= %s AND (Sync_At > %s OR (Sync_At = %s AND {key} > %s))
+            ORDER BY Sync_At, {key}
+            LIMIT %s
+        """)
+
+    def delta(self, cur, since, limit, settle):
+        """{'version', 'changed', 'deleted', 'more', 'reset'} for a client at version `since`.
+
+        `cur` must be on the primary, with no transaction open: the
+        low-water mark has to be read before the snapshot the rows come from.
+        """
+        stamp, row_id = parse_version(since)
+        mark = low_water(cur, settle)
+        if stamp > mark:
+            return {'version': '0', 'changed': [], 'deleted': [], 'more': True, 'reset': True}
+        if stamp == mark and row_id == LAST_ID:
+            return {'version': since, 'changed': [], 'deleted': [], 'more': False, 'reset': False}
+
+        registry.execute(cur, self.changed_query, (mark, stamp, stamp, row_id, limit))
+        changed = cur.fetchall()
+        registry.execute(cur, DELETED_QUERY, (self.table, mark, stamp, stamp, row_id, limit))
+        deleted = cur.fetchall()
+
+        # Both lists are in (stamp, id) order; take the first `limit` of the two merged.
+        events = sorted(
+            [(row['sync_at'], row['id'], 'changed', row) for row in changed]
+            + [(row['sync_at'], row['id'], 'deleted', row['id']) for row in deleted],
+            key=lambda event: event[:3],
+        )
+        more = len(changed) == limit or len(deleted) == limit
+        if more:
+            events = events[:limit]
+        rows, ids = [], []
+        for _, _, kind, item in events:
+            if kind == 'deleted':
+                ids.append(item)
+            else:
+                row = dict(item)
+                del row['sync_at']
+                rows.append(row)
+        return {
+            'version': format_version(*events[-1][:2]) if more else format_version(mark),
+            'changed': rows,
+            'deleted': ids,
+            'more': more,
+            'reset': False,
+        }
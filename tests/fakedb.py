@@ -0,0 +1,212 @@
+"""In-memory stand-in for the MySQL tables the approval handlers touch.
+
+It answers only the statements those handlers (and the auth hook in front
+of them) send, and raises on anything else, so a test fails loudly when a
+handler's SQL changes. What matters for the concurrency tests is modelled
+the way InnoDB does it: `FOR UPDATE` and UPDATE take exclusive row locks
+held until commit or rollback, a conditional UPDATE reports the rows it
+matched, and rollback undoes the transaction's writes.
+"""
+import re
+import threading
+from datetime import datetime, timedelta
+
+import pymysql
+
+LOCK_WAIT_TIMEOUT = 5.0
+
+
+def _ids(params):
+    return [int(p) for p in params]
+
+
+class FakeDatabase:
+    def __init__(self, stock, requests, lots=None):
+        """`stock` {blood_group: units}, `requests` {id: (blood_group, units, status)}, `lots` {blood_group: units}.
+
+        Each blood group gets one unexpired lot holding `lots[blood_group]`
+        units (the stock level by default).
+        """
+        self.stock = dict(stock)
+        self.requests = {
+            request_id: {'Request_ID': request_id, 'Blood_Group': blood_group,
+                         'Units_Requested': units, 'Status': status}
+            for request_id, (blood_group, units, status) in requests.items()
+        }
+        lots = stock if lots is None else lots
+        expires = datetime.now() + timedelta(days=10)
+        self.lots = {
+            lot_id: {'Lot_ID': lot_id, 'Blood_Group': blood_group, 'Units_Remaining': units, 'Expires_At': expires}
+            for lot_id, (blood_group, units) in enumerate(sorted(lots.items()), start=1)
+        }
+        self.fulfilled = []  # (request_id, units)
+        self.allocations = []  # (request_id, lot_id, units)
+        self._cond = threading.Condition()
+        self._owners = {}  # row key -> connection holding its lock
+
+    def connect(self):
+        return FakeConnection(self)
+
+    # --- locking ---
+
+    def lock(self, conn, key):
+        with self._cond:
+            while self._owners.get(key, conn) is not conn:
+                if not self._cond.wait(LOCK_WAIT_TIMEOUT):
+                    raise pymysql.err.OperationalError(1205, 'Lock wait timeout exceeded')
+            self._owners[key] = conn
+
+    def unlock_all(self, conn):
+        with self._cond:
+            for key in [key for key, owner in self._owners.items() if owner is conn]:
+                del self._owners[key]
+            self._cond.notify_all()
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+        self.undo = []
+
+    def cursor(self, *args):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.undo = []
+        self.db.unlock_all(self)
+
+    def rollback(self):
+        with self.db._cond:
+            while self.undo:
+                self.undo.pop()()
+        self.db.unlock_all(self)
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        self.rollback()
+
+    # Writes record how to reverse themselves for rollback.
+
+    def set_stock(self, blood_group, units):
+        old = self.db.stock[blood_group]
+        self.undo.append(lambda: self.db.stock.__setitem__(blood_group, old))
+        self.db.stock[blood_group] = units
+
+    def set_field(self, row, field, value):
+        old = row[field]
+        self.undo.append(lambda: row.__setitem__(field, old))
+        row[field] = value
+
+    def append(self, rows, item):
+        rows.append(item)
+        self.undo.append(lambda: rows.remove(item))
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.db = conn.db
+        self.rowcount = 0
+        self.lastrowid = None
+        self._rows = []
+
+    def execute(self, query, params=()):
+        sql = ' '.join(query.split())
+        params = list(params or ())
+        self._rows = self._run(sql, params)
+        if sql.startswith('SELECT'):
+            self.rowcount = len(self._rows)
+        return self.rowcount
+
+    def executemany(self, query, seq):
+        sql = ' '.join(query.split())
+        seq = [list(params) for params in seq]
+        if sql.startswith('INSERT INTO Requests_Fulfilled'):
+            for request_id, units, _ in seq:
+                self.conn.append(self.db.fulfilled, (request_id, units))
+        elif sql.startswith('INSERT INTO Lot_Allocations'):
+            for allocation in seq:
+                self.conn.append(self.db.allocations, tuple(allocation))
+        elif not sql.startswith('INSERT IGNORE INTO Stock_Movements'):
+            raise AssertionError(f"unexpected executemany: {sql}")
+        self.rowcount = len(seq)
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def close(self):
+        pass
+
+    def _run(self, sql, params):
+        db, conn = self.db, self.conn
+        if 'FROM Data_Versions' in sql:
+            return [{'Version': 1}]
+        if sql.startswith('SELECT user_id, username, role FROM Users'):
+            return [{'user_id': params[0], 'username': 'staff', 'role': 'staff'}]
+
+        if sql.startswith('SELECT') and 'FROM Hospital_Requests' in sql and sql.endswith('FOR UPDATE'):
+            ids = sorted(_ids(params))
+            for request_id in ids:
+                db.lock(conn, ('request', request_id))
+            return [dict(db.requests[i]) for i in ids if i in db.requests]
+
+        if sql.startswith('SELECT blood_group, units_available FROM Blood_Stock') and sql.endswith('FOR UPDATE'):
+            groups = sorted(params)
+            for blood_group in groups:
+                db.lock(conn, ('stock', blood_group))
+            return [{'blood_group': g, 'units_available': db.stock[g]} for g in groups if g in db.stock]
+
+        if sql.startswith('SELECT units_available FROM Blood_Stock'):
+            blood_group = params[0]
+            return [{'units_available': db.stock[blood_group]}] if blood_group in db.stock else []
+
+        if sql.startswith('UPDATE Blood_Stock'):
+            units, blood_group = params[0], params[1]
+            db.lock(conn, ('stock', blood_group))
+            # The conditional form (single approvals) checks and decrements in one step.
+            conditional = 'units_available >= %s' in sql
+            if blood_group not in db.stock or (conditional and db.stock[blood_group] < params[2]):
+                self.rowcount = 0
+            else:
+                conn.set_stock(blood_group, db.stock[blood_group] - units)
+                self.rowcount = 1
+            return []
+
+        if sql.startswith('SELECT Lot_ID, Units_Remaining, Expires_At FROM Blood_Lots'):
+            if 'Lot_ID >' in sql:
+                raise AssertionError("FEFO paging past the first page is not modelled")
+            blood_group = params[0]
+            rows = sorted((lot for lot in db.lots.values()
+                           if lot['Blood_Group'] == blood_group and lot['Units_Remaining'] > 0),
+                          key=lambda lot: (lot['Expires_At'], lot['Lot_ID']))[:params[-1]]
+            for lot in rows:
+                db.lock(conn, ('lot', lot['Lot_ID']))
+            return [dict(lot) for lot in rows]
+
+        if sql.startswith('UPDATE Blood_Lots SET Units_Remaining = Units_Remaining - CASE'):
+            count = len(re.findall(r'WHEN %s THEN %s', sql))
+            for lot_id, units in zip(params[0:2 * count:2], params[1:2 * count:2]):
+                lot = db.lots[lot_id]
+                conn.set_field(lot, 'Units_Remaining', lot['Units_Remaining'] - units)
+            self.rowcount = count
+            return []
+
+        if sql.startswith("UPDATE Hospital_Requests SET Status = 'Fulfilled'"):
+            ids = _ids(params)
+            for request_id in sorted(ids):
+                db.lock(conn, ('request', request_id))
+                conn.set_field(db.requests[request_id], 'Status', 'Fulfilled')
+            self.rowcount = len(ids)
+            return []
+
+        if sql.startswith('INSERT INTO Requests_Fulfilled'):
+            conn.append(db.fulfilled, (params[0], params[1]))
+            self.rowcount = 1
+            return []
+
+        raise AssertionError(f"unexpected query: {sql}")
@@ -0,0 +1,97 @@
+"""Rollups.refresh: non-locking source reads, upserted buckets, refresh bookkeeping."""
+from datetime import date
+
+import pytest
+
+from analytics import METRICS, Rollups
+from db import ConnectionPool
+
+
+class RecordingCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def execute(self, query, params=()):
+        sql = ' '.join(query.split())
+        self.conn.log.append((sql, params))
+        if 'FROM Rollup_State' in sql:
+            self._rows = [self.conn.state]
+        elif sql.startswith('SELECT') and 'GROUP BY' in sql:
+            self._rows = [{'day': date(2026, 10, 1), 'blood_group': 'A+', 'city': 'Pune', 'events': 2, 'units': 3}]
+        else:
+            self._rows = []
+
+    def executemany(self, query, seq):
+        self.conn.log.append((' '.join(query.split()), list(seq)))
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def close(self):
+        pass
+
+
+class RecordingConnection:
+    def __init__(self, state, fail_commit=False):
+        self.state = state
+        self.fail_commit = fail_commit
+        self.log = []
+        self.closed = False
+
+    def cursor(self):
+        return RecordingCursor(self)
+
+    def commit(self):
+        if self.fail_commit:
+            raise OSError("connection lost during commit")
+        self.log.append(('COMMIT', None))
+
+    def close(self):
+        self.closed = True
+
+
+def make_rollups(state, fail_commit=False):
+    conn = RecordingConnection(state, fail_commit)
+    return Rollups(ConnectionPool(lambda: conn, min_size=0, max_size=1), refresh_interval=300, lookback_days=2), conn
+
+
+def test_sources_are_read_without_locks_and_upserted():
+    rollups, conn = make_rollups({'High_Water_Mark': date(2026, 10, 10), 'fresh': 0})
+
+    assert rollups.refresh_now(max_age=300) == date(2026, 10, 8)
+
+    statements = [sql for sql, _ in conn.log]
+    for sql in statements:
+        if any(table in sql for table in ('FROM Donations', 'FROM Hospital_Requests', 'FROM Requests_Fulfilled')):
+            assert sql.startswith('SELECT') and 'FOR UPDATE' not in sql and 'LOCK IN SHARE MODE' not in sql
+    assert not any(sql.startswith('INSERT INTO Rollup_Daily') and 'SELECT' in sql for sql in statements)
+
+    upserts = [(sql, rows) for sql, rows in conn.log if sql.startswith('INSERT INTO Rollup_Daily')]
+    assert [rows[0][0] for _, rows in upserts] == list(METRICS)
+    assert all('ON DUPLICATE KEY UPDATE' in sql for sql, _ in upserts)
+    assert upserts[0][1] == [('donations', date(2026, 10, 1), 'A+', 'Pune', 2, 3)]
+    assert statements[-1] == 'COMMIT'
+    assert rollups._refreshed_at is not None
+
+
+def test_refresh_skipped_when_another_process_just_refreshed():
+    rollups, conn = make_rollups({'High_Water_Mark': date(2026, 10, 10), 'fresh': 1})
+
+    assert rollups.refresh_now(max_age=300) is None
+    assert not any(sql.startswith(('DELETE', 'INSERT')) for sql, _ in conn.log)
+    assert rollups._refreshed_at is None
+
+
+def test_failed_commit_is_not_recorded_as_a_refresh():
+    rollups, conn = make_rollups({'High_Water_Mark': None, 'fresh': None}, fail_commit=True)
+
+    with pytest.raises(OSError):
+        rollups.refresh_now()
+    assert rollups._refreshed_at is None
+    # The connection may be mid-transaction, so it is not reused.
+    assert conn.closed
+    assert rollups.pool.stats()['size'] == 0
@@ -0,0 +1,191 @@
+"""Single and batch approval against the row-locking fake in fakedb.py."""
+import threading
+
+import pytest
+
+import app as bloodbank
+from db import ConnectionPool
+from fakedb import FakeDatabase
+
+
+@pytest.fixture
+def make_db(monkeypatch):
+    """Point the app's pool at a fresh FakeDatabase and return it."""
+    # The movement log writes from its own thread; keep it out of these tests.
+    monkeypatch.setattr(bloodbank.stock_log, 'record', lambda *args, **kwargs: None)
+    bloodbank.app.testing = True
+    config = bloodbank.app.config
+
+    def make(**tables):
+        db = FakeDatabase(**tables)
+        pool = ConnectionPool(db.connect, min_size=0, max_size=config['MYSQL_POOL_MAX_SIZE'],
+                              timeout=config['MYSQL_POOL_TIMEOUT'])
+        monkeypatch.setattr(bloodbank.mysql, 'pool', pool)
+        return db
+
+    return make
+
+
+def staff_client():
+    client = bloodbank.app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 2
+        sess['username'] = 'staff'
+        sess['role'] = 'staff'
+    return client
+
+
+def test_approve_takes_stock_and_fulfills(make_db):
+    db = make_db(stock={'A+': 10}, requests={1: ('A+', 4, 'Pending')})
+
+    response = staff_client().post('/api/requests/approve/1')
+
+    assert response.status_code == 200
+    assert response.json['success']
+    assert db.stock['A+'] == 6
+    assert db.requests[1]['Status'] == 'Fulfilled'
+    assert db.fulfilled == [(1, 4)]
+    assert [(request_id, units) for request_id, _, units in db.allocations] == [(1, 4)]
+
+
+def test_approve_already_fulfilled_is_409(make_db):
+    db = make_db(stock={'A+': 10}, requests={1: ('A+', 4, 'Fulfilled')})
+
+    response = staff_client().post('/api/requests/approve/1')
+
+    assert response.status_code == 409
+    assert not response.json['success']
+    assert 'already Fulfilled' in response.json['message']
+    assert db.stock['A+'] == 10
+    assert db.fulfilled == []
+
+
+def test_second_approval_of_same_request_is_409(make_db):
+    db = make_db(stock={'O-': 10}, requests={7: ('O-', 3, 'Pending')})
+    client = staff_client()
+
+    assert client.post('/api/requests/approve/7').status_code == 200
+    assert client.post('/api/requests/approve/7').status_code == 409
+    assert db.stock['O-'] == 7
+    assert db.fulfilled == [(7, 3)]
+
+
+def test_approve_insufficient_stock_changes_nothing(make_db):
+    db = make_db(stock={'B+': 2}, requests={1: ('B+', 3, 'Pending')})
+
+    response = staff_client().post('/api/requests/approve/1')
+
+    assert response.status_code == 400
+    assert 'Insufficient stock' in response.json['message']
+    assert db.stock['B+'] == 2
+    assert db.requests[1]['Status'] == 'Pending'
+
+
+def test_approve_unknown_request_is_404(make_db):
+    make_db(stock={'A+': 10}, requests={})
+
+    assert staff_client().post('/api/requests/approve/99').status_code == 404
+
+
+def test_parallel_approvals_never_oversell(make_db):
+    """100 approvers of 100 different 1-unit requests compete for 40 units."""
+    db = make_db(stock={'AB+': 40}, requests={i: ('AB+', 1, 'Pending') for i in range(1, 101)})
+    statuses = []
+    start = threading.Barrier(100)
+
+    def approve(request_id):
+        client = staff_client()
+        start.wait()
+        statuses.append(client.post(f'/api/requests/approve/{request_id}').status_code)
+
+    threads = [threading.Thread(target=approve, args=(i,)) for i in range(1, 101)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert len(statuses) == 100
+    assert statuses.count(200) == 40
+    assert statuses.count(400) == 60
+    assert db.stock['AB+'] == 0
+    assert len(db.fulfilled) == 40
+    assert sum(1 for req in db.requests.values() if req['Status'] == 'Fulfilled') == 40
+
+
+def test_parallel_approvals_of_one_request_fulfill_it_once(make_db):
+    db = make_db(stock={'A-': 50}, requests={5: ('A-', 2, 'Pending')})
+    statuses = []
+    start = threading.Barrier(20)
+
+    def approve():
+        client = staff_client()
+        start.wait()
+        statuses.append(client.post('/api/requests/approve/5').status_code)
+
+    threads = [threading.Thread(target=approve) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert sorted(statuses) == [200] + [409] * 19
+    assert db.stock['A-'] == 48
+    assert db.fulfilled == [(5, 2)]
+
+
+def test_batch_reports_each_request(make_db):
+    db = make_db(
+        stock={'A+': 5, 'O+': 1},
+        requests={1: ('A+', 3, 'Pending'), 2: ('A+', 3, 'Pending'), 3: ('O+', 1, 'Fulfilled'), 4: ('O+', 1, 'Pending')},
+    )
+
+    response = staff_client().post('/api/requests/approve-batch', json={'request_ids': [4, 3, 2, 1, 99]})
+
+    assert response.status_code == 200
+    body = response.json
+    assert (body['approved'], body['failed']) == (2, 3)
+    results = {result['id']: result for result in body['results']}
+    assert results[1]['success'] and results[4]['success']
+    assert [results[i]['status'] for i in (1, 2, 3, 4, 99)] == [200, 400, 409, 200, 404]
+    assert 'Insufficient stock' in results[2]['message']
+    assert 'already Fulfilled' in results[3]['message']
+    assert results[99]['message'] == 'Request not found'
+    assert db.stock == {'A+': 2, 'O+': 0}
+    assert sorted(db.fulfilled) == [(1, 3), (4, 1)]
+
+
+def test_batch_marks_already_fulfilled_409(make_db):
+    db = make_db(stock={'A+': 5}, requests={1: ('A+', 1, 'Fulfilled'), 2: ('A+', 1, 'Pending')})
+
+    response = staff_client().post('/api/requests/approve-batch', json={'request_ids': [1, 2]})
+
+    assert [(r['id'], r['status']) for r in response.json['results']] == [(1, 409), (2, 200)]
+    assert db.stock['A+'] == 4
+    assert db.fulfilled == [(2, 1)]
+
+
+def test_parallel_batches_never_oversell(make_db):
+    """10 overlapping batches of 20 requests (2 units each) compete for 60 units."""
+    db = make_db(stock={'B-': 60}, requests={i: ('B-', 2, 'Pending') for i in range(1, 101)})
+    results = []
+    start = threading.Barrier(10)
+
+    def approve(batch):
+        client = staff_client()
+        start.wait()
+        response = client.post('/api/requests/approve-batch', json={'request_ids': batch})
+        results.append((response.status_code, response.json))
+
+    batches = [list(range(1 + i * 8, 21 + i * 8)) for i in range(10)]
+    threads = [threading.Thread(target=approve, args=(batch,)) for batch in batches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert len(results) == 10
+    assert all(status == 200 for status, _ in results)
+    approved = sum(body['approved'] for _, body in results)
+    assert approved == 30
+    assert db.stock['B-'] == 0
+    assert len(db.fulfilled) == len({request_id for request_id, _ in db.fulfilled}) == 30
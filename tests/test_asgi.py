@@ -0,0 +1,112 @@
+"""asgi.py: the Flask fallback runs requests concurrently; /api/stream is native."""
+import asyncio
+import threading
+
+from a2wsgi import WSGIMiddleware
+
+import asgi
+from app import broker
+
+
+def http_scope(path, headers=()):
+    return {
+        'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'', 'root_path': '',
+        'http_version': '1.1', 'scheme': 'http', 'server': ('testserver', 80),
+        'headers': [(name.encode(), value.encode()) for name, value in headers],
+    }
+
+
+class Client:
+    """Feeds one request into an ASGI app and collects what it sends."""
+
+    def __init__(self):
+        self.incoming = asyncio.Queue()
+        self.incoming.put_nowait({'type': 'http.request', 'body': b'', 'more_body': False})
+        self.sent = []
+        self.got_body = asyncio.Event()
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send(self, message):
+        self.sent.append(message)
+        if message['type'] == 'http.response.body' and message.get('body'):
+            self.got_body.set()
+
+    @property
+    def status(self):
+        return self.sent[0]['status']
+
+    @property
+    def body(self):
+        return b''.join(m.get('body', b'') for m in self.sent if m['type'] == 'http.response.body')
+
+
+def test_fallback_requests_run_concurrently():
+    both_started = threading.Barrier(2, timeout=5)
+
+    def wsgi_app(environ, start_response):
+        # Each request waits for the other, so this only finishes if they run in parallel.
+        both_started.wait()
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [environ['PATH_INFO'].encode()]
+
+    fallback = WSGIMiddleware(wsgi_app, workers=4)
+
+    async def run():
+        first, second = Client(), Client()
+        await asyncio.wait_for(asyncio.gather(
+            fallback(http_scope('/one'), first.receive, first.send),
+            fallback(http_scope('/two'), second.receive, second.send),
+        ), 10)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert (first.status, first.body) == (200, b'/one')
+    assert (second.status, second.body) == (200, b'/two')
+
+
+def test_stream_requires_login(monkeypatch):
+    async def nobody(req):
+        return None
+    monkeypatch.setattr(asgi, 'current_user', nobody)
+
+    async def run():
+        client = Client()
+        await asyncio.wait_for(asgi.application(http_scope('/api/stream'), client.receive, client.send), 5)
+        return client
+
+    client = asyncio.run(run())
+    assert client.status == 401
+
+
+def test_stream_delivers_events_and_ends_on_disconnect(monkeypatch):
+    async def staff(req):
+        return {'user_id': 2, 'username': 'staff', 'role': 'staff'}
+    monkeypatch.setattr(asgi, 'current_user', staff)
+    subscribers = broker.stats()['subscribers']
+
+    async def run():
+        client = Client()
+        task = asyncio.ensure_future(asgi.application(http_scope('/api/stream'), client.receive, client.send))
+        await asyncio.wait_for(client.got_body.wait(), 5)
+        assert broker.stats()['subscribers'] == subscribers + 1
+
+        client.got_body.clear()
+        # Published from another thread, as the Flask write handlers do.
+        publisher = threading.Thread(target=broker.publish, args=('stock', {'blood': 'A+', 'delta': -2}))
+        publisher.start()
+        publisher.join()
+        await asyncio.wait_for(client.got_body.wait(), 5)
+
+        await client.incoming.put({'type': 'http.disconnect'})
+        await asyncio.wait_for(task, 5)
+        return client
+
+    client = asyncio.run(run())
+    assert client.status == 200
+    assert dict(client.sent[0]['headers'])[b'content-type'].startswith(b'text/event-stream')
+    assert client.body.startswith(b'retry: 3000\n\n')
+    assert b'event: stock\n' in client.body
+    assert b'"blood": "A+"' in client.body
+    assert broker.stats()['subscribers'] == subscribers
@@ -0,0 +1,35 @@
+"""The authenticate hook in front of every view."""
+import pytest
+
+import app as bloodbank
+
+ORIGIN = 'http://127.0.0.1:5000'
+
+
+@pytest.fixture
+def client():
+    bloodbank.app.testing = True
+    return bloodbank.app.test_client()
+
+
+@pytest.mark.parametrize('path', ['/api/donors/add', '/api/requests/approve/1', '/api/requests/approve-batch'])
+def test_cors_preflight_is_not_authenticated(client, path):
+    response = client.options(path, headers={'Origin': ORIGIN, 'Access-Control-Request-Method': 'POST'})
+
+    assert response.status_code == 200
+    assert response.headers['Access-Control-Allow-Origin'] == ORIGIN
+    assert response.headers['Access-Control-Allow-Credentials'] == 'true'
+
+
+def test_request_without_session_is_401(client):
+    response = client.post('/api/donors/add', json={}, headers={'Origin': ORIGIN})
+
+    assert response.status_code == 401
+    assert response.json == {'success': False, 'message': 'Unauthorized - Please login'}
+
+
+def test_page_without_session_redirects_to_login(client):
+    response = client.get('/dashboard-react')
+
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/login')
@@ -0,0 +1,68 @@
+"""idempotency.py: claim() inserts first and only touches an existing key's row."""
+import json
+from datetime import datetime, timedelta
+
+import pymysql
+import pytest
+
+from idempotency import IdempotencyStore, KeyReused
+
+
+class Cursor:
+    """One Idempotency_Keys row at most; records the statements it was sent."""
+
+    def __init__(self, row=None):
+        self.row = row
+        self.sent = []
+        self.rowcount = 0
+
+    def execute(self, sql, params=()):
+        verb = sql.split()[0]
+        self.sent.append(verb)
+        if verb == 'INSERT':
+            if self.row is not None:
+                raise pymysql.err.IntegrityError(1062, "Duplicate entry")
+            self.row = {'Request_Hash': params[2], 'Expires_At': datetime.now() + timedelta(hours=1)}
+        elif verb == 'UPDATE':
+            expired = self.row['Expires_At'] < datetime.now()
+            if expired:
+                self.row = {'Request_Hash': params[0], 'Expires_At': datetime.now() + timedelta(hours=1)}
+            self.rowcount = int(expired)
+
+    def fetchone(self):
+        return dict(self.row)
+
+
+def stored(digest, expires_in, payload=None):
+    return {'Request_Hash': digest, 'Status_Code': 201, 'Response_Body': json.dumps(payload or {'id': 1}),
+            'Expires_At': datetime.now() + timedelta(seconds=expires_in)}
+
+
+@pytest.fixture
+def store():
+    return IdempotencyStore(ttl=3600)
+
+
+def test_new_key_is_a_single_insert(store):
+    cur = Cursor()
+    assert store.claim(cur, store.key_for('donors', 'k1', {'a': 1})) is None
+    assert cur.sent == ['INSERT']
+
+
+def test_completed_key_replays(store):
+    ikey = store.key_for('donors', 'k1', {'a': 1})
+    cur = Cursor(stored(ikey.digest, 60, {'id': 7}))
+
+    assert store.claim(cur, ikey) == (201, {'id': 7})
+    assert cur.sent == ['INSERT', 'UPDATE', 'SELECT']
+    with pytest.raises(KeyReused):
+        store.claim(Cursor(stored(ikey.digest, 60)), store.key_for('donors', 'k1', {'a': 2}))
+
+
+def test_expired_key_is_taken_over_in_place(store):
+    ikey = store.key_for('donors', 'k1', {'a': 2})
+    cur = Cursor(stored('old digest', -60))
+
+    assert store.claim(cur, ikey) is None
+    assert cur.sent == ['INSERT', 'UPDATE']
+    assert cur.row['Request_Hash'] == ikey.digest
@@ -0,0 +1,98 @@
+"""movements.py: the writer thread spools and writes on the database clock; dead processes' spools are replayed."""
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+from db import ConnectionPool
+from movements import CLOCK_QUERY, SEGMENT_PREFIX, MovementLog, _running
+
+
+class Conn:
+    def __init__(self, skew=timedelta(0)):
+        self.skew = skew  # database clock minus ours
+        self.rows = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, params=()):
+        assert query == CLOCK_QUERY
+
+    def fetchone(self):
+        return {'now': datetime.now() + self.skew}
+
+    def executemany(self, query, rows):
+        self.rows.extend(rows)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def dead_pid():
+    child = subprocess.Popen([sys.executable, '-c', 'pass'])
+    child.wait()
+    return child.pid
+
+
+def test_running():
+    assert _running(os.getpid())
+    assert not _running(dead_pid())
+
+
+def write_segment(spool_dir, pid, event_id):
+    path = os.path.join(spool_dir, f'{SEGMENT_PREFIX}{pid}-deadbeef-00000000.jsonl')
+    with open(path, 'w') as segment:
+        segment.write(json.dumps([event_id, '2026-10-01T10:00:00', 'A+', 'Whole Blood', -1.0,
+                                  'approved', 1, 2]) + '\n')
+    return path
+
+
+def test_recovers_segments_of_dead_processes_only(tmp_path):
+    spool_dir = str(tmp_path)
+    dead = write_segment(spool_dir, dead_pid(), 'from-dead-process')
+    live = write_segment(spool_dir, os.getppid(), 'from-live-process')
+    conn = Conn()
+    movements = MovementLog(ConnectionPool(lambda: conn, min_size=0, max_size=1),
+                            spool_dir=spool_dir, flush_interval=0.05)
+    try:
+        movements.record('O+', 'Whole Blood', 2, 'donation')
+        deadline = time.monotonic() + 5
+        while os.path.exists(dead) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert movements.flush()
+    finally:
+        movements.close()
+
+    assert not os.path.exists(dead)
+    assert os.path.exists(live)
+    written = [row[0] for row in conn.rows]
+    assert 'from-dead-process' in written
+    assert 'from-live-process' not in written
+    assert len(written) == 2  # plus the event recorded above
+
+
+def test_record_leaves_the_spool_and_the_clock_to_the_writer(tmp_path):
+    conn = Conn(skew=timedelta(hours=-3))
+    movements = MovementLog(ConnectionPool(lambda: conn, min_size=0, max_size=1),
+                            spool_dir=str(tmp_path), flush_interval=60)
+    try:
+        movements.record('O+', 'Whole Blood', 1, 'donation')
+        assert movements.flush()
+        with movements._flush_lock:  # the writer cannot take anything off the queue
+            recorded = datetime.now()
+            movements.record('A+', 'Plasma', -2, 'issued')
+            segment = movements._segment_path()
+            assert os.path.getsize(segment) == 0
+        assert movements.flush()
+    finally:
+        movements.close()
+
+    assert [row[2] for row in conn.rows] == ['O+', 'A+']
+    moved_at = conn.rows[1][1]
+    assert abs(moved_at - (recorded - timedelta(hours=3))) < timedelta(seconds=1)
@@ -0,0 +1,172 @@
+"""ConnectionPool against sqlite3 and a fake driver, so no MySQL is needed."""
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from db import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self, n):
+        self.n = n
+        self.alive = True
+        self.closed = False
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise OSError("server has gone away")
+
+    def close(self):
+        self.closed = True
+
+
+class Factory:
+    def __init__(self):
+        self.opened = []
+        self.fail = False
+
+    def __call__(self):
+        if self.fail:
+            raise OSError("can't connect")
+        conn = FakeConnection(len(self.opened))
+        self.opened.append(conn)
+        return conn
+
+
+def sqlite_connect():
+    return sqlite3.connect(':memory:', check_same_thread=False)
+
+
+def test_sqlite_connections_are_reused():
+    pool = ConnectionPool(sqlite_connect, min_size=0, max_size=2)
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE t (x)")
+    pool.release(conn)
+
+    again = pool.acquire()
+    assert again is conn
+    assert again.execute("SELECT COUNT(*) FROM t").fetchone() == (0,)
+    pool.release(again)
+    assert pool.stats()['size'] == 1
+
+
+def test_exhausted_pool_times_out():
+    pool = ConnectionPool(Factory(), min_size=0, max_size=2, timeout=0.05)
+    held = [pool.acquire(), pool.acquire()]
+
+    started = time.monotonic()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert time.monotonic() - started >= 0.05
+    assert pool.stats()['timeouts'] == 1
+    assert pool.stats()['size'] == 2
+
+    for conn in held:
+        pool.release(conn)
+
+
+def test_waiter_gets_released_connection():
+    pool = ConnectionPool(Factory(), min_size=0, max_size=1, timeout=2.0)
+    conn = pool.acquire()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    waiter.start()
+    time.sleep(0.05)
+    assert pool.stats()['waiting'] == 1
+
+    pool.release(conn)
+    waiter.join(1.0)
+    assert got == [conn]
+
+
+def test_discarded_connection_frees_its_slot():
+    factory = Factory()
+    pool = ConnectionPool(factory, min_size=0, max_size=1, timeout=0.05)
+    broken = pool.acquire()
+    # e.g. the request failed and its rollback raised
+    pool.release(broken, discard=True)
+
+    assert broken.closed
+    replacement = pool.acquire()
+    assert replacement is not broken
+    assert pool.stats()['discarded'] == 1
+    pool.release(replacement)
+
+
+def test_failed_connect_does_not_leak_a_slot():
+    factory = Factory()
+    pool = ConnectionPool(factory, min_size=0, max_size=1, timeout=0.05)
+    factory.fail = True
+    with pytest.raises(OSError):
+        pool.acquire()
+    assert pool.stats()['size'] == 0
+
+    factory.fail = False
+    conn = pool.acquire()
+    assert pool.stats()['in_use'] == 1
+    pool.release(conn)
+
+
+def test_dead_idle_connection_is_replaced_on_checkout():
+    factory = Factory()
+    pool = ConnectionPool(factory, min_size=0, max_size=1, ping_interval=0.0)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.alive = False
+    time.sleep(0.01)
+
+    replacement = pool.acquire()
+    assert replacement is not conn
+    assert conn.closed
+    assert pool.stats()['size'] == 1
+    pool.release(replacement)
+
+
+def test_reap_closes_idle_connections_above_min_size():
+    factory = Factory()
+    pool = ConnectionPool(factory, min_size=1, max_size=3, idle_timeout=0.05)
+    conns = [pool.acquire() for _ in range(3)]
+    for conn in conns:
+        pool.release(conn)
+    time.sleep(0.1)
+
+    assert pool.reap() == 2
+    assert pool.stats()['size'] == 1
+    assert sum(conn.closed for conn in factory.opened) == 2
+
+
+def test_warm_opens_min_size():
+    factory = Factory()
+    pool = ConnectionPool(factory, min_size=2, max_size=4)
+    pool.warm()
+
+    stats = pool.stats()
+    assert (stats['size'], stats['idle'], stats['in_use']) == (2, 2, 0)
+
+
+def test_reaper_thread_evicts_without_traffic():
+    factory = Factory()
+    pool = ConnectionPool(factory, min_size=0, max_size=2, idle_timeout=0.02)
+    pool.release(pool.acquire())
+    pool.start_reaper(0.02)
+    try:
+        deadline = time.monotonic() + 2.0
+        while pool.stats()['size'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert pool.stats()['size'] == 0
+        assert factory.opened[0].closed
+    finally:
+        pool.close()
+
+
+def test_after_fork_forgets_inherited_connections():
+    factory = Factory()
+    pool = ConnectionPool(factory, min_size=0, max_size=2)
+    pool.release(pool.acquire())
+    pool.after_fork()
+
+    assert pool.stats()['size'] == 0
+    # Shared with the parent, so not closed from the child.
+    assert not factory.opened[0].closed
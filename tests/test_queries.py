@@ -0,0 +1,53 @@
+"""queries.py: statements are defined once and run as plain parameterised queries."""
+import pymysql
+import pytest
+
+from db import PooledMySQL
+from queries import QueryRegistry
+
+
+class Cursor:
+    def __init__(self):
+        self.sent = []
+
+    def execute(self, query, params=()):
+        self.sent.append((query, params))
+        return 1
+
+
+def test_define_is_idempotent_and_rejects_conflicts():
+    registry = QueryRegistry()
+    statement = registry.define('donor_by_id', "SELECT * FROM Donors WHERE Donor_ID = %s")
+
+    assert registry.define('donor_by_id', "SELECT * FROM Donors WHERE Donor_ID = %s") is statement
+    assert registry.get('donor_by_id') is statement
+    assert statement == "SELECT * FROM Donors WHERE Donor_ID = %s" and statement.name == 'donor_by_id'
+    with pytest.raises(ValueError):
+        registry.define('donor_by_id', "SELECT * FROM Donors")
+    with pytest.raises(ValueError):
+        registry.define('Donor-By-ID', "SELECT 1")
+
+
+def test_execute_sends_the_statement_with_its_parameters():
+    registry = QueryRegistry()
+    by_id = registry.define('donor_by_id', "SELECT * FROM Donors WHERE Donor_ID = %s")
+    version = registry.define('data_version', "SELECT 1")
+    cur = Cursor()
+
+    registry.execute(cur, by_id, (7,))
+    registry.execute(cur, by_id, (8,))
+    registry.execute(cur, version)
+
+    assert cur.sent == [(by_id, (7,)), (by_id, (8,)), (version, ())]
+    assert registry.stats() == {'statements': 2, 'executions': 3, 'top': {'donor_by_id': 2, 'data_version': 1}}
+
+
+def test_pool_connections_never_allow_multiple_statements(monkeypatch):
+    opened = []
+    monkeypatch.setattr(pymysql, 'connect', lambda **kwargs: opened.append(kwargs))
+    config = {'MYSQL_HOST': 'db', 'MYSQL_PORT': 3306, 'MYSQL_USER': 'u', 'MYSQL_PASSWORD': 'p',
+              'MYSQL_DB': 'bank', 'MYSQL_CHARSET': 'utf8mb4', 'MYSQL_CURSORCLASS': None}
+
+    PooledMySQL.connect(config)
+
+    assert not opened[0].get('client_flag', 0) & pymysql.constants.CLIENT.MULTI_STATEMENTS
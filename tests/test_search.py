@@ -0,0 +1,25 @@
+"""search.py: which passes a term gets, and the typo pass's bounded variants."""
+from search import FUZZY_MAX_LENGTH, search_passes, typo_variants
+
+
+def test_phone_and_short_terms_get_one_pass():
+    assert search_passes('+91 98765')[0][1] == ['9198765%']
+    assert search_passes('j')[0][1] == ['j%']
+    assert len(search_passes('joh')) == 1
+
+
+def test_swapped_letters_are_found_by_the_typo_pass():
+    (_, exact, _, _), (_, typo, _, _) = search_passes('jhon')
+    assert exact == ['"jhon"']
+    assert '"john"' in typo[0].split()
+    assert 'Rahul Sharma' in typo_variants('Rahul Shrama')
+
+
+def test_only_longer_terms_drop_a_letter():
+    assert 'john' in typo_variants('johhn')
+    assert 'jon' not in typo_variants('john')
+
+
+def test_variants_are_bounded():
+    assert len(typo_variants('abcdefghijklmnopqrstuvwx')) <= 2 * FUZZY_MAX_LENGTH - 1
+    assert len(search_passes('x' * (FUZZY_MAX_LENGTH + 1))) == 1
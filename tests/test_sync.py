@@ -0,0 +1,103 @@
+"""sync.py: delta pages stay below the low-water mark and page by (stamp, id)."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from sync import LAST_ID, SyncFeed, format_version, parse_version
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def at(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+
+class Cursor:
+    """Answers the feed's three queries from in-memory rows, as MySQL would."""
+
+    def __init__(self, oldest_open, rows=(), deletions=()):
+        self.oldest_open = oldest_open  # low_water before `settle` is taken off
+        self.rows = sorted(rows)  # (sync_at, id)
+        self.deletions = sorted(deletions)
+        self.result = None
+
+    def execute(self, query, params=()):
+        if 'INNODB_TRX' in query:
+            self.result = [{'low_water': self.oldest_open}]
+            return
+        if 'FROM Sync_Deletions' in query:
+            _, mark, stamp, _, row_id, limit = params
+            source = self.deletions
+        else:
+            mark, stamp, _, row_id, limit = params
+            source = self.rows
+        self.result = [
+            {'id': i, 'name': f'row {i}', 'sync_at': s}
+            for s, i in source if s <= mark and (s, i) > (stamp, row_id)
+        ][:limit]
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+
+FEED = SyncFeed('test_donors', 'Donors', 'Donor_ID', "Donor_ID as id, Name as name")
+
+
+def sync_all(cur, since='0', limit=2):
+    """Follow `more` to the end; (changed ids, deleted ids, final version)."""
+    changed, deleted = [], []
+    while True:
+        delta = FEED.delta(cur, since, limit, settle=1)
+        assert not delta['reset']
+        changed += [row['id'] for row in delta['changed']]
+        deleted += delta['deleted']
+        since = delta['version']
+        if not delta['more']:
+            return changed, deleted, since
+
+
+def test_versions_round_trip():
+    assert parse_version('0') == (datetime(1970, 1, 1), LAST_ID)
+    assert parse_version(format_version(at(1.5), 7)) == (at(1.5), 7)
+    assert parse_version(format_version(at(1.5))) == (at(1.5), LAST_ID)
+    for bad in ('', 'abc', '-1', '5-x', '5--1'):
+        with pytest.raises(ValueError):
+            parse_version(bad)
+
+
+def test_changes_from_one_statement_page_by_id():
+    cur = Cursor(at(100), rows=[(at(1), i) for i in range(1, 6)], deletions=[(at(2), 9)])
+
+    changed, deleted, version = sync_all(cur)
+
+    assert changed == [1, 2, 3, 4, 5]
+    assert deleted == [9]
+    assert parse_version(version) == (at(99), LAST_ID)
+
+
+def test_nothing_at_or_after_the_low_water_mark_is_sent():
+    # A transaction opened at 10 may still commit rows stamped from 10 on; a later
+    # sync must then deliver them, so the version may not move past them now.
+    cur = Cursor(at(10), rows=[(at(1), 1), (at(8.5), 2), (at(9.5), 3), (at(20), 4)])
+
+    changed, _, version = sync_all(cur)
+    assert changed == [1, 2]
+
+    cur.rows = sorted(cur.rows + [(at(9.2), 5)])  # the open transaction commits
+    cur.oldest_open = at(30)
+    changed, _, _ = sync_all(cur, since=version)
+    assert changed == [5, 3, 4]
+
+
+def test_caught_up_and_reset():
+    cur = Cursor(at(10), rows=[(at(1), 1)])
+    _, _, version = sync_all(cur)
+
+    delta = FEED.delta(cur, version, 10, settle=1)
+    assert (delta['changed'], delta['more'], delta['version']) == ([], False, version)
+
+    cur.oldest_open = at(5)  # the database's clock went back, or a restore
+    assert FEED.delta(cur, version, 10, settle=1)['reset']